@@ -0,0 +1,73 @@
+"""add task history tables
+
+Revision ID: c4d81e2f6a90
+Revises: 56c6ee89dff3
+Create Date: 2025-11-20 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4d81e2f6a90'
+down_revision = '56c6ee89dff3'
+branch_labels = None
+depends_on = None
+
+# Days of history reconstructed from the tasks table (covers the 6-week velocity chart)
+BACKFILL_DAYS = 42
+
+
+def upgrade() -> None:
+    op.create_table('task_events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('task_id', sa.Integer(), nullable=False),
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('from_status', sa.String(), nullable=True),
+    sa.Column('to_status', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_task_events_id'), 'task_events', ['id'], unique=False)
+    op.create_index('ix_task_events_owner_id_created_at', 'task_events', ['owner_id', 'created_at'], unique=False)
+
+    op.create_table('task_daily_snapshots',
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('total_tasks', sa.Integer(), nullable=False),
+    sa.Column('completed_tasks', sa.Integer(), nullable=False),
+    sa.Column('completions', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('owner_id', 'day')
+    )
+
+    # Seed snapshots from existing tasks, using updated_at as the completion
+    # time (the same approximation the old velocity query relied on)
+    op.execute(f"""
+        INSERT INTO task_daily_snapshots (owner_id, day, total_tasks, completed_tasks, completions)
+        SELECT
+            o.owner_id,
+            d.day::date,
+            (SELECT count(*) FROM tasks t
+              WHERE t.owner_id = o.owner_id
+                AND COALESCE(t.created_at::date, current_date) <= d.day::date),
+            (SELECT count(*) FROM tasks t
+              WHERE t.owner_id = o.owner_id AND t.status = 'done'
+                AND COALESCE(t.updated_at::date, current_date) <= d.day::date),
+            (SELECT count(*) FROM tasks t
+              WHERE t.owner_id = o.owner_id AND t.status = 'done'
+                AND t.updated_at::date = d.day::date)
+        FROM (SELECT DISTINCT owner_id FROM tasks) o
+        CROSS JOIN generate_series(
+            current_date - {BACKFILL_DAYS - 1}, current_date, interval '1 day'
+        ) AS d(day)
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('task_daily_snapshots')
+    op.drop_index('ix_task_events_owner_id_created_at', table_name='task_events')
+    op.drop_index(op.f('ix_task_events_id'), table_name='task_events')
+    op.drop_table('task_events')
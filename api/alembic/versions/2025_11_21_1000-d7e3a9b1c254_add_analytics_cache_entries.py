@@ -0,0 +1,31 @@
+"""add analytics cache entries
+
+Revision ID: d7e3a9b1c254
+Revises: c4d81e2f6a90
+Create Date: 2025-11-21 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7e3a9b1c254'
+down_revision = 'c4d81e2f6a90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('analytics_cache_entries',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('analytics_cache_entries')
@@ -0,0 +1,52 @@
+"""add owner scoped composite indexes
+
+Revision ID: e2b6f4c8d013
+Revises: d7e3a9b1c254
+Create Date: 2025-11-22 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b6f4c8d013'
+down_revision = 'd7e3a9b1c254'
+branch_labels = None
+depends_on = None
+
+# (index name, table, columns) - one entry per owner-scoped query shape
+INDEXES = [
+    # List routes: WHERE owner_id = ? ORDER BY created_at, id
+    ('ix_tasks_owner_id_created_at_id', 'tasks', ['owner_id', 'created_at', 'id']),
+    ('ix_risks_owner_id_created_at_id', 'risks', ['owner_id', 'created_at', 'id']),
+    ('ix_projects_owner_id_created_at_id', 'projects', ['owner_id', 'created_at', 'id']),
+    ('ix_posts_user_id_created_at_id', 'posts', ['user_id', 'created_at', 'id']),
+    # /ai/history: WHERE user_id = ? ORDER BY created_at DESC
+    ('ix_ai_requests_user_id_created_at_id', 'ai_requests',
+     ['user_id', sa.text('created_at DESC'), sa.text('id DESC')]),
+    # Analytics: completed tasks by owner and completion time, open risks by owner
+    ('ix_tasks_owner_id_status_updated_at', 'tasks', ['owner_id', 'status', 'updated_at']),
+    ('ix_risks_owner_id_status', 'risks', ['owner_id', 'status']),
+    # Project delete cascades to its posts
+    ('ix_posts_project_id', 'posts', ['project_id']),
+]
+
+
+def upgrade() -> None:
+    # Build without locking out writes on large production tables
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name, table, columns, unique=False,
+                postgresql_concurrently=True, if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name, table_name=table,
+                postgresql_concurrently=True, if_exists=True,
+            )
@@ -0,0 +1,33 @@
+"""add auth epoch and revocations
+
+Revision ID: a4c8e2f6b0d3
+Revises: f3a7c5d9e1b2
+Create Date: 2025-11-24 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4c8e2f6b0d3'
+down_revision = 'f3a7c5d9e1b2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('auth_epoch', sa.Integer(), nullable=False, server_default='0'))
+    op.create_table('auth_revocations',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('auth_epoch', sa.Integer(), nullable=False),
+    sa.Column('revoked_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_index(op.f('ix_auth_revocations_revoked_at'), 'auth_revocations', ['revoked_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_auth_revocations_revoked_at'), table_name='auth_revocations')
+    op.drop_table('auth_revocations')
+    op.drop_column('users', 'auth_epoch')
@@ -0,0 +1,39 @@
+"""add refresh tokens table
+
+Revision ID: b5d9f3a7c1e4
+Revises: a4c8e2f6b0d3
+Create Date: 2025-11-25 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5d9f3a7c1e4'
+down_revision = 'a4c8e2f6b0d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('refresh_tokens',
+    sa.Column('jti_hash', sa.String(length=64), nullable=False),
+    sa.Column('family_id', sa.String(length=32), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.Column('revoked_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('jti_hash')
+    )
+    op.create_index('ix_refresh_tokens_active_family', 'refresh_tokens', ['family_id'], unique=False, postgresql_where=sa.text('revoked_at IS NULL'))
+    op.create_index('ix_refresh_tokens_user_id', 'refresh_tokens', ['user_id'], unique=False)
+    op.create_index('ix_refresh_tokens_expires_at', 'refresh_tokens', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_refresh_tokens_expires_at', table_name='refresh_tokens')
+    op.drop_index('ix_refresh_tokens_user_id', table_name='refresh_tokens')
+    op.drop_index('ix_refresh_tokens_active_family', table_name='refresh_tokens', postgresql_where=sa.text('revoked_at IS NULL'))
+    op.drop_table('refresh_tokens')
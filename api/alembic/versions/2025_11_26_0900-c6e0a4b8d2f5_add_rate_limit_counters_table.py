@@ -0,0 +1,31 @@
+"""add rate limit counters table
+
+Revision ID: c6e0a4b8d2f5
+Revises: b5d9f3a7c1e4
+Create Date: 2025-11-26 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c6e0a4b8d2f5'
+down_revision = 'b5d9f3a7c1e4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('rate_limit_counters',
+    sa.Column('key', sa.String(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index(op.f('ix_rate_limit_counters_expires_at'), 'rate_limit_counters', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_rate_limit_counters_expires_at'), table_name='rate_limit_counters')
+    op.drop_table('rate_limit_counters')
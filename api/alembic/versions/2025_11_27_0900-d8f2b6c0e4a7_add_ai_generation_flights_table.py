@@ -0,0 +1,32 @@
+"""add ai generation flights table
+
+Revision ID: d8f2b6c0e4a7
+Revises: c6e0a4b8d2f5
+Create Date: 2025-11-27 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8f2b6c0e4a7'
+down_revision = 'c6e0a4b8d2f5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('ai_generation_flights',
+    sa.Column('key', sa.String(length=64), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('tokens_used', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index(op.f('ix_ai_generation_flights_created_at'), 'ai_generation_flights', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_ai_generation_flights_created_at'), table_name='ai_generation_flights')
+    op.drop_table('ai_generation_flights')
@@ -0,0 +1,32 @@
+"""add posts updated_at index
+
+Revision ID: e4a9c1d7f3b2
+Revises: d8f2b6c0e4a7
+Create Date: 2025-11-28 09:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4a9c1d7f3b2'
+down_revision = 'd8f2b6c0e4a7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The hashtag index reads back posts changed since its last sync
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_posts_updated_at', 'posts', ['updated_at'], unique=False,
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_posts_updated_at', table_name='posts',
+            postgresql_concurrently=True, if_exists=True,
+        )
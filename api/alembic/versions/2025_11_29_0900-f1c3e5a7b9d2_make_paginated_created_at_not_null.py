@@ -0,0 +1,35 @@
+"""make created_at not null on paginated tables
+
+Revision ID: f1c3e5a7b9d2
+Revises: e4a9c1d7f3b2
+Create Date: 2025-11-29 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1c3e5a7b9d2'
+down_revision = 'e4a9c1d7f3b2'
+branch_labels = None
+depends_on = None
+
+# Keyset pagination orders and seeks on (created_at, id), which a NULL breaks
+TABLES = ['tasks', 'risks', 'projects', 'posts', 'ai_requests']
+# Tables with an updated_at to backfill from; the rest get the migration time
+HAS_UPDATED_AT = {'tasks', 'risks', 'projects', 'posts'}
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        fallback = "timezone('utc', now())"
+        if table in HAS_UPDATED_AT:
+            fallback = f"COALESCE(updated_at, {fallback})"
+        op.execute(f"UPDATE {table} SET created_at = {fallback} WHERE created_at IS NULL")
+        op.alter_column(table, 'created_at', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade() -> None:
+    for table in reversed(TABLES):
+        op.alter_column(table, 'created_at', existing_type=sa.DateTime(), nullable=True)
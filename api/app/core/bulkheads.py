@@ -0,0 +1,157 @@
+"""
+Bulkheads: separate capacity for each group of routes.
+
+Every route belongs to one named pool (ai, export, auth, crud), set by its
+router's ``route_class=bulkhead_route(...)`` or by the @bulkhead decorator
+on the endpoint. A request holds one of its pool's slots from dependency
+resolution until the last byte of the response is sent, so slow or
+streaming AI calls and report renders cannot use up the capacity CRUD
+routes need. When a pool is full, requests queue for up to its
+BULKHEAD_<POOL>_QUEUE_TIMEOUT_SECONDS and are then rejected with
+BulkheadFull (a 503).
+
+Sync endpoints run on their pool's own thread limiter rather than AnyIO's
+default one, which is left to sync dependencies and streamed iterators.
+"""
+
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, Type
+import functools
+import inspect
+import time
+
+import anyio
+import anyio.to_thread
+from fastapi.routing import APIRoute
+
+from app.core.config import settings
+from app.core.metrics import LatencyStats
+
+
+class BulkheadFull(Exception):
+    """Raised when a request waited its pool's queue timeout without getting a slot."""
+
+    def __init__(self, pool: str):
+        super().__init__(f"The {pool} pool is full")
+        self.pool = pool
+
+
+class Bulkhead:
+    def __init__(self, name: str, concurrency: int, queue_timeout: float):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue_timeout = queue_timeout
+        self._slots = anyio.CapacityLimiter(concurrency)
+        # Only threads of requests already holding a slot, so never contended
+        self.threads = anyio.CapacityLimiter(concurrency)
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+        self.wait = LatencyStats()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        token = object()
+        start = time.perf_counter()
+        try:
+            self._slots.acquire_on_behalf_of_nowait(token)
+        except anyio.WouldBlock:
+            self.waiting += 1
+            try:
+                with anyio.move_on_after(self.queue_timeout) as scope:
+                    await self._slots.acquire_on_behalf_of(token)
+            finally:
+                self.waiting -= 1
+            if scope.cancelled_caught:
+                self.rejected += 1
+                raise BulkheadFull(self.name)
+        self.wait.record(time.perf_counter() - start)
+
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._slots.release_on_behalf_of(token)
+
+    def stats(self) -> dict:
+        return {
+            "concurrency": self.concurrency,
+            "active": self.active,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+            "queue_timeout_seconds": self.queue_timeout,
+            "wait": self.wait.stats(),
+        }
+
+
+bulkheads: Dict[str, Bulkhead] = {
+    "ai": Bulkhead("ai", settings.BULKHEAD_AI_CONCURRENCY, settings.BULKHEAD_AI_QUEUE_TIMEOUT_SECONDS),
+    "export": Bulkhead(
+        "export", settings.BULKHEAD_EXPORT_CONCURRENCY, settings.BULKHEAD_EXPORT_QUEUE_TIMEOUT_SECONDS
+    ),
+    "auth": Bulkhead("auth", settings.BULKHEAD_AUTH_CONCURRENCY, settings.BULKHEAD_AUTH_QUEUE_TIMEOUT_SECONDS),
+    "crud": Bulkhead("crud", settings.BULKHEAD_CRUD_CONCURRENCY, settings.BULKHEAD_CRUD_QUEUE_TIMEOUT_SECONDS),
+}
+
+
+def _pool(name: str) -> Bulkhead:
+    if name not in bulkheads:
+        raise ValueError(f"Unknown bulkhead: {name}")
+    return bulkheads[name]
+
+
+def bulkhead(name: str) -> Callable:
+    """Put one endpoint in pool ``name``, whatever its router's default."""
+    _pool(name)
+
+    def assign(endpoint: Callable) -> Callable:
+        endpoint.__bulkhead__ = name
+        return endpoint
+    return assign
+
+
+def _run_in_pool_threads(endpoint: Callable, pool: Bulkhead) -> Callable:
+    # FastAPI reads the signature through __wrapped__ and awaits the coroutine
+    @functools.wraps(endpoint)
+    async def run(*args, **kwargs):
+        return await anyio.to_thread.run_sync(
+            functools.partial(endpoint, *args, **kwargs), limiter=pool.threads
+        )
+    return run
+
+
+class BulkheadRoute(APIRoute):
+    """APIRoute whose requests hold a slot in their bulkhead pool."""
+
+    pool_name = "crud"
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        pool = _pool(getattr(endpoint, "__bulkhead__", self.pool_name))
+        self.bulkhead = pool
+        if not inspect.iscoroutinefunction(endpoint):
+            endpoint = _run_in_pool_threads(endpoint, pool)
+        super().__init__(path, endpoint, **kwargs)
+
+        app = self.app
+
+        async def guarded(scope, receive, send) -> None:
+            async with pool.slot():
+                await app(scope, receive, send)
+
+        self.app = guarded
+
+
+_route_classes: Dict[str, Type[BulkheadRoute]] = {}
+
+
+def bulkhead_route(name: str) -> Type[BulkheadRoute]:
+    """Route class for ``APIRouter(route_class=...)`` putting the router's endpoints in pool ``name``."""
+    _pool(name)
+    if name not in _route_classes:
+        _route_classes[name] = type(f"{name.title()}BulkheadRoute", (BulkheadRoute,), {"pool_name": name})
+    return _route_classes[name]
+
+
+def bulkhead_stats() -> dict:
+    return {name: pool.stats() for name, pool in bulkheads.items()}
@@ -1,5 +1,7 @@
+from pydantic import model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import Optional
+from typing import Dict, Optional
+from ipaddress import IPv4Network, IPv6Network, ip_network
 from pathlib import Path
 
 # Get the path to the .env file (in backend directory)
@@ -11,26 +13,230 @@ class Settings(BaseSettings):
     # API Settings
     API_V1_STR: str = "/api/v1"
     PROJECT_NAME: str = "JerryGFit API"
+    # API processes. uvicorn uses it as the default for --workers, so set it
+    # rather than passing --workers and per-process caches can tell
+    WEB_CONCURRENCY: int = 1
 
     # Security
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    # Per-process LRU of refresh tokens from revoked families
+    REFRESH_TOKEN_REVOKED_CACHE_MAX_ENTRIES: int = 10000
+    # A token presented again this soon after it was rotated, while its
+    # successor is still active, gets a retryable 409 instead of revoking the
+    # family (two tabs refreshing at once)
+    REFRESH_TOKEN_REUSE_GRACE_SECONDS: float = 5.0
+    # Extra JWT signing keys by kid, as JSON: {"2025-11": "..."}. New tokens are
+    # signed with JWT_ACTIVE_KID (SECRET_KEY when unset). Tokens without a kid
+    # verify against SECRET_KEY while it signs new tokens, is listed in
+    # JWT_SIGNING_KEYS, or JWT_ACCEPT_LEGACY_TOKENS is on; otherwise they are
+    # rejected. To rotate, add the new key, then switch the active kid, and
+    # drop the old key (or turn JWT_ACCEPT_LEGACY_TOKENS off, for SECRET_KEY)
+    # once its refresh tokens have expired.
+    JWT_SIGNING_KEYS: Dict[str, str] = {}
+    JWT_ACTIVE_KID: Optional[str] = None
+    JWT_ACCEPT_LEGACY_TOKENS: bool = True
+    # How often each process reloads revoked token claims (role/active changes)
+    AUTH_REVOCATION_REFRESH_SECONDS: float = 5.0
+    # bcrypt cost; existing hashes with another cost are rehashed on login
+    BCRYPT_ROUNDS: int = 12
+    # Password hashing processes (0 hashes in the threadpool) and how many
+    # hashes may be running or queued before new ones are rejected with 503
+    PASSWORD_HASH_PROCESSES: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
 
     # Database
     DATABASE_URL: str
+    # Connection pool, per engine: each API process has a sync engine
+    # (psycopg2, threadpool routes and job workers) and an async one (asyncpg).
+    # Size it so workers x 2 x (size + overflow) stays under max_connections.
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0  # Seconds a request waits for a connection before failing
+    DB_POOL_RECYCLE: int = 1800  # Reconnect connections older than this; -1 never
+    DB_POOL_PRE_PING: bool = True
+    # Behind PgBouncer in transaction mode: no app-side pool (NullPool) and
+    # no driver-prepared statements
+    DB_PGBOUNCER_MODE: bool = False
+
+    # Authenticated-user principal cache (id, role, is_active) per process.
+    # PRINCIPAL_CACHE_NOTIFY broadcasts evictions to every process over
+    # Postgres LISTEN/NOTIFY; without it other processes see changes within the TTL.
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+    PRINCIPAL_CACHE_NOTIFY: bool = False
+
+    # Rate limiting, keyed per authenticated user (client IP when anonymous).
+    # RATE_LIMIT_STORAGE_URI takes any `limits` storage URI; "database://"
+    # shares counters between processes through Postgres, synced in batches.
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_STORAGE_URI: str = "database://"
+    RATE_LIMIT_SYNC_INTERVAL_SECONDS: float = 1.0
+    RATE_LIMIT_DEFAULT: str = "100/minute"  # Per route
+    AI_RATE_LIMIT: str = "20/minute"  # Generations per user across all AI routes
+    # Comma-separated addresses or CIDR ranges of reverse proxies whose
+    # X-Forwarded-For is believed when keying anonymous requests. Empty: the
+    # header is ignored and the peer address is used, so clients reaching the
+    # API directly cannot pick their own bucket.
+    TRUSTED_PROXIES: str = ""
+
+    # Bulkheads: requests each route group (ai, export, auth, crud) may have
+    # in flight per process, and how long a request waits for a free slot
+    # before it is rejected with 503
+    BULKHEAD_AI_CONCURRENCY: int = 16
+    BULKHEAD_AI_QUEUE_TIMEOUT_SECONDS: float = 5.0
+    BULKHEAD_EXPORT_CONCURRENCY: int = 4
+    BULKHEAD_EXPORT_QUEUE_TIMEOUT_SECONDS: float = 10.0
+    BULKHEAD_AUTH_CONCURRENCY: int = 32
+    BULKHEAD_AUTH_QUEUE_TIMEOUT_SECONDS: float = 5.0
+    BULKHEAD_CRUD_CONCURRENCY: int = 100
+    BULKHEAD_CRUD_QUEUE_TIMEOUT_SECONDS: float = 2.0
 
     # CORS - Comma-separated string of allowed origins
     BACKEND_CORS_ORIGINS: str = "http://localhost:3000,http://localhost:3001,https://jerrygfit.com,https://www.jerrygfit.com"
 
+    @model_validator(mode="after")
+    def check_active_signing_key(self) -> "Settings":
+        if self.JWT_ACTIVE_KID is not None and self.JWT_ACTIVE_KID not in self.JWT_SIGNING_KEYS:
+            raise ValueError(f"JWT_ACTIVE_KID {self.JWT_ACTIVE_KID!r} is not in JWT_SIGNING_KEYS")
+        return self
+
+    @model_validator(mode="after")
+    def check_analytics_cache_backend(self) -> "Settings":
+        if self.ANALYTICS_CACHE_BACKEND == "memory" and self.WEB_CONCURRENCY > 1:
+            raise ValueError(
+                "ANALYTICS_CACHE_BACKEND=memory cannot be used with WEB_CONCURRENCY > 1; use database"
+            )
+        return self
+
+    @property
+    def accepts_tokens_without_kid(self) -> bool:
+        return (
+            self.JWT_ACTIVE_KID is None
+            or self.JWT_ACCEPT_LEGACY_TOKENS
+            or self.SECRET_KEY in self.JWT_SIGNING_KEYS.values()
+        )
+
+    @property
+    def analytics_cache_backend(self) -> str:
+        return self.ANALYTICS_CACHE_BACKEND or ("database" if self.WEB_CONCURRENCY > 1 else "memory")
+
+    @property
+    def trusted_proxies(self) -> list[IPv4Network | IPv6Network]:
+        return [ip_network(p.strip(), strict=False) for p in self.TRUSTED_PROXIES.split(",") if p.strip()]
+
     @property
     def cors_origins(self) -> list[str]:
         """Parse CORS origins from comma-separated string to list"""
         return [origin.strip() for origin in self.BACKEND_CORS_ORIGINS.split(",") if origin.strip()]
 
+    # Analytics cache: "memory" (per worker) or "database" (shared by all
+    # workers). Unset, it is "database" when WEB_CONCURRENCY > 1. "memory" is
+    # refused with several workers: a change made through one worker would
+    # not invalidate the others' copies. The database backend keeps each
+    # worker's recent hits in memory for ANALYTICS_CACHE_LOCAL_TTL_SECONDS, the
+    # longest a change made through another worker can go unseen (0 disables).
+    ANALYTICS_CACHE_BACKEND: Optional[str] = None
+    ANALYTICS_CACHE_TTL_SECONDS: int = 60
+    ANALYTICS_CACHE_MAX_ENTRIES: int = 1024
+    ANALYTICS_CACHE_LOCAL_TTL_SECONDS: float = 5
+
+    # PDF reports: render processes (0 renders in the calling thread) and the
+    # rendered-output cache, keyed on the user's analytics version
+    REPORT_RENDER_PROCESSES: int = 2
+    REPORT_CACHE_TTL_SECONDS: int = 60
+    REPORT_CACHE_MAX_ENTRIES: int = 256
+
     # OpenAI (for future use)
     OPENAI_API_KEY: Optional[str] = None
+    OPENAI_BASE_URL: Optional[str] = None  # Override to point at a proxy or local fake server
+
+    # AI generation cache: exact prompt matches, plus optionally prompts that
+    # differ only in case, punctuation or spacing. Excluded types are
+    # comma-separated request types.
+    AI_CACHE_ENABLED: bool = True
+    AI_CACHE_TTL_SECONDS: int = 3600
+    AI_CACHE_MAX_ENTRIES: int = 2048
+    AI_CACHE_SIMILARITY_ENABLED: bool = True
+    AI_CACHE_EXCLUDED_TYPES: str = ""
+
+    @property
+    def ai_cache_excluded_types(self) -> set[str]:
+        return {t.strip() for t in self.AI_CACHE_EXCLUDED_TYPES.split(",") if t.strip()}
+
+    # Identical generations in flight at the same time share one OpenAI call.
+    # Across workers this goes through a Postgres advisory lock, which holds a
+    # database connection per generating or waiting request.
+    AI_COALESCE_ENABLED: bool = True
+    AI_COALESCE_ACROSS_WORKERS: bool = False
+    AI_COALESCE_WAIT_SECONDS: float = 60.0  # Longest wait on another worker's call before making our own
+
+    # OpenAI transport. Timeouts, 429s and 5xx are retried per model with
+    # jittered exponential backoff (honouring Retry-After up to the backoff
+    # cap; longer waits move straight on), then the models after the requested
+    # one in AI_FALLBACK_MODELS are tried in order. A model failing
+    # AI_BREAKER_FAILURE_THRESHOLD calls in a row is skipped for
+    # AI_BREAKER_RESET_SECONDS.
+    AI_REQUEST_TIMEOUT_SECONDS: float = 60.0
+    AI_RETRY_MAX_ATTEMPTS: int = 3  # Per model
+    AI_RETRY_BACKOFF_SECONDS: float = 0.5
+    AI_RETRY_MAX_BACKOFF_SECONDS: float = 8.0
+    AI_BREAKER_FAILURE_THRESHOLD: int = 5
+    AI_BREAKER_RESET_SECONDS: float = 30.0
+    AI_FALLBACK_MODELS: str = "gpt-4,gpt-4-turbo,gpt-3.5-turbo"
+    # Hedged requests for the comma-separated request types (e.g. "hashtag"):
+    # if a call has not answered within the model's p95 latency (or
+    # AI_HEDGE_AFTER_SECONDS until enough calls have been timed) an identical
+    # second call is sent and the first answer wins
+    AI_HEDGE_REQUEST_TYPES: str = ""
+    AI_HEDGE_AFTER_SECONDS: float = 2.0
+
+    @property
+    def ai_fallback_models(self) -> list[str]:
+        return [m.strip() for m in self.AI_FALLBACK_MODELS.split(",") if m.strip()]
+
+    @property
+    def ai_hedge_request_types(self) -> set[str]:
+        return {t.strip() for t in self.AI_HEDGE_REQUEST_TYPES.split(",") if t.strip()}
+
+    # Most alternatives one caption or hashtag generation may ask for (the
+    # chat API's n: one call, prompt tokens paid once)
+    AI_MAX_VARIANTS: int = 5
+
+    # Local hashtag suggestions (/ai/hashtags/suggest) come from an in-memory
+    # index of posts' hashtags per process. Changes through the process apply
+    # at once; other processes' are read back every SYNC seconds, and the
+    # index is rebuilt every REBUILD seconds to drop posts deleted elsewhere.
+    # With fewer than HASHTAG_SUGGEST_MIN_CANDIDATES local suggestions, GPT
+    # is asked for more.
+    HASHTAG_INDEX_SYNC_SECONDS: float = 30.0
+    HASHTAG_INDEX_REBUILD_SECONDS: float = 3600.0
+    HASHTAG_SUGGEST_MIN_CANDIDATES: int = 5
+    HASHTAG_SUGGEST_MAX_COUNT: int = 30
+
+    # /ai/generate/batch: items per call and how many run against OpenAI at once
+    AI_BATCH_MAX_ITEMS: int = 20
+    AI_BATCH_CONCURRENCY: int = 5
+
+    # Background jobs: worker threads per API process (0 disables them),
+    # retry policy, and how long finished jobs and their results are kept
+    JOB_WORKERS: int = 2
+    JOB_POLL_INTERVAL_SECONDS: float = 1.0
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BACKOFF_SECONDS: float = 5.0
+    # Workers renew a running job's lease every third of this; a job whose
+    # lease lapses is assumed lost with its worker and is reclaimed
+    JOB_LEASE_SECONDS: int = 60
+    JOB_RESULT_TTL_SECONDS: int = 3600
+    JOB_PURGE_INTERVAL_SECONDS: int = 60
+
+    # /users/me/export.zip archives: where they are written (default: a folder
+    # in the system temp dir) and how long an unused one is kept on disk. An
+    # archive is reused only while the account's data is unchanged
+    USER_EXPORT_DIR: Optional[str] = None
+    USER_EXPORT_TTL_SECONDS: int = 3600
 
 
     # Google OAuth
@@ -0,0 +1,56 @@
+"""In-process metrics primitives, reported by the /metrics endpoint."""
+
+from collections import deque
+from threading import Lock
+from typing import Deque, Optional
+
+
+class LatencyStats:
+    """
+    Thread-safe latency summary.
+
+    Keeps totals over the process lifetime plus the most recent ``window``
+    samples, from which percentiles are computed on read.
+    """
+
+    def __init__(self, window: int = 2048):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = Lock()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def percentile(self, p: float) -> Optional[float]:
+        """The ``p`` quantile of the recent samples, in seconds (None without samples)."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(p * len(samples)))]
+
+    def stats(self) -> dict:
+        with self._lock:
+            samples = sorted(self._samples)
+            count, total, peak = self.count, self.total, self.max
+
+        def percentile(p: float) -> float:
+            if not samples:
+                return 0.0
+            return round(samples[min(len(samples) - 1, int(p * len(samples)))] * 1000, 3)
+
+        return {
+            "count": count,
+            "avg_ms": round(total / count * 1000, 3) if count else 0.0,
+            "max_ms": round(peak * 1000, 3),
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+        }
@@ -0,0 +1,88 @@
+"""Keyset (cursor) pagination over (created_at, id)."""
+
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from typing import Any, Optional, Tuple
+import json
+
+from fastapi import HTTPException, status
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query
+
+# Largest page a list route serves, in either paging mode
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Build an opaque cursor pointing just past the given row."""
+    raw = json.dumps([created_at.isoformat(), row_id], separators=(",", ":"))
+    return urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Parse a cursor produced by encode_cursor, rejecting anything else with a 400."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor"
+        )
+
+
+def _seek(query, model: Any, cursor: Optional[str], limit: int, descending: bool):
+    """Apply the cursor position, ordering and one-extra-row limit to a Query or Select."""
+    key = tuple_(model.created_at, model.id)
+    if cursor:
+        position = tuple_(*decode_cursor(cursor))
+        query = query.filter(key < position if descending else key > position)
+
+    if descending:
+        query = query.order_by(model.created_at.desc(), model.id.desc())
+    else:
+        query = query.order_by(model.created_at, model.id)
+    return query.limit(limit + 1)
+
+
+def _page(rows: list, limit: int) -> dict:
+    next_cursor = None
+    if limit > 0 and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    return {"items": rows, "next_cursor": next_cursor}
+
+
+def paginate_keyset(
+    query: Query,
+    model: Any,
+    cursor: Optional[str],
+    limit: int,
+    descending: bool = False,
+) -> dict:
+    """
+    Fetch one page of ``query`` ordered by (created_at, id).
+
+    An empty or missing cursor starts from the first row. Seeks with a row
+    comparison so every page costs the same regardless of depth, and reads
+    one extra row to know whether another page exists.
+
+    Returns:
+        Dictionary with 'items' and 'next_cursor' (None on the last page)
+    """
+    return _page(_seek(query, model, cursor, limit, descending).all(), limit)
+
+
+async def paginate_keyset_async(
+    db: AsyncSession,
+    stmt: Select,
+    model: Any,
+    cursor: Optional[str],
+    limit: int,
+    descending: bool = False,
+) -> dict:
+    """paginate_keyset for a ``select(model)`` statement run on an AsyncSession."""
+    rows = (await db.scalars(_seek(stmt, model, cursor, limit, descending))).all()
+    return _page(list(rows), limit)
@@ -0,0 +1,41 @@
+"""
+Password hashing primitives.
+
+Free of database and app imports, so the password hashing pool's worker
+processes can import it cheaply.
+"""
+
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+
+from app.core.config import settings
+
+# Pinning min and max rounds to the configured cost makes passlib flag any
+# hash made with another cost, so changing BCRYPT_ROUNDS rehashes each
+# password on its owner's next login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash."""
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password; also returns a new hash if the stored one uses outdated parameters."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def get_password_hash(password: str) -> str:
+    """Generate password hash."""
+    # Bcrypt has a 72-byte limit
+    if len(password.encode('utf-8')) > 72:
+        password = password[:72]
+    return pwd_context.hash(password)
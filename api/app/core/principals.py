@@ -0,0 +1,182 @@
+"""
+Cached authenticated-user principals.
+
+A Principal is the part of a user that authorization needs (id, role,
+is_active). Principals are cached per process for a short TTL, so most
+authenticated requests need no users lookup at all.
+
+Any ORM update or delete of a User evicts its principal once the
+transaction commits. With PRINCIPAL_CACHE_NOTIFY the eviction is also
+sent over Postgres LISTEN/NOTIFY, so every API process drops it, not
+just the one that made the change. Core ``update(User)`` statements
+bypass the ORM events: call ``principal_cache.invalidate`` yourself.
+"""
+
+from dataclasses import dataclass
+from threading import Event, Lock, Thread
+from typing import Optional
+import logging
+import select as select_module
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session, object_session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = "principal_invalidate"
+
+_PENDING_KEY = "principal_cache_invalidations"
+
+
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    role: str
+    is_active: bool
+
+
+def _notify_statement(user_id: int):
+    return select(func.pg_notify(NOTIFY_CHANNEL, str(user_id)))
+
+
+class PrincipalCache:
+    """
+    Per-process LRU of principals.
+
+    Every eviction bumps a generation counter. A principal loaded before
+    the latest eviction is not stored, so a read racing an update cannot
+    put the pre-update role back into the cache.
+    """
+
+    def __init__(self, max_entries: int, ttl: int):
+        self._entries = TTLCache(max_entries, ttl)
+        self._lock = Lock()
+        self.generation = 0
+        self.evictions = 0
+        self._listener: Optional[NotifyListener] = None
+
+    def get(self, user_id: int) -> Optional[Principal]:
+        return self._entries.get(user_id)
+
+    def set(self, principal: Principal, generation: int) -> None:
+        """Store a principal read while ``generation`` was current."""
+        with self._lock:
+            if generation == self.generation:
+                self._entries.set(principal.id, principal)
+
+    def evict(self, user_ids) -> None:
+        with self._lock:
+            self.generation += 1
+            for user_id in user_ids:
+                self._entries.pop(user_id)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def invalidate(self, db: Session, user_id: int) -> None:
+        """Evict the user's principal when ``db`` commits (and in every process, if enabled)."""
+        # Deferred like analytics invalidations: evicting before the commit
+        # would let a concurrent request re-cache the old row
+        db.info.setdefault(_PENDING_KEY, set()).add(user_id)
+        if settings.PRINCIPAL_CACHE_NOTIFY:
+            # Delivered by Postgres only if and when this transaction commits
+            db.execute(_notify_statement(user_id))
+
+    def start_listener(self, engine) -> None:
+        if settings.PRINCIPAL_CACHE_NOTIFY and self._listener is None:
+            self._listener = NotifyListener(engine, self)
+            self._listener.start()
+
+    def stop_listener(self) -> None:
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+    def stats(self) -> dict:
+        return {
+            **self._entries.stats(),
+            "evictions": self.evictions,
+            "notify": settings.PRINCIPAL_CACHE_NOTIFY,
+        }
+
+
+class NotifyListener:
+    """Thread that LISTENs for invalidations sent by other API processes."""
+
+    def __init__(self, engine, cache: PrincipalCache, reconnect_delay: float = 5.0):
+        self.engine = engine
+        self.cache = cache
+        self.reconnect_delay = reconnect_delay
+        self._stopping = Event()
+        self._thread: Optional[Thread] = None
+
+    def start(self) -> None:
+        self._stopping.clear()
+        self._thread = Thread(target=self._run, name="principal-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _connect(self):
+        # A dedicated driver connection, kept out of the engine's pool
+        dialect = self.engine.dialect
+        cargs, cparams = dialect.create_connect_args(self.engine.url)
+        connection = dialect.connect(*cargs, **cparams)
+        connection.autocommit = True
+        connection.cursor().execute(f"LISTEN {NOTIFY_CHANNEL}")
+        return connection
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            connection = None
+            try:
+                connection = self._connect()
+                # Anything sent while we were not listening is lost
+                self.cache.clear()
+                while not self._stopping.is_set():
+                    if select_module.select([connection], [], [], 1.0)[0]:
+                        connection.poll()
+                        user_ids = {int(n.payload) for n in connection.notifies}
+                        connection.notifies.clear()
+                        if user_ids:
+                            self.cache.evict(user_ids)
+            except Exception as e:
+                logger.warning(f"Principal invalidation listener disconnected: {e}")
+                self._stopping.wait(self.reconnect_delay)
+            finally:
+                if connection is not None:
+                    connection.close()
+
+
+principal_cache = PrincipalCache(settings.PRINCIPAL_CACHE_MAX_ENTRIES, settings.PRINCIPAL_CACHE_TTL_SECONDS)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target: User) -> None:
+    # Runs mid-flush, so send the notification on the flush's connection
+    object_session(target).info.setdefault(_PENDING_KEY, set()).add(target.id)
+    if settings.PRINCIPAL_CACHE_NOTIFY:
+        connection.execute(_notify_statement(target.id))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending_invalidations(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        principal_cache.evict(pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_invalidations(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,373 @@
+"""
+Rate limiting.
+
+slowapi applies RATE_LIMIT_DEFAULT to every route, keyed on the
+authenticated user (the client IP for anonymous requests). AI generation
+additionally draws on a per-user AI_RATE_LIMIT budget via consume_ai_budget.
+
+Counters live wherever RATE_LIMIT_STORAGE_URI points: any ``limits``
+storage URI works (``memory://``, ``redis://...``), and ``database://``
+shares them between API processes through Postgres. The database storage
+counts hits in memory and a background thread pushes the deltas to
+Postgres in one upsert every RATE_LIMIT_SYNC_INTERVAL_SECONDS, reading
+back the other processes' counts; a hit never waits on the database. The
+price is that limits can be overshot by what other processes count
+within one sync interval.
+"""
+
+from datetime import datetime
+from ipaddress import ip_address
+from math import floor
+from threading import Event, Lock, Thread
+from typing import Dict, Optional
+import logging
+import time
+
+from fastapi import HTTPException, status
+from limits import parse
+from limits.storage import Storage
+from limits.storage.base import SlidingWindowCounterSupport, TimestampedSlidingWindow
+from slowapi import Limiter
+from slowapi.middleware import SlowAPIASGIMiddleware, _ASGIMiddlewareResponder
+from slowapi.util import get_remote_address
+from sqlalchemy import delete, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+from starlette.requests import Request
+from starlette.types import Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.security import decode_access_token
+from app.database import engine
+from app.models.rate_limit import RateLimitCounter
+
+logger = logging.getLogger(__name__)
+
+_PURGE_INTERVAL_SECONDS = 60.0
+
+
+class _Counter:
+    __slots__ = ("shared", "pending", "expires_at")
+
+    def __init__(self, expires_at: float):
+        self.shared = 0  # Total in the database as of the last sync
+        self.pending = 0  # Counted here, not yet pushed
+        self.expires_at = expires_at
+
+
+class DatabaseStorage(Storage, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    """``limits`` storage whose counters are shared through the rate_limit_counters table."""
+
+    STORAGE_SCHEME = ["database"]
+
+    def __init__(self, uri: Optional[str] = None, wrap_exceptions: bool = False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self.sync_interval = settings.RATE_LIMIT_SYNC_INTERVAL_SECONDS
+        self._counters: Dict[str, _Counter] = {}
+        self._lock = Lock()
+        self._stopping = Event()
+        self._thread: Optional[Thread] = None
+        self._last_purge = 0.0
+        self.sync_failures = 0
+
+    @property
+    def base_exceptions(self):
+        return SQLAlchemyError
+
+    def _ensure_syncing(self) -> None:
+        # Started on first use rather than at import, which happens in every process
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = Thread(target=self._run, name="rate-limit-sync", daemon=True)
+                    self._thread.start()
+
+    def _live(self, key: str, now: float) -> Optional[_Counter]:
+        counter = self._counters.get(key)
+        if counter is not None and counter.expires_at <= now:
+            del self._counters[key]
+            return None
+        return counter
+
+    def incr(self, key: str, expiry: int, amount: int = 1) -> int:
+        self._ensure_syncing()
+        now = time.time()
+        with self._lock:
+            counter = self._live(key, now)
+            if counter is None:
+                counter = self._counters[key] = _Counter(now + expiry)
+            counter.pending += amount
+            return counter.shared + counter.pending
+
+    def decr(self, key: str, amount: int = 1) -> int:
+        with self._lock:
+            counter = self._live(key, time.time())
+            if counter is None:
+                return 0
+            counter.pending -= amount
+            return counter.shared + counter.pending
+
+    def get(self, key: str) -> int:
+        with self._lock:
+            counter = self._live(key, time.time())
+            return 0 if counter is None else counter.shared + counter.pending
+
+    def get_expiry(self, key: str) -> float:
+        with self._lock:
+            counter = self._live(key, time.time())
+            return time.time() if counter is None else counter.expires_at
+
+    def check(self) -> bool:
+        try:
+            with engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+            return True
+        except SQLAlchemyError:
+            return False
+
+    def reset(self) -> Optional[int]:
+        with self._lock:
+            self._counters.clear()
+        with engine.begin() as connection:
+            return connection.execute(delete(RateLimitCounter)).rowcount
+
+    def clear(self, key: str) -> None:
+        with self._lock:
+            self._counters.pop(key, None)
+        with engine.begin() as connection:
+            connection.execute(delete(RateLimitCounter).where(RateLimitCounter.key == key))
+
+    # Sliding window counter, as in limits' MemoryStorage
+
+    def acquire_sliding_window_entry(self, key: str, limit: int, expiry: int, amount: int = 1) -> bool:
+        if amount > limit:
+            return False
+        now = time.time()
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        previous_count, previous_ttl, current_count, _ = self._sliding_window_info(
+            previous_key, current_key, expiry, now
+        )
+        if floor(previous_count * previous_ttl / expiry + current_count) + amount > limit:
+            return False
+        # The current window's counter is kept through the next window, where it is the previous one
+        current_count = self.incr(current_key, 2 * expiry, amount)
+        if floor(previous_count * previous_ttl / expiry + current_count) > limit:
+            self.decr(current_key, amount)
+            return False
+        return True
+
+    def _sliding_window_info(self, previous_key: str, current_key: str, expiry: int, now: float) -> tuple:
+        previous_count = self.get(previous_key)
+        current_count = self.get(current_key)
+        previous_ttl = 0.0 if previous_count == 0 else (1 - (((now - expiry) / expiry) % 1)) * expiry
+        current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+        return previous_count, previous_ttl, current_count, current_ttl
+
+    def get_sliding_window(self, key: str, expiry: int) -> tuple:
+        now = time.time()
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        return self._sliding_window_info(previous_key, current_key, expiry, now)
+
+    def clear_sliding_window(self, key: str, expiry: int) -> None:
+        previous_key, current_key = self.sliding_window_keys(key, expiry, time.time())
+        self.clear(previous_key)
+        self.clear(current_key)
+
+    # Background sync
+
+    def sync(self) -> None:
+        """Push pending hits and read back every live counter's shared total."""
+        now = time.time()
+        with self._lock:
+            for key in [key for key, counter in self._counters.items() if counter.expires_at <= now]:
+                del self._counters[key]
+            deltas = {
+                key: (counter.pending, counter.expires_at)
+                for key, counter in self._counters.items() if counter.pending
+            }
+            # Count the deltas as shared while they are in flight, so totals do not dip
+            for key, (pending, _) in deltas.items():
+                counter = self._counters[key]
+                counter.shared += pending
+                counter.pending -= pending
+            keys = list(self._counters)
+
+        try:
+            totals = self._push(deltas, keys)
+        except Exception:
+            with self._lock:
+                for key, (pending, _) in deltas.items():
+                    counter = self._counters.get(key)
+                    if counter is not None:
+                        counter.shared -= pending
+                        counter.pending += pending
+            raise
+
+        with self._lock:
+            for key, total in totals.items():
+                counter = self._counters.get(key)
+                if counter is not None:
+                    counter.shared = total
+
+    def _push(self, deltas: dict, keys: list) -> Dict[str, int]:
+        totals: Dict[str, int] = {}
+        with engine.begin() as connection:
+            if deltas:
+                stmt = insert(RateLimitCounter).values([
+                    {"key": key, "count": pending, "expires_at": datetime.utcfromtimestamp(expires_at)}
+                    for key, (pending, expires_at) in deltas.items()
+                ])
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[RateLimitCounter.key],
+                    set_={
+                        "count": RateLimitCounter.count + stmt.excluded.count,
+                        "expires_at": stmt.excluded.expires_at,
+                    },
+                ).returning(RateLimitCounter.key, RateLimitCounter.count)
+                totals.update({key: count for key, count in connection.execute(stmt)})
+            unpushed = [key for key in keys if key not in totals]
+            if unpushed:
+                totals.update({key: count for key, count in connection.execute(
+                    select(RateLimitCounter.key, RateLimitCounter.count)
+                    .where(RateLimitCounter.key.in_(unpushed))
+                )})
+            if time.monotonic() - self._last_purge >= _PURGE_INTERVAL_SECONDS:
+                self._last_purge = time.monotonic()
+                connection.execute(
+                    delete(RateLimitCounter).where(RateLimitCounter.expires_at < datetime.utcnow())
+                )
+        return totals
+
+    def _run(self) -> None:
+        while not self._stopping.wait(self.sync_interval):
+            try:
+                self.sync()
+            except Exception as e:
+                self.sync_failures += 1
+                logger.warning(f"Rate limit sync failed: {e}")
+
+    def stop(self) -> None:
+        """Stop syncing, pushing whatever is still pending."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(self.sync_interval + 5)
+        with self._lock:
+            self._thread = None
+            self._stopping.clear()
+        try:
+            self.sync()
+        except Exception as e:
+            logger.warning(f"Final rate limit sync failed: {e}")
+
+    def stats(self) -> dict:
+        return {"counters": len(self._counters), "sync_failures": self.sync_failures}
+
+
+def _is_trusted_proxy(address: str) -> bool:
+    try:
+        ip = ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in settings.trusted_proxies)
+
+
+def client_address(request: Request) -> str:
+    """
+    The client's address.
+
+    The peer address, unless the peer is one of TRUSTED_PROXIES: then the
+    X-Forwarded-For hops are read from the right (each proxy appends the
+    address it received the request from) and the first one that is not a
+    trusted proxy is the client. Hops further left are client-supplied.
+    """
+    peer = get_remote_address(request)
+    forwarded_for = request.headers.get("X-Forwarded-For")
+    if not forwarded_for or not _is_trusted_proxy(peer):
+        return peer
+    hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not _is_trusted_proxy(hop):
+            return hop
+    return hops[0] if hops else peer
+
+
+def rate_limit_key(request: Request) -> str:
+    """The authenticated user's id, else the client address."""
+    authorization = request.headers.get("Authorization", "")
+    if authorization.startswith("Bearer "):
+        payload = decode_access_token(authorization[len("Bearer "):])
+        # Refresh tokens are not credentials for API calls
+        if payload is not None and payload.get("type") == "access" and payload.get("sub") is not None:
+            return f"user:{payload['sub']}"
+    return f"ip:{client_address(request)}"
+
+
+limiter = Limiter(
+    key_func=rate_limit_key,
+    default_limits=[settings.RATE_LIMIT_DEFAULT],
+    storage_uri=settings.RATE_LIMIT_STORAGE_URI,
+    strategy="sliding-window-counter",
+    headers_enabled=True,
+    enabled=settings.RATE_LIMIT_ENABLED,
+)
+
+
+class _Responder(_ASGIMiddlewareResponder):
+    def __init__(self, app):
+        super().__init__(app)
+        self._started = False
+
+    async def send_wrapper(self, message: Message) -> None:
+        if self._started:
+            # slowapi held back the start and sent it with the first body
+            # message; the rest of the response goes straight through
+            await self.send(message)
+            return
+        if message["type"] == "http.response.body":
+            self._started = True
+        await super().send_wrapper(message)
+
+
+class RateLimitMiddleware(SlowAPIASGIMiddleware):
+    """
+    SlowAPIASGIMiddleware that sends the response start once.
+
+    slowapi 0.1.9 re-sends ``http.response.start`` before every body
+    message, which breaks any streamed response (exports, SSE) on a
+    rate-limited route.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        await _Responder(self.app)(scope, receive, send)
+
+
+_ai_limit = parse(settings.AI_RATE_LIMIT)
+
+
+def consume_ai_budget(user_id: int, cost: int = 1) -> None:
+    """Take ``cost`` generations from the user's AI budget, or raise 429."""
+    if not limiter.enabled:
+        return
+    if not limiter.limiter.hit(_ai_limit, "ai", str(user_id), cost=cost):
+        reset_at, _ = limiter.limiter.get_window_stats(_ai_limit, "ai", str(user_id))
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"AI rate limit exceeded: {settings.AI_RATE_LIMIT}",
+            headers={"Retry-After": str(max(1, int(reset_at - time.time())))},
+        )
+
+
+def shutdown_rate_limit_storage() -> None:
+    storage = limiter.limiter.storage
+    if isinstance(storage, DatabaseStorage):
+        storage.stop()
+
+
+def rate_limit_stats() -> dict:
+    storage = limiter.limiter.storage
+    stats = {"enabled": limiter.enabled, "storage": settings.RATE_LIMIT_STORAGE_URI}
+    if isinstance(storage, DatabaseStorage):
+        stats.update(storage.stats())
+    return stats
@@ -0,0 +1,184 @@
+"""
+Revoked access-token claims.
+
+Access tokens carry the user's role and auth epoch (``ep``), so
+get_current_principal can authorize them without a database lookup.
+Changing a user's role or active flag bumps User.auth_epoch, and deleting
+the user revokes the epoch it had; both are recorded in auth_revocations.
+A token whose epoch is behind is not rejected, it just takes the lookup
+path again.
+
+Every process keeps the revocations from the last access-token lifetime in
+memory (older tokens have expired anyway, so the set stays small) and
+reloads them every AUTH_REVOCATION_REFRESH_SECONDS. Changes made in this
+process apply as soon as they commit; other processes see them on their
+next refresh, which also evicts those users from the principal cache so
+the lookup path cannot answer from a principal cached before the change.
+Core ``update(User)`` statements bypass these events.
+"""
+
+from datetime import datetime, timedelta
+from threading import Event, Lock, Thread
+from typing import Dict, Optional, Set, Tuple
+import logging
+import time
+
+from sqlalchemy import delete, event, inspect, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session, object_session
+
+from app.core.config import settings
+from app.core.principals import principal_cache
+from app.database import SessionLocal
+from app.models.auth_revocation import AuthRevocation
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+_PENDING_KEY = "claim_revocations"
+
+# Claims embedded in the token that a change to these columns makes stale
+_CLAIM_COLUMNS = ("role", "is_active")
+
+
+def _token_lifetime() -> timedelta:
+    return timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+
+
+class ClaimRevocations:
+    """
+    In-memory map of user id -> lowest auth epoch whose claims are current.
+
+    Entries only ever move to a higher epoch, so a refresh that raced a
+    local revocation cannot undo it. If refreshes stop succeeding the map
+    is treated as unknown and every token takes the lookup path.
+    """
+
+    def __init__(self, refresh_interval: float):
+        self.refresh_interval = refresh_interval
+        # user id -> (epoch, when the entry can be dropped)
+        self._epochs: Dict[int, Tuple[int, datetime]] = {}
+        self._lock = Lock()
+        self._refreshed_at: Optional[float] = None
+        self._stopping = Event()
+        self._thread: Optional[Thread] = None
+        self.refresh_failures = 0
+
+    def is_current(self, user_id: int, epoch: int) -> bool:
+        """Whether claims issued at ``epoch`` are still current (False while the map is stale)."""
+        refreshed_at = self._refreshed_at
+        if refreshed_at is None or time.monotonic() - refreshed_at > 3 * self.refresh_interval:
+            return False
+        entry = self._epochs.get(user_id)
+        return entry is None or epoch >= entry[0]
+
+    def revoke(self, revocations: Dict[int, int]) -> None:
+        expires_at = datetime.utcnow() + _token_lifetime()
+        self._merge({user_id: (epoch, expires_at) for user_id, epoch in revocations.items()})
+
+    def _merge(self, entries: Dict[int, Tuple[int, datetime]]) -> Set[int]:
+        """Merge ``entries`` in; returns the users whose revoked epoch went up."""
+        now = datetime.utcnow()
+        raised = set()
+        with self._lock:
+            merged = {user_id: entry for user_id, entry in self._epochs.items() if entry[1] > now}
+            for user_id, entry in entries.items():
+                current = merged.get(user_id)
+                if entry[1] > now and (current is None or entry[0] >= current[0]):
+                    if current is None or entry[0] > current[0]:
+                        raised.add(user_id)
+                    merged[user_id] = entry
+            self._epochs = merged
+        return raised
+
+    def refresh(self, db: Session) -> None:
+        """Reload revocations from the database and prune expired rows."""
+        lifetime = _token_lifetime()
+        cutoff = datetime.utcnow() - lifetime
+        db.execute(delete(AuthRevocation).where(AuthRevocation.revoked_at <= cutoff))
+        db.commit()
+        rows = db.execute(
+            select(AuthRevocation.user_id, AuthRevocation.auth_epoch, AuthRevocation.revoked_at)
+            .where(AuthRevocation.revoked_at > cutoff)
+        ).all()
+        raised = self._merge({row.user_id: (row.auth_epoch, row.revoked_at + lifetime) for row in rows})
+        if raised:
+            # Their revoked tokens fall back to the principal cache, which may
+            # still hold the old role if the change was made in another process
+            principal_cache.evict(raised)
+        self._refreshed_at = time.monotonic()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = Thread(target=self._run, name="claim-revocations", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            db = SessionLocal()
+            try:
+                self.refresh(db)
+            except Exception as e:
+                self.refresh_failures += 1
+                logger.warning(f"Failed to refresh token revocations: {e}")
+            finally:
+                db.close()
+            self._stopping.wait(self.refresh_interval)
+
+    def stats(self) -> dict:
+        refreshed_at = self._refreshed_at
+        return {
+            "entries": len(self._epochs),
+            "seconds_since_refresh": (
+                None if refreshed_at is None else round(time.monotonic() - refreshed_at, 1)
+            ),
+            "refresh_failures": self.refresh_failures,
+        }
+
+
+claim_revocations = ClaimRevocations(settings.AUTH_REVOCATION_REFRESH_SECONDS)
+
+
+def _record_revocation(connection, target: User, epoch: int) -> None:
+    # Runs mid-flush, so write on the flush's connection
+    stmt = insert(AuthRevocation).values(
+        user_id=target.id, auth_epoch=epoch, revoked_at=datetime.utcnow()
+    )
+    connection.execute(stmt.on_conflict_do_update(
+        index_elements=[AuthRevocation.user_id],
+        set_={"auth_epoch": stmt.excluded.auth_epoch, "revoked_at": stmt.excluded.revoked_at},
+    ))
+    object_session(target).info.setdefault(_PENDING_KEY, {})[target.id] = epoch
+
+
+@event.listens_for(User, "before_update")
+def _bump_auth_epoch(mapper, connection, target: User) -> None:
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in _CLAIM_COLUMNS):
+        target.auth_epoch = (target.auth_epoch or 0) + 1
+        _record_revocation(connection, target, target.auth_epoch)
+
+
+@event.listens_for(User, "after_delete")
+def _revoke_deleted_user(mapper, connection, target: User) -> None:
+    _record_revocation(connection, target, (target.auth_epoch or 0) + 1)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending_revocations(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        claim_revocations.revoke(pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_revocations(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -1,30 +1,47 @@
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
-from app.database import get_db
+from app.core.principals import Principal, principal_cache
+from app.core.revocations import claim_revocations
+from app.database import get_async_db, get_db
 from app.models.user import User
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash."""
-    return pwd_context.verify(plain_password, hashed_password)
+def _verification_key(kid: Optional[str]) -> Optional[str]:
+    """The key a token with this ``kid`` header must be signed with; None rejects it."""
+    if kid is None:
+        return settings.SECRET_KEY if settings.accepts_tokens_without_kid else None
+    return settings.JWT_SIGNING_KEYS.get(kid)
 
 
-def get_password_hash(password: str) -> str:
-    """Generate password hash."""
-    # Bcrypt has a 72-byte limit
-    if len(password.encode('utf-8')) > 72:
-        password = password[:72]
-    return pwd_context.hash(password)
+def _encode_token(claims: dict) -> str:
+    kid = settings.JWT_ACTIVE_KID
+    if kid is None:
+        return jwt.encode(claims, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    return jwt.encode(claims, settings.JWT_SIGNING_KEYS[kid], algorithm=settings.ALGORITHM, headers={"kid": kid})
+
+
+def access_token_claims(user: User) -> dict:
+    """
+    Claims for a user's access token.
+
+    Role and auth epoch let get_current_principal authorize the token
+    without a database lookup. Inactive users get neither, so their tokens
+    always take the lookup path.
+    """
+    claims = {"sub": str(user.id)}
+    if user.is_active:
+        claims.update(role=user.role, ep=user.auth_epoch)
+    return claims
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -37,8 +54,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
     to_encode.update({"exp": expire, "type": "access"})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-    return encoded_jwt
+    return _encode_token(to_encode)
 
 
 def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -51,49 +67,109 @@ def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None)
             days=settings.REFRESH_TOKEN_EXPIRE_DAYS
         )
     to_encode.update({"exp": expire, "type": "refresh"})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-    return encoded_jwt
+    return _encode_token(to_encode)
 
 
 def decode_access_token(token: str) -> Optional[dict]:
-    """Decode JWT access token."""
+    """Decode a JWT, verifying it with the key named by its ``kid`` header."""
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
+        key = _verification_key(jwt.get_unverified_header(token).get("kid"))
+        if key is None:
+            return None
+        return jwt.decode(token, key, algorithms=[settings.ALGORITHM])
     except JWTError:
         return None
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
-) -> User:
-    """Get current authenticated user."""
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+
+def _token_payload(token: str) -> dict:
+    """Verified access-token payload with a subject, or 401."""
     payload = decode_access_token(token)
-    if payload is None:
-        raise credentials_exception
+    if payload is None or payload.get("sub") is None:
+        raise _credentials_exception()
+    return payload
+
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """
+    Get current authenticated user as a full ORM object.
+
+    For routes that only need the id or role, use get_current_principal,
+    which usually skips the users lookup.
+    """
+    generation = principal_cache.generation
+    user = await db.get(User, int(_token_payload(token)["sub"]))
+    if user is None:
+        raise _credentials_exception()
+
+    principal_cache.set(Principal(user.id, user.role, user.is_active), generation)
+    return user
 
-    user_id: str = payload.get("sub")
-    if user_id is None:
-        raise credentials_exception
 
-    user = db.query(User).filter(User.id == int(user_id)).first()
+def get_current_user_sync(
+    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
+) -> User:
+    """
+    get_current_user for sync routes, loaded through the route's own get_db session.
+
+    Depending on get_current_user from a route that also takes get_db would
+    hold an async and a sync connection for the whole request.
+    """
+    generation = principal_cache.generation
+    user = db.get(User, int(_token_payload(token)["sub"]))
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
 
+    principal_cache.set(Principal(user.id, user.role, user.is_active), generation)
     return user
 
 
+async def get_current_principal(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)
+) -> Principal:
+    """
+    Get the current user's id, role and active flag.
+
+    Tokens carrying current role and epoch claims are authorized from the
+    claims alone; older or revoked ones use the principal cache, then the
+    database.
+    """
+    payload = _token_payload(token)
+    user_id = int(payload["sub"])
+    role, epoch = payload.get("role"), payload.get("ep")
+    if role is not None and epoch is not None and claim_revocations.is_current(user_id, epoch):
+        return Principal(user_id, role, True)
+
+    principal = principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+
+    generation = principal_cache.generation
+    row = (
+        await db.execute(select(User.id, User.role, User.is_active).where(User.id == user_id))
+    ).first()
+    if row is None:
+        raise _credentials_exception()
+
+    principal = Principal(row.id, row.role, row.is_active)
+    principal_cache.set(principal, generation)
+    return principal
+
+
 # Role-based Access Control
 
 def require_role(allowed_roles: list[str]):
     """Decorator to require specific roles for endpoint access."""
-    async def role_checker(current_user: User = Depends(get_current_user)) -> User:
+    async def role_checker(current_user: Principal = Depends(get_current_principal)) -> Principal:
         if current_user.role not in allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -103,7 +179,7 @@ def require_role(allowed_roles: list[str]):
     return role_checker
 
 
-async def get_admin_user(current_user: User = Depends(get_current_user)) -> User:
+async def get_admin_user(current_user: Principal = Depends(get_current_principal)) -> Principal:
     """Dependency to require admin role."""
     if current_user.role != "admin":
         raise HTTPException(
@@ -113,7 +189,7 @@ async def get_admin_user(current_user: User = Depends(get_current_user)) -> User
     return current_user
 
 
-async def get_coach_or_admin(current_user: User = Depends(get_current_user)) -> User:
+async def get_coach_or_admin(current_user: Principal = Depends(get_current_principal)) -> Principal:
     """Dependency to require coach or admin role."""
     if current_user.role not in ["coach", "admin"]:
         raise HTTPException(
@@ -123,7 +199,7 @@ async def get_coach_or_admin(current_user: User = Depends(get_current_user)) ->
     return current_user
 
 
-async def get_creator_or_above(current_user: User = Depends(get_current_user)) -> User:
+async def get_creator_or_above(current_user: Principal = Depends(get_current_principal)) -> Principal:
     """Dependency to require creator, coach, or admin role."""
     if current_user.role not in ["creator", "coach", "admin"]:
         raise HTTPException(
@@ -0,0 +1,85 @@
+"""In-process request coalescing."""
+
+from concurrent.futures import Future
+from threading import Lock
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+import asyncio
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key into one.
+
+    The first caller for a key runs the call; callers arriving while it is
+    in flight wait for it and share its outcome, result or exception.
+    Threads and coroutines are tracked separately, so a thread never waits
+    on the event loop or the other way round.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args) -> Tuple[Any, bool]:
+        """Run ``fn(*args)`` unless an identical call is in flight; the bool says whether the result was shared."""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is None:
+                future = self._calls[key] = Future()
+                self.leaders += 1
+                leader = True
+            else:
+                self.followers += 1
+                leader = False
+        if not leader:
+            return future.result(), True
+
+        try:
+            result = fn(*args)
+        except BaseException as e:
+            self._finish_call(key, future)
+            future.set_exception(e)
+            raise
+        self._finish_call(key, future)
+        future.set_result(result)
+        return result, False
+
+    def _finish_call(self, key: Hashable, future: Future) -> None:
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+    async def do_async(self, key: Hashable, fn: Callable[..., Awaitable[Any]], *args) -> Tuple[Any, bool]:
+        """
+        Await ``fn(*args)`` unless an identical call is in flight.
+
+        The call runs as a task of its own, so a caller that is cancelled
+        (say its client disconnected) does not cancel it for the others.
+        """
+        task = self._tasks.get(key)
+        if task is not None and task.get_loop() is asyncio.get_running_loop():
+            self.followers += 1
+            shared = True
+        else:
+            task = self._tasks[key] = asyncio.ensure_future(fn(*args))
+            task.add_done_callback(lambda done: self._finish_task(key, done))
+            self.leaders += 1
+            shared = False
+        return await asyncio.shield(task), shared
+
+    def _finish_task(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        # Retrieve the exception even when every caller has gone
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._calls) + len(self._tasks),
+            "leaders": self.leaders,
+            "followers": self.followers,
+        }
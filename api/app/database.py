@@ -1,12 +1,155 @@
-from sqlalchemy import create_engine
+from threading import Lock
+import time
+import uuid
+
+from sqlalchemy import create_engine, exc
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
 
 from app.core.config import settings
+from app.core.metrics import LatencyStats
+
+
+class PoolMetrics:
+    """Checkout counters and latency for the engine's connection pool."""
+
+    def __init__(self):
+        self._lock = Lock()
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.checkouts = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.checkout_latency = LatencyStats()
+
+    def checked_out(self, seconds: float, waited: bool) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.waits += waited
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+        self.checkout_latency.record(seconds)
+
+    def checked_in(self) -> None:
+        with self._lock:
+            self.in_use -= 1
+
+    def timed_out(self) -> None:
+        with self._lock:
+            self.waits += 1
+            self.timeouts += 1
+
+
+class _InstrumentedPool:
+    """
+    Pool mixin recording every checkout in the class's ``metrics``.
+
+    Metrics live on the class because engine.dispose() replaces the pool
+    with a new instance of the same class.
+    """
+
+    metrics: PoolMetrics
+
+    def _will_wait(self) -> bool:
+        return False
+
+    def _do_get(self):
+        waited = self._will_wait()
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.timed_out()
+            raise
+        self.metrics.checked_out(time.perf_counter() - start, waited)
+        return connection
+
+    def _do_return_conn(self, record) -> None:
+        self.metrics.checked_in()
+        super()._do_return_conn(record)
+
+
+class _QueuePoolWaits:
+    def _will_wait(self) -> bool:
+        # No idle connection and no overflow left: the checkout blocks until
+        # another request returns one, or DB_POOL_TIMEOUT passes
+        return self.checkedin() == 0 and -1 < self._max_overflow <= self._overflow
+
+
+class InstrumentedQueuePool(_QueuePoolWaits, _InstrumentedPool, QueuePool):
+    metrics = PoolMetrics()
+
+
+class InstrumentedNullPool(_InstrumentedPool, NullPool):
+    metrics = PoolMetrics()
 
-engine = create_engine(settings.DATABASE_URL)
+
+class InstrumentedAsyncQueuePool(_QueuePoolWaits, _InstrumentedPool, AsyncAdaptedQueuePool):
+    metrics = PoolMetrics()
+
+
+class InstrumentedAsyncNullPool(_InstrumentedPool, NullPool):
+    metrics = PoolMetrics()
+
+
+def _queue_pool_options() -> dict:
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def _engine_options() -> dict:
+    if not settings.DB_PGBOUNCER_MODE:
+        return {"poolclass": InstrumentedQueuePool, **_queue_pool_options()}
+    # PgBouncer does the pooling: open a connection per checkout, and keep
+    # drivers from preparing statements, which transaction pooling breaks
+    connect_args = {}
+    driver = make_url(settings.DATABASE_URL).get_driver_name()
+    if driver == "psycopg":
+        connect_args["prepare_threshold"] = None
+    return {"poolclass": InstrumentedNullPool, "connect_args": connect_args}
+
+
+def async_database_url(url: str) -> URL:
+    """DATABASE_URL for the asyncpg driver, translating libpq's sslmode."""
+    url = make_url(url).set(drivername="postgresql+asyncpg")
+    if "sslmode" in url.query:
+        url = url.update_query_dict({"ssl": url.query["sslmode"]}).difference_update_query(["sslmode"])
+    return url
+
+
+def _async_engine_options() -> dict:
+    if not settings.DB_PGBOUNCER_MODE:
+        return {"poolclass": InstrumentedAsyncQueuePool, **_queue_pool_options()}
+
+    # asyncpg prepares every statement; under transaction pooling the next
+    # transaction may land on another server connection, so neither cache
+    # them nor reuse their names
+    return {
+        "poolclass": InstrumentedAsyncNullPool,
+        "connect_args": {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4().hex}__",
+        },
+    }
+
+
+engine = create_engine(settings.DATABASE_URL, **_engine_options())
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async routes use their own engine and pool (asyncpg). Sessions keep
+# attributes loaded after commit, since lazy refreshes cannot run in async code.
+async_engine = create_async_engine(async_database_url(settings.DATABASE_URL), **_async_engine_options())
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 
@@ -17,3 +160,31 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Async database session dependency."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def pool_stats(pool) -> dict:
+    """Connection pool configuration and checkout metrics for this process."""
+    metrics = pool.metrics
+    stats = {
+        "pool": type(pool).__name__,
+        "in_use": metrics.in_use,
+        "peak_in_use": metrics.peak_in_use,
+        "checkouts": metrics.checkouts,
+        "waits": metrics.waits,
+        "timeouts": metrics.timeouts,
+        "checkout_latency": metrics.checkout_latency.stats(),
+    }
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            idle=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+        )
+    return stats
@@ -3,6 +3,15 @@ from app.models.risk import Risk, RiskStatus, RiskSeverity
 from app.models.task import Task, TaskStatus, TaskPriority
 from app.models.ai_request import AIRequest
 from app.models.engagement_metric import EngagementMetric
+from app.models.project import Project, ProjectStatus
+from app.models.post import Post
+from app.models.task_event import TaskEvent, TaskDailySnapshot
+from app.models.analytics_cache import AnalyticsCacheEntry
+from app.models.job import Job, JobStatus
+from app.models.auth_revocation import AuthRevocation
+from app.models.refresh_token import RefreshToken
+from app.models.rate_limit import RateLimitCounter
+from app.models.ai_generation_flight import AIGenerationFlight
 
 __all__ = [
     "User",
@@ -14,4 +23,16 @@ __all__ = [
     "TaskPriority",
     "AIRequest",
     "EngagementMetric",
+    "Project",
+    "ProjectStatus",
+    "Post",
+    "TaskEvent",
+    "TaskDailySnapshot",
+    "AnalyticsCacheEntry",
+    "Job",
+    "JobStatus",
+    "AuthRevocation",
+    "RefreshToken",
+    "RateLimitCounter",
+    "AIGenerationFlight",
 ]
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from datetime import datetime
+
+from app.database import Base
+
+
+class AIGenerationFlight(Base):
+    """Result of a recent upstream AI generation, handed to other processes' identical requests.
+
+    ``key`` is the hash the in-flight request was coalesced on; rows are
+    only read by processes that were waiting on the generating one, and are
+    purged shortly afterwards.
+    """
+
+    __tablename__ = "ai_generation_flights"
+
+    key = Column(String(64), primary_key=True)
+    content = Column(Text, nullable=False)
+    tokens_used = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
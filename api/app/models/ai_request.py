@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -14,6 +14,10 @@ class AIRequest(Base):
     prompt = Column(Text, nullable=False)
     response = Column(JSON, nullable=True)
     tokens_used = Column(Integer, default=0)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     user = relationship("User", back_populates="ai_requests")
+
+    __table_args__ = (
+        Index("ix_ai_requests_user_id_created_at_id", user_id, created_at.desc(), id.desc()),
+    )
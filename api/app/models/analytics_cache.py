@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, JSON
+
+from app.database import Base
+
+
+class AnalyticsCacheEntry(Base):
+    """Shared analytics cache row, one per user.
+
+    ``version`` is bumped on every write to the user's data; ``payload`` is only
+    served while it was computed for the current version and has not expired.
+    """
+
+    __tablename__ = "analytics_cache_entries"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    payload = Column(JSON, nullable=True)
+    expires_at = Column(DateTime, nullable=True)
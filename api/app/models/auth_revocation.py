@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, DateTime
+from datetime import datetime
+
+from app.database import Base
+
+
+class AuthRevocation(Base):
+    """Access-token claims revoked for a user.
+
+    Tokens whose ``ep`` claim is below ``auth_epoch`` no longer carry the
+    user's current role or active flag. There is no foreign key, so a row
+    outlives the account it revokes. Rows are only needed for one access
+    token lifetime after ``revoked_at``.
+    """
+
+    __tablename__ = "auth_revocations"
+
+    user_id = Column(Integer, primary_key=True)
+    auth_epoch = Column(Integer, nullable=False)
+    revoked_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
@@ -0,0 +1,66 @@
+from sqlalchemy import Boolean, Column, Integer, String, Text, DateTime, ForeignKey, JSON, LargeBinary, Index, text
+from sqlalchemy.orm import deferred
+from datetime import datetime
+import enum
+import uuid
+
+from app.database import Base
+
+
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+def _job_id() -> str:
+    return uuid.uuid4().hex
+
+
+class Job(Base):
+    """A unit of background work claimed by the in-process job workers.
+
+    Queued jobs become runnable at ``run_after``; a failed attempt is pushed
+    back with a later ``run_after`` until ``max_attempts`` is reached.
+    ``lease_token`` identifies the claim, so a worker whose lease expired
+    cannot overwrite the outcome of the worker that reclaimed the job.
+    Finished jobs are deleted once ``expires_at`` passes.
+    """
+
+    __tablename__ = "jobs"
+
+    id = Column(String(32), primary_key=True, default=_job_id)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    kind = Column(String, nullable=False)
+    payload = Column(JSON, nullable=True)
+    status = Column(String(16), nullable=False, default=JobStatus.QUEUED.value)
+
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    run_after = Column(DateTime, nullable=False, default=datetime.utcnow)
+    lease_token = Column(String(32), nullable=True)
+    locked_at = Column(DateTime, nullable=True)
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+
+    result = Column(JSON, nullable=True)
+    result_file = deferred(Column(LargeBinary, nullable=True))  # Only loaded for downloads
+    result_filename = Column(String, nullable=True)
+    result_content_type = Column(String, nullable=True)
+    error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    expires_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Claim scan: only unfinished jobs are indexed
+        Index(
+            "ix_jobs_claim", "status", "run_after",
+            postgresql_where=text("status IN ('queued', 'running')"),
+        ),
+        Index("ix_jobs_user_id_created_at", "user_id", "created_at"),
+        Index("ix_jobs_expires_at", "expires_at", postgresql_where=text("expires_at IS NOT NULL")),
+    )
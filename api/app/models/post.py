@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Float
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Float, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -20,9 +20,15 @@ class Post(Base):
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     published_at = Column(DateTime, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
     project = relationship("Project", back_populates="posts")
     user = relationship("User", back_populates="posts")
+
+    __table_args__ = (
+        Index("ix_posts_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_posts_project_id", "project_id"),
+        Index("ix_posts_updated_at", "updated_at"),  # Hashtag index sync
+    )
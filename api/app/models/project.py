@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, ForeignKey, Float
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, ForeignKey, Float, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -23,9 +23,13 @@ class Project(Base):
     progress = Column(Float, default=0.0)  # 0-100 percentage
     due_date = Column(DateTime, nullable=True)
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
     owner = relationship("User", back_populates="projects")
     posts = relationship("Post", back_populates="project", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        Index("ix_projects_owner_id_created_at_id", "owner_id", "created_at", "id"),
+    )
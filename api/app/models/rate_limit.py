@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, DateTime
+
+from app.database import Base
+
+
+class RateLimitCounter(Base):
+    """Hit count for one rate-limit window, shared by every API process.
+
+    ``key`` is the limit's key plus the window number; rows are deleted once
+    ``expires_at`` passes.
+    """
+
+    __tablename__ = "rate_limit_counters"
+
+    key = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    expires_at = Column(DateTime, nullable=False, index=True)
@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, text
+from datetime import datetime
+
+from app.database import Base
+
+
+class RefreshToken(Base):
+    """An issued refresh token.
+
+    Rows are keyed by the SHA-256 of the token's ``jti``, so the table holds
+    nothing a client could present. Refreshing consumes the row (sets
+    ``revoked_at``) and issues the next token in the same ``family_id``;
+    presenting a consumed token again revokes the whole family.
+    """
+
+    __tablename__ = "refresh_tokens"
+
+    jti_hash = Column(String(64), primary_key=True)
+    family_id = Column(String(32), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    revoked_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Family revocation only needs the tokens still active
+        Index(
+            "ix_refresh_tokens_active_family", "family_id",
+            postgresql_where=text("revoked_at IS NULL"),
+        ),
+        Index("ix_refresh_tokens_user_id", "user_id"),
+        Index("ix_refresh_tokens_expires_at", "expires_at"),
+    )
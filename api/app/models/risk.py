@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -44,8 +44,13 @@ class Risk(Base):
     status = Column(Enum(RiskStatus, values_callable=lambda x: [e.value for e in x]), default=RiskStatus.OPEN)
     mitigation_plan = Column(Text, nullable=True)
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
     owner = relationship("User", back_populates="risks")
+
+    __table_args__ = (
+        Index("ix_risks_owner_id_created_at_id", "owner_id", "created_at", "id"),
+        Index("ix_risks_owner_id_status", "owner_id", "status"),
+    )
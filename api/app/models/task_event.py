@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, Index
+from datetime import datetime
+
+from app.database import Base
+
+
+class TaskEvent(Base):
+    """Append-only log of task status transitions.
+
+    A null ``from_status`` marks a creation and a null ``to_status`` a deletion.
+    ``task_id`` is deliberately not a foreign key so history survives deletes.
+    """
+
+    __tablename__ = "task_events"
+
+    id = Column(Integer, primary_key=True, index=True)
+    task_id = Column(Integer, nullable=False)
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    from_status = Column(String, nullable=True)
+    to_status = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_task_events_owner_id_created_at", "owner_id", "created_at"),
+    )
+
+
+class TaskDailySnapshot(Base):
+    """End-of-day task counts per owner, maintained incrementally from TaskEvent."""
+
+    __tablename__ = "task_daily_snapshots"
+
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    total_tasks = Column(Integer, nullable=False, default=0)
+    completed_tasks = Column(Integer, nullable=False, default=0)
+    completions = Column(Integer, nullable=False, default=0)  # Tasks completed that day and still done at its end
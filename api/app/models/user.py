@@ -25,6 +25,7 @@ class User(Base):
     is_superuser = Column(Boolean, default=False)
     google_id = Column(String, unique=True, nullable=True, index=True)  # Google OAuth ID
     role = Column(String, default="user", nullable=False, index=True)  # User role
+    auth_epoch = Column(Integer, default=0, nullable=False)  # Bumped when role or is_active changes; embedded in access tokens
 
     # Settings fields
     profile_picture = Column(String, nullable=True)  # Path or URL to profile picture
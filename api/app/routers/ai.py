@@ -1,150 +1,175 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
+from typing import Optional
+import asyncio
 import random
 import json
 import logging
 
-from app.database import get_db
-from app.models.user import User
+from app.database import AsyncSessionLocal, get_async_db
 from app.models.ai_request import AIRequest
-from app.schemas.ai import AIGenerateRequest, AIGenerateResponse
-from app.core.security import get_current_user
-from app.services.openai_service import openai_service
+from app.schemas.ai import (
+    AIBatchGenerateRequest, AIBatchGenerateResponse, AIBatchItemResult,
+    AIGenerateRequest, AIGenerateResponse, AIVariantSelect,
+    HashtagSuggestRequest, HashtagSuggestResponse, HashtagSuggestion,
+)
+from app.core.bulkheads import bulkhead, bulkhead_route
+from app.core.config import settings
+from app.core.pagination import MAX_PAGE_SIZE, paginate_keyset_async
+from app.core.principals import Principal
+from app.core.rate_limit import consume_ai_budget
+from app.core.security import get_admin_user, get_current_principal
+from app.services.openai_service import (
+    generated_items, openai_service, request_log_payload, resolve_model, variants_error,
+)
+from app.services.openai_transport import AIServiceUnavailable
+from app.services.hashtag_recommender import hashtag_index, hashtags_in
+from app.services.analytics_cache import analytics_cache
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-router = APIRouter()
+# Routes that call the model are in the "ai" pool; the rest are cheap reads and writes
+router = APIRouter(route_class=bulkhead_route("crud"))
 
 
 @router.get("/history")
-def get_ai_history(
-    skip: int = 0,
-    limit: int = 20,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+async def get_ai_history(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(
+        None, description="Keyset cursor from next_cursor; pass it empty to start from the newest entry"
+    ),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal),
 ):
-    """Get AI generation history for the current user."""
-    ai_requests = (
-        db.query(AIRequest)
-        .filter(AIRequest.user_id == current_user.id)
-        .order_by(AIRequest.created_at.desc())
+    """
+    Get AI generation history for the current user, newest first.
+
+    With ``cursor`` set, returns a page of items plus ``next_cursor``.
+    Without it, falls back to legacy skip/limit paging and returns a plain list.
+    """
+    query = select(AIRequest).where(AIRequest.user_id == current_user.id)
+    if cursor is not None:
+        return await paginate_keyset_async(db, query, AIRequest, cursor, limit, descending=True)
+
+    ai_requests = await db.scalars(
+        query
+        .order_by(AIRequest.created_at.desc(), AIRequest.id.desc())
         .offset(skip)
         .limit(limit)
-        .all()
     )
-    return ai_requests
+    return ai_requests.all()
+
+
+@router.post("/history/{request_id}/select")
+async def select_ai_variant(
+    request_id: int,
+    selection: AIVariantSelect,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal),
+):
+    """
+    Pick one of the items a generation returned, typically one of its variants.
+
+    The choice is stored as ``selected`` in the request's response, so it
+    shows up in history without generating again.
+    """
+    ai_request = await db.scalar(
+        select(AIRequest).where(AIRequest.id == request_id, AIRequest.user_id == current_user.id)
+    )
+    if not ai_request:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="AI request not found")
+
+    items = (ai_request.response or {}).get("items") or []
+    if not 0 <= selection.variant < len(items):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"variant must be between 0 and {len(items) - 1}" if items else "AI request has no items",
+        )
+
+    # Reassigned, not mutated, so the JSON column is marked dirty
+    ai_request.response = {**ai_request.response, "selected": selection.variant}
+    await db.commit()
+    return ai_request
+
+
+def _check_variants(request: AIGenerateRequest) -> None:
+    error = variants_error(request.request_type, request.variants)
+    if error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error)
+
+
+@router.get("/cache/stats")
+def get_generation_cache_stats(current_user: Principal = Depends(get_admin_user)):
+    """Get generation cache hit/miss counters for this worker (admin only)."""
+    return openai_service.cache.stats()
+
+
+async def _log_ai_requests(user_id: int, rows: list[dict]) -> None:
+    """
+    Insert AIRequest rows in one transaction, in a session of their own
+    (for use outside the request's session).
+
+    Each row holds request_type, prompt, response and tokens_used.
+    """
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(AIRequest), [{"user_id": user_id, **row} for row in rows])
+        await db.run_sync(analytics_cache.invalidate, user_id)
+        await db.commit()
+
+
+async def _log_ai_request(user_id: int, request_type: str, prompt: str, response: dict, tokens_used: int) -> None:
+    """Write a single AIRequest row in its own session."""
+    await _log_ai_requests(user_id, [{
+        "request_type": request_type,
+        "prompt": prompt,
+        "response": response,
+        "tokens_used": tokens_used,
+    }])
 
 
 @router.post("/generate", response_model=AIGenerateResponse)
-def generate_ai_content(
+@bulkhead("ai")
+async def generate_ai_content(
     request: AIGenerateRequest,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal),
 ):
-    """Generate AI content using OpenAI API."""
+    """
+    Generate AI content using OpenAI API.
 
-    # Validate model parameter
-    model = request.model or "gpt-4"
-    if model not in ["gpt-4", "gpt-3.5-turbo", "gpt-4-turbo"]:
-        model = "gpt-4"
+    With ``variants`` > 1 a caption or hashtag request returns that many
+    alternatives from one OpenAI call, one item each; pick one later with
+    POST /ai/history/{id}/select.
+    """
+    _check_variants(request)
+    consume_ai_budget(current_user.id)
+    model = resolve_model(request.model)
 
     try:
-        # Route to appropriate generation function based on request type
-        if request.request_type == "caption":
-            result = openai_service.generate_fitness_caption(
-                context=request.prompt,
-                tone="motivational",
-                model=model
-            )
-            generated_data = [result]
-
-        elif request.request_type == "hashtag":
-            result = openai_service.generate_hashtags(
-                caption=request.prompt,
-                niche="fitness",
-                count=15,
-                model=model
-            )
-            generated_data = [result]
-
-        elif request.request_type == "workout_plan":
-            result = openai_service.generate_workout_plan(
-                goal=request.prompt,
-                level="intermediate",
-                duration="30 minutes",
-                model=model
-            )
-            generated_data = [result]
+        result = await openai_service.generate_async(
+            request.request_type, request.prompt, model=model, variants=request.variants
+        )
 
-        elif request.request_type == "generate_risks":
-            result = openai_service.generate_project_risks(
-                project_description=request.prompt,
-                model=model
-            )
-            # Parse JSON response if possible
-            try:
-                risks = json.loads(result["content"])
-                generated_data = risks
-                tokens_used = result["tokens_used"]
-            except json.JSONDecodeError:
-                # If not valid JSON, return as single item
-                generated_data = [result]
-                tokens_used = result["tokens_used"]
-
-        elif request.request_type == "generate_tasks":
-            result = openai_service.generate_task_breakdown(
-                project_goal=request.prompt,
-                timeframe="2 weeks",
-                model=model
-            )
-            # Parse JSON response if possible
-            try:
-                tasks = json.loads(result["content"])
-                generated_data = tasks
-                tokens_used = result["tokens_used"]
-            except json.JSONDecodeError:
-                # If not valid JSON, return as single item
-                generated_data = [result]
-                tokens_used = result["tokens_used"]
-
-        elif request.request_type == "content":
-            result = openai_service.generate_general_content(
-                request_type=request.request_type,
-                prompt=request.prompt,
-                model=model
-            )
-            generated_data = [result]
-
-        else:
-            # For any other request type, use general content generation
-            result = openai_service.generate_general_content(
-                request_type=request.request_type,
-                prompt=request.prompt,
-                model=model
-            )
-            generated_data = [result]
-
-        # Extract tokens_used (handle both list and single result)
-        if isinstance(generated_data, list) and len(generated_data) > 0:
-            if isinstance(generated_data[0], dict) and "tokens_used" in generated_data[0]:
-                tokens_used = generated_data[0]["tokens_used"]
-            else:
-                tokens_used = result.get("tokens_used", 0)
-        else:
-            tokens_used = result.get("tokens_used", 0)
+        generated_data = generated_items(request.request_type, result)
+        tokens_used = result.get("tokens_used", 0)
 
         # Log AI request to database
         ai_request = AIRequest(
             user_id=current_user.id,
             request_type=request.request_type,
             prompt=request.prompt,
-            response={"items": generated_data},
+            response=request_log_payload(generated_data, result),
             tokens_used=tokens_used,
         )
         db.add(ai_request)
-        db.commit()
+        await db.run_sync(analytics_cache.invalidate, current_user.id)
+        await db.commit()
 
         logger.info(f"AI generation successful for user {current_user.id}: {request.request_type}")
 
@@ -153,6 +178,7 @@ def generate_ai_content(
             data=generated_data,
             tokens_used=tokens_used,
             request_type=request.request_type,
+            cached=result.get("cached", False),
         )
 
     except ValueError as e:
@@ -176,9 +202,254 @@ def generate_ai_content(
             tokens_used=0,
         )
         db.add(ai_request)
-        db.commit()
+        await db.run_sync(analytics_cache.invalidate, current_user.id)
+        await db.commit()
 
+        if isinstance(e, AIServiceUnavailable):
+            # Every model failed or is cooling down; worth retrying later
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=str(e),
+                headers={"Retry-After": str(e.retry_after)},
+            )
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to generate AI content: {str(e)}"
         )
+
+
+@router.post("/generate/batch", response_model=AIBatchGenerateResponse)
+@bulkhead("ai")
+async def generate_ai_content_batch(
+    batch: AIBatchGenerateRequest,
+    current_user: Principal = Depends(get_current_principal),
+):
+    """
+    Generate AI content for several requests at once.
+
+    Items run concurrently (at most AI_BATCH_CONCURRENCY against OpenAI at a
+    time), so the batch takes about as long as its slowest item. Results come
+    back in request order; a failed item carries an error instead of failing
+    the batch. All AIRequest rows are written in one transaction.
+    """
+    if not openai_service.async_client:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="OpenAI API key not configured. Please set OPENAI_API_KEY in your .env file.",
+        )
+    if not batch.items:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Batch must contain at least one item")
+    if len(batch.items) > settings.AI_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Batch cannot contain more than {settings.AI_BATCH_MAX_ITEMS} items",
+        )
+    for item in batch.items:
+        _check_variants(item)
+    consume_ai_budget(current_user.id, cost=len(batch.items))
+
+    semaphore = asyncio.Semaphore(settings.AI_BATCH_CONCURRENCY)
+
+    async def run(item: AIGenerateRequest) -> AIBatchItemResult:
+        try:
+            async with semaphore:
+                result = await openai_service.generate_async(
+                    item.request_type, item.prompt, model=resolve_model(item.model), variants=item.variants
+                )
+        except Exception as e:
+            logger.error(f"Error generating AI content in batch: {e}")
+            return AIBatchItemResult(
+                success=False,
+                request_type=item.request_type,
+                error=f"Failed to generate AI content: {str(e)}",
+            )
+
+        return AIBatchItemResult(
+            success=True,
+            request_type=item.request_type,
+            data=generated_items(item.request_type, result),
+            tokens_used=result["tokens_used"],
+            cached=result["cached"],
+        )
+
+    results = await asyncio.gather(*(run(item) for item in batch.items))
+
+    await _log_ai_requests(current_user.id, [
+        {
+            "request_type": item.request_type,
+            "prompt": item.prompt,
+            "response": (
+                request_log_payload(result.data, {"cached": result.cached})
+                if result.success else {"error": result.error}
+            ),
+            "tokens_used": result.tokens_used,
+        }
+        for item, result in zip(batch.items, results)
+    ])
+
+    failed = sum(1 for result in results if not result.success)
+    logger.info(
+        f"AI batch generation for user {current_user.id}: {len(results) - failed} succeeded, {failed} failed"
+    )
+
+    return AIBatchGenerateResponse(
+        results=results,
+        tokens_used=sum(result.tokens_used for result in results),
+    )
+
+
+@router.post("/hashtags/suggest", response_model=HashtagSuggestResponse)
+@bulkhead("ai")
+async def suggest_hashtags(
+    request: HashtagSuggestRequest,
+    current_user: Principal = Depends(get_current_principal),
+):
+    """
+    Suggest hashtags for a caption from the hashtags already posted.
+
+    Answered from the in-process hashtag index: tags used alongside the
+    caption's own, weighted by engagement and favouring the user's history.
+    Until the index has first been built there are no local suggestions.
+    Only when that gives fewer than HASHTAG_SUGGEST_MIN_CANDIDATES tags (and
+    ``enrich`` is set) is GPT asked for more; that call counts against the
+    AI budget and is logged like an /ai/generate hashtag request.
+    """
+    if not 1 <= request.count <= settings.HASHTAG_SUGGEST_MAX_COUNT:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"count must be between 1 and {settings.HASHTAG_SUGGEST_MAX_COUNT}",
+        )
+
+    suggestions = [
+        HashtagSuggestion(**suggestion._asdict())
+        for suggestion in hashtag_index.suggest(current_user.id, request.caption, request.count)
+    ]
+    tokens_used = 0
+
+    wanted = min(request.count, settings.HASHTAG_SUGGEST_MIN_CANDIDATES)
+    if request.enrich and len(suggestions) < wanted and openai_service.async_client:
+        consume_ai_budget(current_user.id)
+        try:
+            result = await openai_service.generate_async(
+                "hashtag", request.caption, model=resolve_model(request.model)
+            )
+        except Exception as e:
+            # The local suggestions still stand
+            logger.error(f"Error enriching hashtag suggestions: {e}")
+        else:
+            chosen = set(hashtags_in(request.caption)) | {suggestion.tag for suggestion in suggestions}
+            for tag in hashtags_in(result["content"]):
+                if len(suggestions) >= request.count:
+                    break
+                if tag not in chosen:
+                    suggestions.append(HashtagSuggestion(tag=tag, score=0.0, source="ai"))
+            tokens_used = result["tokens_used"]
+            await _log_ai_request(
+                current_user.id, "hashtag", request.caption,
+                request_log_payload(generated_items("hashtag", result), result), tokens_used,
+            )
+
+    return HashtagSuggestResponse(hashtags=suggestions, tokens_used=tokens_used)
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/generate/stream")
+@bulkhead("ai")
+async def generate_ai_content_stream(
+    request: AIGenerateRequest,
+    current_user: Principal = Depends(get_current_principal),
+):
+    """
+    Generate AI content and stream it back as server-sent events.
+
+    Emits ``token`` events with each content fragment as GPT produces it, then
+    one ``done`` event carrying the same payload as /ai/generate (or an
+    ``error`` event). The AIRequest row is written once the stream completes,
+    or with the partial content if the client disconnects first.
+    """
+    if not openai_service.async_client:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="OpenAI API key not configured. Please set OPENAI_API_KEY in your .env file.",
+        )
+    if request.variants != 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="variants cannot be streamed; use /ai/generate",
+        )
+
+    consume_ai_budget(current_user.id)
+    model = resolve_model(request.model)
+    generation = openai_service.build_request(request.request_type, request.prompt)
+    user_id = current_user.id
+
+    events = openai_service.stream_request(
+        generation.messages, model=model, max_tokens=generation.max_tokens,
+        cache_type=request.request_type,
+    )
+    fragments: list[str] = []
+    finished = False
+
+    async def event_stream():
+        nonlocal finished
+        try:
+            async for event in events:
+                if "delta" in event:
+                    fragments.append(event["delta"])
+                    yield _sse("token", {"content": event["delta"]})
+                    continue
+
+                finished = True
+                result = {
+                    "type": generation.result_type,
+                    "content": event["content"],
+                    "tokens_used": event["tokens_used"],
+                    "cached": event["cached"],
+                }
+                generated_data = generated_items(request.request_type, result)
+                await _log_ai_request(
+                    user_id, request.request_type, request.prompt,
+                    request_log_payload(generated_data, result), result["tokens_used"],
+                )
+                logger.info(f"AI streaming generation successful for user {user_id}: {request.request_type}")
+                yield _sse("done", AIGenerateResponse(
+                    success=True,
+                    data=generated_data,
+                    tokens_used=result["tokens_used"],
+                    request_type=request.request_type,
+                    cached=result["cached"],
+                ).model_dump())
+
+        except Exception as e:
+            finished = True
+            logger.error(f"Error streaming AI content: {e}")
+            await _log_ai_request(user_id, request.request_type, request.prompt, {"error": str(e)}, 0)
+            yield _sse("error", {"detail": f"Failed to generate AI content: {str(e)}"})
+
+    async def after_stream():
+        """
+        Runs once the response ends, including when the client disconnected
+        mid-stream (which cancels event_stream before it can log anything).
+        """
+        await events.aclose()
+        if not finished:
+            logger.info(
+                f"AI stream for user {user_id} closed by the client after {len(fragments)} fragments"
+            )
+            # Usage only arrives with the last chunk; OpenAI streams about one token per fragment
+            await _log_ai_request(
+                user_id, request.request_type, request.prompt,
+                {"error": "Client disconnected before the stream completed", "content": "".join(fragments)},
+                len(fragments),
+            )
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        # Stop nginx from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(after_stream),
+    )
@@ -1,44 +1,53 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
+from typing import Optional
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.user import User
-from app.schemas.user import UserCreate, User as UserSchema, Token
+from app.schemas.user import UserCreate, User as UserSchema, RefreshTokenRequest, Token
+from app.core.bulkheads import bulkhead_route
 from app.core.security import (
-    verify_password,
-    get_password_hash,
+    access_token_claims,
     create_access_token,
-    create_refresh_token,
     decode_access_token,
     get_current_user,
 )
 from app.core.config import settings
+from app.services.password_service import password_hasher
+from app.services.refresh_tokens import (
+    RefreshTokenJustRotated,
+    consume_legacy_refresh_token,
+    issue_refresh_token,
+    revoke_refresh_family,
+    rotate_refresh_token,
+)
 
-router = APIRouter()
+router = APIRouter(route_class=bulkhead_route("auth"))
 
 
 @router.post("/register", response_model=UserSchema, status_code=status.HTTP_201_CREATED)
-def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Register a new user."""
     # Check if user already exists
-    db_user = db.query(User).filter(User.email == user_data.email).first()
+    db_user = await db.scalar(select(User).where(User.email == user_data.email))
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered",
         )
 
-    db_user = db.query(User).filter(User.username == user_data.username).first()
+    db_user = await db.scalar(select(User).where(User.username == user_data.username))
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already taken",
         )
 
-    # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    # Create new user (bcrypt runs in the password hashing pool)
+    hashed_password = await password_hasher.hash(user_data.password)
     db_user = User(
         email=user_data.email,
         username=user_data.username,
@@ -46,22 +55,26 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
         hashed_password=hashed_password,
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
 
     return db_user
 
 
 @router.post("/login", response_model=Token)
-def login(
-    form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
+async def login(
+    form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)
 ):
     """Login and get access token."""
     # Authenticate user - check both username and email
-    user = db.query(User).filter(
+    user = await db.scalar(select(User).where(
         (User.username == form_data.username) | (User.email == form_data.username)
-    ).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    ))
+    verified, new_hash = (
+        await password_hasher.verify_and_update(form_data.password, user.hashed_password)
+        if user else (False, None)
+    )
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -73,16 +86,17 @@ def login(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user"
         )
 
+    # The stored hash used outdated parameters (e.g. an older BCRYPT_ROUNDS)
+    if new_hash is not None:
+        user.hashed_password = new_hash
+
     # Create access and refresh tokens
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": str(user.id)}, expires_delta=access_token_expires
-    )
-
-    refresh_token_expires = timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
-    refresh_token = create_refresh_token(
-        data={"sub": str(user.id)}, expires_delta=refresh_token_expires
+        data=access_token_claims(user), expires_delta=access_token_expires
     )
+    refresh_token = issue_refresh_token(db, user.id)
+    await db.commit()
 
     return {
         "access_token": access_token,
@@ -107,41 +121,91 @@ async def verify_token(
     }
 
 
-@router.post("/refresh", response_model=Token)
-async def refresh_token(
-    refresh_token: str,
-    db: Session = Depends(get_db)
-):
-    """Refresh access token using a refresh token."""
-    credentials_exception = HTTPException(
+def _refresh_credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate refresh token",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    # Decode refresh token
-    payload = decode_access_token(refresh_token)
-    if payload is None or payload.get("type") != "refresh":
-        raise credentials_exception
 
-    user_id: str = payload.get("sub")
-    if user_id is None:
-        raise credentials_exception
+def _presented_refresh_token(query_token: Optional[str], body: Optional[RefreshTokenRequest]) -> Optional[str]:
+    """The refresh token from the JSON body or, for older clients, the query string."""
+    return body.refresh_token if body is not None else query_token
+
+
+def _decode_refresh_token(token: Optional[str]) -> dict:
+    """Verified refresh-token payload."""
+    payload = decode_access_token(token) if token else None
+    if payload is None or payload.get("type") != "refresh" or payload.get("sub") is None:
+        raise _refresh_credentials_exception()
+    return payload
 
-    # Verify user still exists
-    user = db.query(User).filter(User.id == int(user_id)).first()
-    if user is None or not user.is_active:
-        raise credentials_exception
 
-    # Create new access token
+@router.post("/refresh", response_model=Token)
+async def refresh_token(
+    refresh_token: Optional[str] = None,
+    body: Optional[RefreshTokenRequest] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Exchange a refresh token for a new access token and a new refresh token.
+
+    The presented refresh token is consumed: reusing it revokes every token
+    descended from the same login, except that a token rotated a few seconds
+    ago gets a 409 to retry with its successor. Send it in the JSON body;
+    the ``refresh_token`` query parameter is still accepted.
+    """
+    token = _presented_refresh_token(refresh_token, body)
+    payload = _decode_refresh_token(token)
+
+    try:
+        if payload.get("jti") is None:
+            # Issued before rotation: look the user up and start a family
+            user = await db.get(User, int(payload["sub"]))
+            if user is None or not user.is_active:
+                raise _refresh_credentials_exception()
+            family_id = await consume_legacy_refresh_token(db, token, payload)
+            if family_id is None:
+                await db.commit()
+                raise _refresh_credentials_exception()
+            new_refresh_token = issue_refresh_token(db, user.id, family_id)
+        else:
+            rotated = await rotate_refresh_token(db, payload)
+            if rotated is None:
+                # Keep any family revocation made on reuse
+                await db.commit()
+                raise _refresh_credentials_exception()
+            user, new_refresh_token = rotated
+    except RefreshTokenJustRotated:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Refresh token was just rotated; retry with the latest refresh token",
+            headers={"Retry-After": "1"},
+        )
+    await db.commit()
+
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     new_access_token = create_access_token(
-        data={"sub": str(user.id)}, expires_delta=access_token_expires
+        data=access_token_claims(user), expires_delta=access_token_expires
     )
 
-    # Return same refresh token with new access token
     return {
         "access_token": new_access_token,
-        "refresh_token": refresh_token,
+        "refresh_token": new_refresh_token,
         "token_type": "bearer"
     }
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    refresh_token: Optional[str] = None,
+    body: Optional[RefreshTokenRequest] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Revoke a refresh token and every token rotated from the same login."""
+    payload = _decode_refresh_token(_presented_refresh_token(refresh_token, body))
+    if payload.get("fam") is not None:
+        await revoke_refresh_family(db, payload["fam"])
+        await db.commit()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,48 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from datetime import datetime
+
+from app.core.bulkheads import bulkhead_route
+from app.core.principals import Principal
+from app.core.security import get_current_principal
+from app.services.data_export import EXPORT_ENTITIES, EXPORT_FORMATS, stream_export
+
+router = APIRouter(route_class=bulkhead_route("export"))
+
+
+def _export_response(entity_name: str, export_format: str, user: Principal) -> StreamingResponse:
+    entity = EXPORT_ENTITIES.get(entity_name)
+    if entity is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown export entity. Choose one of: {', '.join(EXPORT_ENTITIES)}",
+        )
+
+    _, media_type = EXPORT_FORMATS[export_format]
+    filename = f"{entity.name}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.{export_format}"
+    return StreamingResponse(
+        stream_export(export_format, entity, user.id),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}",
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+@router.get("/{entity}.csv")
+async def export_entity_csv(entity: str, current_user: Principal = Depends(get_current_principal)):
+    """
+    Stream all of the user's rows of an entity as CSV.
+
+    Entities: tasks, risks, projects, posts, ai_requests. Rows are read
+    through a server-side cursor and sent as they are fetched, so memory
+    use and time to first byte do not grow with the number of rows.
+    """
+    return _export_response(entity, "csv", current_user)
+
+
+@router.get("/{entity}.ndjson")
+async def export_entity_ndjson(entity: str, current_user: Principal = Depends(get_current_principal)):
+    """Stream all of the user's rows of an entity as newline-delimited JSON."""
+    return _export_response(entity, "ndjson", current_user)
@@ -0,0 +1,143 @@
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import undefer
+from datetime import datetime
+
+from app.database import get_async_db
+from app.models.job import Job, JobStatus
+from app.schemas.ai import AIGenerateRequest
+from app.schemas.job import JobResponse
+from app.core.bulkheads import bulkhead_route
+from app.core.config import settings
+from app.core.principals import Principal
+from app.core.rate_limit import consume_ai_budget
+from app.core.security import get_current_principal
+from app.services.jobs import cancel_job, enqueue_job
+from app.services.openai_service import openai_service, resolve_model, variants_error
+
+router = APIRouter(route_class=bulkhead_route("crud"))
+
+
+def _to_response(job: Job) -> JobResponse:
+    return JobResponse(
+        id=job.id,
+        kind=job.kind,
+        status=job.status,
+        attempts=job.attempts,
+        max_attempts=job.max_attempts,
+        error=job.error,
+        result=job.result,
+        download_url=(
+            f"{settings.API_V1_STR}/jobs/{job.id}/result" if job.result_filename else None
+        ),
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        expires_at=job.expires_at,
+    )
+
+
+async def _get_job(db: AsyncSession, job_id: str, user: Principal, *options) -> Job:
+    """Load one of the user's jobs, treating expired results as gone."""
+    job = await db.scalar(
+        select(Job)
+        .options(*options)
+        .where(Job.id == job_id, Job.user_id == user.id)
+    )
+    if not job or (job.expires_at and job.expires_at <= datetime.utcnow()):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+
+@router.post("/ai/generate", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def enqueue_ai_generation(
+    request: AIGenerateRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal),
+):
+    """Queue an /ai/generate request; poll GET /jobs/{id} for the result."""
+    if not openai_service.client:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="OpenAI API key not configured. Please set OPENAI_API_KEY in your .env file.",
+        )
+    error = variants_error(request.request_type, request.variants)
+    if error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error)
+    consume_ai_budget(current_user.id)
+
+    job = await db.run_sync(enqueue_job, current_user.id, "ai.generate", {
+        "request_type": request.request_type,
+        "prompt": request.prompt,
+        "model": resolve_model(request.model),
+        "variants": request.variants,
+    })
+    return _to_response(job)
+
+
+@router.post("/analytics/export/pdf", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def enqueue_analytics_pdf(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal),
+):
+    """Queue an analytics PDF report; download it from the job's download_url."""
+    return _to_response(await db.run_sync(enqueue_job, current_user.id, "analytics.export_pdf"))
+
+
+@router.post("/analytics/export/excel", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def enqueue_analytics_excel(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal),
+):
+    """Queue an analytics Excel export; download it from the job's download_url."""
+    return _to_response(await db.run_sync(enqueue_job, current_user.id, "analytics.export_excel"))
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal),
+):
+    """Get a job's status, and its result once it has succeeded."""
+    return _to_response(await _get_job(db, job_id, current_user))
+
+
+@router.get("/{job_id}/result")
+async def download_job_result(
+    job_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal),
+):
+    """Download the file produced by a succeeded job."""
+    job = await _get_job(db, job_id, current_user, undefer(Job.result_file))
+    if job.status != JobStatus.SUCCEEDED.value:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job is {job.status}; no result to download",
+        )
+    if job.result_file is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job has no file result")
+
+    return Response(
+        content=job.result_file,
+        media_type=job.result_content_type or "application/octet-stream",
+        headers={"Content-Disposition": f"attachment; filename={job.result_filename}"},
+    )
+
+
+@router.delete("/{job_id}", response_model=JobResponse)
+async def delete_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal),
+):
+    """
+    Cancel a job.
+
+    A queued job is cancelled immediately; a running one is marked and its
+    outcome discarded when the current attempt ends.
+    """
+    job = await _get_job(db, job_id, current_user)
+    return _to_response(await db.run_sync(cancel_job, job))
@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends
+
+from app.database import async_engine, engine, pool_stats
+from app.core.bulkheads import bulkhead_route, bulkhead_stats
+from app.core.principals import Principal, principal_cache
+from app.core.rate_limit import rate_limit_stats
+from app.core.revocations import claim_revocations
+from app.core.security import get_admin_user
+from app.services.analytics_cache import analytics_cache
+from app.services.hashtag_recommender import hashtag_index
+from app.services.openai_service import generation_cache, openai_service
+from app.services.openai_transport import openai_transport
+from app.services.password_service import password_hasher
+from app.services.refresh_tokens import refresh_token_stats
+from app.services.reports import report_cache_stats
+
+router = APIRouter(route_class=bulkhead_route("crud"))
+
+
+@router.get("")
+def get_metrics(current_user: Principal = Depends(get_admin_user)):
+    """Get connection pool, cache and bulkhead metrics for this worker process (admin only)."""
+    return {
+        "db_pool": pool_stats(engine.pool),
+        "async_db_pool": pool_stats(async_engine.sync_engine.pool),
+        "analytics_cache": analytics_cache.stats(),
+        "ai_cache": generation_cache.stats(),
+        "ai_coalescing": openai_service.coalescing_stats(),
+        "ai_transport": openai_transport.stats(),
+        "hashtag_index": hashtag_index.stats(),
+        "reports": report_cache_stats(),
+        "principal_cache": principal_cache.stats(),
+        "claim_revocations": claim_revocations.stats(),
+        "password_hasher": password_hasher.stats(),
+        "refresh_tokens": refresh_token_stats(),
+        "rate_limit": rate_limit_stats(),
+        "bulkheads": bulkhead_stats(),
+    }
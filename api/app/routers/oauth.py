@@ -1,16 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import RedirectResponse
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from authlib.integrations.starlette_client import OAuth
 from starlette.requests import Request
 import secrets
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.user import User
+from app.core.bulkheads import bulkhead_route
 from app.core.config import settings
-from app.core.security import create_access_token, create_refresh_token
+from app.core.security import access_token_claims, create_access_token
+from app.services.refresh_tokens import issue_refresh_token
 
-router = APIRouter()
+router = APIRouter(route_class=bulkhead_route("auth"))
 
 # Initialize OAuth
 oauth = OAuth()
@@ -41,7 +44,7 @@ async def google_login(request: Request):
 
 
 @router.get("/google/callback")
-async def google_callback(request: Request, db: Session = Depends(get_db)):
+async def google_callback(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Handle Google OAuth callback"""
     try:
         # Get access token from Google
@@ -66,11 +69,11 @@ async def google_callback(request: Request, db: Session = Depends(get_db)):
             )
 
         # Check if user exists by google_id
-        user = db.query(User).filter(User.google_id == google_id).first()
+        user = await db.scalar(select(User).where(User.google_id == google_id))
 
         if not user:
             # Check if user exists by email
-            user = db.query(User).filter(User.email == email).first()
+            user = await db.scalar(select(User).where(User.email == email))
             if user:
                 # Link existing account with Google
                 user.google_id = google_id
@@ -81,7 +84,7 @@ async def google_callback(request: Request, db: Session = Depends(get_db)):
                 # Generate username from email
                 username = email.split('@')[0]
                 # Check if username exists, append random string if needed
-                existing_user = db.query(User).filter(User.username == username).first()
+                existing_user = await db.scalar(select(User).where(User.username == username))
                 if existing_user:
                     username = f"{username}_{secrets.token_hex(4)}"
 
@@ -95,12 +98,13 @@ async def google_callback(request: Request, db: Session = Depends(get_db)):
                 )
                 db.add(user)
 
-            db.commit()
-            db.refresh(user)
+            await db.commit()
+            await db.refresh(user)
 
         # Create tokens
-        access_token = create_access_token(data={"sub": str(user.id)})
-        refresh_token = create_refresh_token(data={"sub": str(user.id)})
+        access_token = create_access_token(data=access_token_claims(user))
+        refresh_token = issue_refresh_token(db, user.id)
+        await db.commit()
 
         # Redirect to frontend with tokens
         # Frontend will extract tokens from URL and store them
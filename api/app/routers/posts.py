@@ -1,111 +1,118 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Union
 
-from app.database import get_db
-from app.models.user import User
+from app.database import get_async_db
 from app.models.post import Post
+from app.schemas.pagination import CursorPage
 from app.schemas.post import Post as PostSchema, PostCreate, PostUpdate
-from app.core.security import get_current_user
+from app.core.bulkheads import bulkhead_route
+from app.core.pagination import MAX_PAGE_SIZE, paginate_keyset_async
+from app.core.principals import Principal
+from app.core.security import get_current_principal
+from app.services.analytics_cache import analytics_cache
+from app.services.hashtag_recommender import hashtag_index
 
-router = APIRouter()
+router = APIRouter(route_class=bulkhead_route("crud"))
 
 
-@router.get("/", response_model=List[PostSchema])
-def get_posts(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+async def _get_post(db: AsyncSession, post_id: int, user: Principal) -> Post:
+    post = await db.scalar(select(Post).where(Post.id == post_id, Post.user_id == user.id))
+    if not post:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Post not found"
+        )
+    return post
+
+
+@router.get("/", response_model=Union[List[PostSchema], CursorPage[PostSchema]])
+async def get_posts(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(
+        None, description="Keyset cursor from next_cursor; pass it empty to start from the first page"
+    ),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal),
 ):
-    """Get all posts for the current user."""
-    posts = (
-        db.query(Post)
-        .filter(Post.user_id == current_user.id)
+    """
+    Get all posts for the current user.
+
+    With ``cursor`` set, returns a page of items plus ``next_cursor``.
+    Without it, falls back to legacy skip/limit paging and returns a plain list.
+    """
+    query = select(Post).where(Post.user_id == current_user.id)
+    if cursor is not None:
+        return await paginate_keyset_async(db, query, Post, cursor, limit)
+
+    posts = await db.scalars(
+        query
+        .order_by(Post.created_at, Post.id)
         .offset(skip)
         .limit(limit)
-        .all()
     )
-    return posts
+    return posts.all()
 
 
 @router.get("/{post_id}", response_model=PostSchema)
-def get_post(
+async def get_post(
     post_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """Get a specific post by ID."""
-    post = (
-        db.query(Post)
-        .filter(Post.id == post_id, Post.user_id == current_user.id)
-        .first()
-    )
-    if not post:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Post not found"
-        )
-    return post
+    return await _get_post(db, post_id, current_user)
 
 
 @router.post("/", response_model=PostSchema, status_code=status.HTTP_201_CREATED)
-def create_post(
+async def create_post(
     post_data: PostCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """Create a new post."""
     post = Post(**post_data.model_dump(), user_id=current_user.id)
     db.add(post)
-    db.commit()
-    db.refresh(post)
+    await db.run_sync(analytics_cache.invalidate, current_user.id)
+    await db.commit()
+    await db.refresh(post)
+    hashtag_index.add_post(post.id, post.user_id, post.hashtags, post.engagement_rate)
     return post
 
 
 @router.put("/{post_id}", response_model=PostSchema)
-def update_post(
+async def update_post(
     post_id: int,
     post_data: PostUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """Update a post."""
-    post = (
-        db.query(Post)
-        .filter(Post.id == post_id, Post.user_id == current_user.id)
-        .first()
-    )
-    if not post:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Post not found"
-        )
+    post = await _get_post(db, post_id, current_user)
 
     update_data = post_data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(post, field, value)
 
-    db.commit()
-    db.refresh(post)
+    await db.run_sync(analytics_cache.invalidate, current_user.id)
+    await db.commit()
+    await db.refresh(post)
+    hashtag_index.add_post(post.id, post.user_id, post.hashtags, post.engagement_rate)
     return post
 
 
 @router.delete("/{post_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_post(
+async def delete_post(
     post_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """Delete a post."""
-    post = (
-        db.query(Post)
-        .filter(Post.id == post_id, Post.user_id == current_user.id)
-        .first()
-    )
-    if not post:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Post not found"
-        )
+    post = await _get_post(db, post_id, current_user)
 
-    db.delete(post)
-    db.commit()
+    await db.delete(post)
+    await db.run_sync(analytics_cache.invalidate, current_user.id)
+    await db.commit()
+    hashtag_index.remove_post(post_id)
     return None
@@ -1,111 +1,122 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Union
 
-from app.database import get_db
-from app.models.user import User
+from app.database import get_async_db
+from app.models.post import Post
 from app.models.project import Project
+from app.schemas.pagination import CursorPage
 from app.schemas.project import Project as ProjectSchema, ProjectCreate, ProjectUpdate
-from app.core.security import get_current_user
+from app.core.bulkheads import bulkhead_route
+from app.core.pagination import MAX_PAGE_SIZE, paginate_keyset_async
+from app.core.principals import Principal
+from app.core.security import get_current_principal
+from app.services.analytics_cache import analytics_cache
+from app.services.hashtag_recommender import hashtag_index
 
-router = APIRouter()
+router = APIRouter(route_class=bulkhead_route("crud"))
 
 
-@router.get("/", response_model=List[ProjectSchema])
-def get_projects(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+async def _get_project(db: AsyncSession, project_id: int, user: Principal) -> Project:
+    project = await db.scalar(
+        select(Project).where(Project.id == project_id, Project.owner_id == user.id)
+    )
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Project not found"
+        )
+    return project
+
+
+@router.get("/", response_model=Union[List[ProjectSchema], CursorPage[ProjectSchema]])
+async def get_projects(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(
+        None, description="Keyset cursor from next_cursor; pass it empty to start from the first page"
+    ),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal),
 ):
-    """Get all projects for the current user."""
-    projects = (
-        db.query(Project)
-        .filter(Project.owner_id == current_user.id)
+    """
+    Get all projects for the current user.
+
+    With ``cursor`` set, returns a page of items plus ``next_cursor``.
+    Without it, falls back to legacy skip/limit paging and returns a plain list.
+    """
+    query = select(Project).where(Project.owner_id == current_user.id)
+    if cursor is not None:
+        return await paginate_keyset_async(db, query, Project, cursor, limit)
+
+    projects = await db.scalars(
+        query
+        .order_by(Project.created_at, Project.id)
         .offset(skip)
         .limit(limit)
-        .all()
     )
-    return projects
+    return projects.all()
 
 
 @router.get("/{project_id}", response_model=ProjectSchema)
-def get_project(
+async def get_project(
     project_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """Get a specific project by ID."""
-    project = (
-        db.query(Project)
-        .filter(Project.id == project_id, Project.owner_id == current_user.id)
-        .first()
-    )
-    if not project:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Project not found"
-        )
-    return project
+    return await _get_project(db, project_id, current_user)
 
 
 @router.post("/", response_model=ProjectSchema, status_code=status.HTTP_201_CREATED)
-def create_project(
+async def create_project(
     project_data: ProjectCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """Create a new project."""
     project = Project(**project_data.model_dump(), owner_id=current_user.id)
     db.add(project)
-    db.commit()
-    db.refresh(project)
+    await db.run_sync(analytics_cache.invalidate, current_user.id)
+    await db.commit()
+    await db.refresh(project)
     return project
 
 
 @router.put("/{project_id}", response_model=ProjectSchema)
-def update_project(
+async def update_project(
     project_id: int,
     project_data: ProjectUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """Update a project."""
-    project = (
-        db.query(Project)
-        .filter(Project.id == project_id, Project.owner_id == current_user.id)
-        .first()
-    )
-    if not project:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Project not found"
-        )
+    project = await _get_project(db, project_id, current_user)
 
     update_data = project_data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(project, field, value)
 
-    db.commit()
-    db.refresh(project)
+    await db.run_sync(analytics_cache.invalidate, current_user.id)
+    await db.commit()
+    await db.refresh(project)
     return project
 
 
 @router.delete("/{project_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_project(
+async def delete_project(
     project_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """Delete a project."""
-    project = (
-        db.query(Project)
-        .filter(Project.id == project_id, Project.owner_id == current_user.id)
-        .first()
-    )
-    if not project:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Project not found"
-        )
+    project = await _get_project(db, project_id, current_user)
+    # Its posts go with it
+    post_ids = (await db.scalars(select(Post.id).where(Post.project_id == project_id))).all()
 
-    db.delete(project)
-    db.commit()
+    await db.delete(project)
+    await db.run_sync(analytics_cache.invalidate, current_user.id)
+    await db.commit()
+    for post_id in post_ids:
+        hashtag_index.remove_post(post_id)
     return None
@@ -1,100 +1,115 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Union
 
-from app.database import get_db
-from app.models.user import User
+from app.database import get_async_db
 from app.models.risk import Risk
+from app.schemas.pagination import CursorPage
 from app.schemas.risk import Risk as RiskSchema, RiskCreate, RiskUpdate
-from app.core.security import get_current_user
+from app.core.bulkheads import bulkhead_route
+from app.core.pagination import MAX_PAGE_SIZE, paginate_keyset_async
+from app.core.principals import Principal
+from app.core.security import get_current_principal
+from app.services.analytics_cache import analytics_cache
 
-router = APIRouter()
+router = APIRouter(route_class=bulkhead_route("crud"))
+
+
+async def _get_risk(db: AsyncSession, risk_id: int, user: Principal) -> Risk:
+    risk = await db.scalar(select(Risk).where(Risk.id == risk_id, Risk.owner_id == user.id))
+    if not risk:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Risk not found"
+        )
+    return risk
 
 
 @router.post("/", response_model=RiskSchema, status_code=status.HTTP_201_CREATED)
-def create_risk(
+async def create_risk(
     risk_data: RiskCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """Create a new risk."""
     db_risk = Risk(**risk_data.model_dump(), owner_id=current_user.id)
     db.add(db_risk)
-    db.commit()
-    db.refresh(db_risk)
+    await db.run_sync(analytics_cache.invalidate, current_user.id)
+    await db.commit()
+    await db.refresh(db_risk)
     return db_risk
 
 
-@router.get("/", response_model=List[RiskSchema])
-def list_risks(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+@router.get("/", response_model=Union[List[RiskSchema], CursorPage[RiskSchema]])
+async def list_risks(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(
+        None, description="Keyset cursor from next_cursor; pass it empty to start from the first page"
+    ),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal),
 ):
-    """List all risks for the current user."""
-    risks = (
-        db.query(Risk)
-        .filter(Risk.owner_id == current_user.id)
+    """
+    List all risks for the current user.
+
+    With ``cursor`` set, returns a page of items plus ``next_cursor``.
+    Without it, falls back to legacy skip/limit paging and returns a plain list.
+    """
+    query = select(Risk).where(Risk.owner_id == current_user.id)
+    if cursor is not None:
+        return await paginate_keyset_async(db, query, Risk, cursor, limit)
+
+    risks = await db.scalars(
+        query
+        .order_by(Risk.created_at, Risk.id)
         .offset(skip)
         .limit(limit)
-        .all()
     )
-    return risks
+    return risks.all()
 
 
 @router.get("/{risk_id}", response_model=RiskSchema)
-def get_risk(
+async def get_risk(
     risk_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """Get a specific risk."""
-    risk = db.query(Risk).filter(Risk.id == risk_id, Risk.owner_id == current_user.id).first()
-    if not risk:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Risk not found"
-        )
-    return risk
+    return await _get_risk(db, risk_id, current_user)
 
 
 @router.put("/{risk_id}", response_model=RiskSchema)
-def update_risk(
+async def update_risk(
     risk_id: int,
     risk_data: RiskUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """Update a risk (stub - to be fully implemented)."""
-    risk = db.query(Risk).filter(Risk.id == risk_id, Risk.owner_id == current_user.id).first()
-    if not risk:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Risk not found"
-        )
+    risk = await _get_risk(db, risk_id, current_user)
 
     # Update fields
     update_data = risk_data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(risk, field, value)
 
-    db.commit()
-    db.refresh(risk)
+    await db.run_sync(analytics_cache.invalidate, current_user.id)
+    await db.commit()
+    await db.refresh(risk)
     return risk
 
 
 @router.delete("/{risk_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_risk(
+async def delete_risk(
     risk_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """Delete a risk."""
-    risk = db.query(Risk).filter(Risk.id == risk_id, Risk.owner_id == current_user.id).first()
-    if not risk:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Risk not found"
-        )
+    risk = await _get_risk(db, risk_id, current_user)
 
-    db.delete(risk)
-    db.commit()
+    await db.delete(risk)
+    await db.run_sync(analytics_cache.invalidate, current_user.id)
+    await db.commit()
     return None
@@ -1,100 +1,121 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Union
 
-from app.database import get_db
-from app.models.user import User
+from app.database import get_async_db
 from app.models.task import Task
+from app.schemas.pagination import CursorPage
 from app.schemas.task import Task as TaskSchema, TaskCreate, TaskUpdate
-from app.core.security import get_current_user
+from app.core.bulkheads import bulkhead_route
+from app.core.pagination import MAX_PAGE_SIZE, paginate_keyset_async
+from app.core.principals import Principal
+from app.core.security import get_current_principal
+from app.services.analytics_cache import analytics_cache
+from app.services.task_history import record_task_transition
 
-router = APIRouter()
+router = APIRouter(route_class=bulkhead_route("crud"))
+
+
+async def _get_task(db: AsyncSession, task_id: int, user: Principal) -> Task:
+    task = await db.scalar(select(Task).where(Task.id == task_id, Task.owner_id == user.id))
+    if not task:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Task not found"
+        )
+    return task
 
 
 @router.post("/", response_model=TaskSchema, status_code=status.HTTP_201_CREATED)
-def create_task(
+async def create_task(
     task_data: TaskCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """Create a new task."""
     db_task = Task(**task_data.model_dump(), owner_id=current_user.id)
     db.add(db_task)
-    db.commit()
-    db.refresh(db_task)
+    await db.flush()
+    await db.run_sync(record_task_transition, db_task.id, current_user.id, None, db_task.status)
+    await db.run_sync(analytics_cache.invalidate, current_user.id)
+    await db.commit()
+    await db.refresh(db_task)
     return db_task
 
 
-@router.get("/", response_model=List[TaskSchema])
-def list_tasks(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+@router.get("/", response_model=Union[List[TaskSchema], CursorPage[TaskSchema]])
+async def list_tasks(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(
+        None, description="Keyset cursor from next_cursor; pass it empty to start from the first page"
+    ),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal),
 ):
-    """List all tasks for the current user."""
-    tasks = (
-        db.query(Task)
-        .filter(Task.owner_id == current_user.id)
+    """
+    List all tasks for the current user.
+
+    With ``cursor`` set, returns a page of items plus ``next_cursor``.
+    Without it, falls back to legacy skip/limit paging and returns a plain list.
+    """
+    query = select(Task).where(Task.owner_id == current_user.id)
+    if cursor is not None:
+        return await paginate_keyset_async(db, query, Task, cursor, limit)
+
+    tasks = await db.scalars(
+        query
+        .order_by(Task.created_at, Task.id)
         .offset(skip)
         .limit(limit)
-        .all()
     )
-    return tasks
+    return tasks.all()
 
 
 @router.get("/{task_id}", response_model=TaskSchema)
-def get_task(
+async def get_task(
     task_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """Get a specific task."""
-    task = db.query(Task).filter(Task.id == task_id, Task.owner_id == current_user.id).first()
-    if not task:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Task not found"
-        )
-    return task
+    return await _get_task(db, task_id, current_user)
 
 
 @router.put("/{task_id}", response_model=TaskSchema)
-def update_task(
+async def update_task(
     task_id: int,
     task_data: TaskUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """Update a task (stub - to be fully implemented)."""
-    task = db.query(Task).filter(Task.id == task_id, Task.owner_id == current_user.id).first()
-    if not task:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Task not found"
-        )
+    task = await _get_task(db, task_id, current_user)
+    previous_status = task.status
 
     # Update fields
     update_data = task_data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(task, field, value)
 
-    db.commit()
-    db.refresh(task)
+    await db.run_sync(record_task_transition, task.id, current_user.id, previous_status, task.status)
+    await db.run_sync(analytics_cache.invalidate, current_user.id)
+    await db.commit()
+    await db.refresh(task)
     return task
 
 
 @router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_task(
+async def delete_task(
     task_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """Delete a task."""
-    task = db.query(Task).filter(Task.id == task_id, Task.owner_id == current_user.id).first()
-    if not task:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Task not found"
-        )
+    task = await _get_task(db, task_id, current_user)
 
-    db.delete(task)
-    db.commit()
+    await db.run_sync(record_task_transition, task.id, current_user.id, task.status, None)
+    await db.run_sync(analytics_cache.invalidate, current_user.id)
+    await db.delete(task)
+    await db.commit()
     return None
@@ -1,21 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Request, status, UploadFile, File
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from pathlib import Path
 import shutil
 import uuid
 from typing import Optional
 
-from app.database import get_db
+from app.database import get_async_db, get_db
 from app.models.user import User
-from app.models.task import Task
-from app.models.risk import Risk
-from app.models.project import Project
-from app.models.post import Post
-from app.models.ai_request import AIRequest
 from app.schemas.user import User as UserSchema, UserUpdate, PasswordChange, UserDataExport, DeleteAccount
-from app.core.security import get_current_user, get_password_hash, verify_password
+from app.core.bulkheads import bulkhead, bulkhead_route
+from app.core.file_response import ranged_file_response
+from app.core.security import get_current_user, get_current_user_sync
+from app.services.data_export import EXPORT_ENTITIES, account_archive, discard_account_archive
+from app.services.hashtag_recommender import hashtag_index
+from app.services.password_service import password_hasher
 
-router = APIRouter()
+router = APIRouter(route_class=bulkhead_route("crud"))
 
 # Create uploads directory if it doesn't exist
 UPLOAD_DIR = Path("uploads/profile_pictures")
@@ -29,9 +30,9 @@ def get_current_user_info(current_user: User = Depends(get_current_user)):
 
 
 @router.put("/me", response_model=UserSchema)
-def update_user_profile(
+async def update_user_profile(
     user_data: UserUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     """Update user profile and preferences."""
@@ -39,21 +40,21 @@ def update_user_profile(
 
     # Handle password update separately
     if "password" in update_data:
-        current_user.hashed_password = get_password_hash(update_data.pop("password"))
+        current_user.hashed_password = await password_hasher.hash(update_data.pop("password"))
 
     # Update other fields
     for field, value in update_data.items():
         setattr(current_user, field, value)
 
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(current_user)
     return current_user
 
 
 @router.post("/me/upload-photo")
 async def upload_profile_photo(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     """Upload profile picture."""
@@ -94,16 +95,16 @@ async def upload_profile_photo(
 
     # Update user
     current_user.profile_picture = str(file_path)
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(current_user)
 
     return {"message": "Profile picture uploaded successfully", "file_path": str(file_path)}
 
 
 @router.post("/me/change-password")
-def change_password(
+async def change_password(
     password_data: PasswordChange,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     """Change user password."""
@@ -115,7 +116,7 @@ def change_password(
         )
 
     # Verify current password
-    if not verify_password(password_data.current_password, current_user.hashed_password):
+    if not await password_hasher.verify(password_data.current_password, current_user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Current password is incorrect"
@@ -129,56 +130,76 @@ def change_password(
         )
 
     # Update password
-    current_user.hashed_password = get_password_hash(password_data.new_password)
-    db.commit()
+    current_user.hashed_password = await password_hasher.hash(password_data.new_password)
+    await db.commit()
 
     return {"message": "Password changed successfully"}
 
 
+def _account_profile(user: User) -> dict:
+    """Account fields included in data exports (excludes sensitive info)."""
+    return {
+        "id": user.id,
+        "email": user.email,
+        "username": user.username,
+        "full_name": user.full_name,
+        "profile_picture": user.profile_picture,
+        "notification_preferences": user.notification_preferences,
+        "user_preferences": user.user_preferences,
+        "created_at": user.created_at.isoformat(),
+        "updated_at": user.updated_at.isoformat(),
+    }
+
+
 @router.get("/me/export", response_model=UserDataExport)
+@bulkhead("export")
 def export_account_data(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_sync),
 ):
-    """Export all user account data."""
-    # Get all user data
-    tasks = db.query(Task).filter(Task.owner_id == current_user.id).all()
-    risks = db.query(Risk).filter(Risk.owner_id == current_user.id).all()
-    projects = db.query(Project).filter(Project.owner_id == current_user.id).all()
-    posts = db.query(Post).filter(Post.user_id == current_user.id).all()
-    ai_requests = db.query(AIRequest).filter(AIRequest.user_id == current_user.id).all()
-
-    # Prepare user data (exclude sensitive info)
-    user_data = {
-        "id": current_user.id,
-        "email": current_user.email,
-        "username": current_user.username,
-        "full_name": current_user.full_name,
-        "profile_picture": current_user.profile_picture,
-        "notification_preferences": current_user.notification_preferences,
-        "user_preferences": current_user.user_preferences,
-        "created_at": current_user.created_at.isoformat(),
-        "updated_at": current_user.updated_at.isoformat(),
-    }
-
-    # Helper function to convert SQLAlchemy objects to dict
-    def to_dict(obj):
-        return {c.name: getattr(obj, c.name) for c in obj.__table__.columns}
-
-    return {
-        "user": user_data,
-        "tasks": [to_dict(task) for task in tasks],
-        "risks": [to_dict(risk) for risk in risks],
-        "projects": [to_dict(project) for project in projects],
-        "posts": [to_dict(post) for post in posts],
-        "ai_requests": [to_dict(req) for req in ai_requests],
-    }
+    """
+    Export all user account data as one JSON document.
+
+    For large accounts prefer /me/export.zip, which streams and can be resumed.
+    """
+    export = {"user": _account_profile(current_user)}
+    for name, entity in EXPORT_ENTITIES.items():
+        export[name] = [
+            entity.json_record(row)
+            for rows in entity.partitions(db, current_user.id)
+            for row in rows
+        ]
+    return export
+
+
+@router.get("/me/export.zip")
+@bulkhead("export")
+def export_account_archive(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_sync),
+):
+    """
+    Export all user account data as a zip of per-entity NDJSON files.
+
+    The archive is written to disk incrementally and reused until the
+    account's data changes, so an interrupted download can be resumed with
+    a ``Range`` request (send the ETag back in ``If-Range``).
+    """
+    path = account_archive(db, current_user.id, _account_profile(current_user))
+    return ranged_file_response(
+        request,
+        path,
+        media_type="application/zip",
+        filename=f"jerrygfit_export_{current_user.id}.zip",
+        etag=path.stem,
+    )
 
 
 @router.delete("/me")
-def delete_account(
+async def delete_account(
     password_data: DeleteAccount,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     """Delete user account (requires password confirmation)."""
@@ -187,7 +208,7 @@ def delete_account(
     # For OAuth users without password, allow deletion
     if current_user.hashed_password:
         # Verify password
-        if not password or not verify_password(password, current_user.hashed_password):
+        if not password or not await password_hasher.verify(password, current_user.hashed_password):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Incorrect password"
@@ -200,7 +221,12 @@ def delete_account(
             file_path.unlink()
 
     # Delete user (cascade will delete all related data)
-    db.delete(current_user)
-    db.commit()
+    user_id = current_user.id
+    await db.delete(current_user)
+    await db.commit()
+
+    # Drop any data export still on disk
+    discard_account_archive(user_id)
+    hashtag_index.remove_user(user_id)
 
     return {"message": "Account deleted successfully"}
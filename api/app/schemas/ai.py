@@ -7,6 +7,7 @@ class AIGenerateRequest(BaseModel):
     request_type: str  # "caption", "hashtag", "workout_plan", "generate_risks", "generate_tasks", "content"
     model: Optional[str] = "gpt-4"  # OpenAI model to use
     context: Optional[dict] = None
+    variants: int = 1  # Alternatives from one call (caption and hashtag only, up to AI_MAX_VARIANTS)
 
 
 class AIGenerateResponse(BaseModel):
@@ -14,3 +15,44 @@ class AIGenerateResponse(BaseModel):
     data: list[dict[str, Any]]
     tokens_used: int
     request_type: str
+    cached: bool = False  # Served from the generation cache (tokens_used is 0)
+
+
+class AIVariantSelect(BaseModel):
+    variant: int  # Index of the chosen item in the request's response
+
+
+class HashtagSuggestRequest(BaseModel):
+    caption: str
+    count: int = 15
+    enrich: bool = True  # Ask GPT for more when there are too few local suggestions
+    model: Optional[str] = "gpt-4"  # Used for enrichment
+
+
+class HashtagSuggestion(BaseModel):
+    tag: str
+    score: float
+    source: str  # "related", "popular" or "ai"
+
+
+class HashtagSuggestResponse(BaseModel):
+    hashtags: list[HashtagSuggestion]
+    tokens_used: int = 0  # Non-zero only when GPT was asked for more
+
+
+class AIBatchGenerateRequest(BaseModel):
+    items: list[AIGenerateRequest]
+
+
+class AIBatchItemResult(BaseModel):
+    success: bool
+    request_type: str
+    data: list[dict[str, Any]] = []
+    tokens_used: int = 0
+    cached: bool = False
+    error: Optional[str] = None
+
+
+class AIBatchGenerateResponse(BaseModel):
+    results: list[AIBatchItemResult]  # Same order as the request items
+    tokens_used: int
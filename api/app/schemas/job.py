@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Any, Optional
+
+
+class JobResponse(BaseModel):
+    id: str
+    kind: str
+    status: str  # queued, running, succeeded, failed, cancelled
+    attempts: int
+    max_attempts: int
+    error: Optional[str] = None
+    result: Optional[dict[str, Any]] = None
+    download_url: Optional[str] = None  # Set when the job produced a file
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
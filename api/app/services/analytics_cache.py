@@ -0,0 +1,223 @@
+"""Per-user analytics result cache with version-based invalidation."""
+
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Any, Optional, Tuple
+import logging
+import uuid
+
+from sqlalchemy import event, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.database import SessionLocal
+from app.models.analytics_cache import AnalyticsCacheEntry
+from app.schemas.analytics import AnalyticsResponse
+from app.services.analytics_service import build_analytics
+
+logger = logging.getLogger(__name__)
+
+_PENDING_KEY = "analytics_cache_invalidations"
+
+
+class MemoryBackend:
+    """Per-process backend: an LRU of results keyed by (user_id, version)."""
+
+    def __init__(self, max_entries: int, ttl: int):
+        self._entries = TTLCache(max_entries, ttl)
+        self._versions: dict[int, int] = {}
+        self._lock = Lock()
+        # Versions start again from 0 in every process, so keys that outlive
+        # the process (archives on disk) also carry this
+        self.scope = uuid.uuid4().hex[:8]
+
+    def lookup(self, db: Session, user_id: int) -> Tuple[int, Optional[Any]]:
+        version = self._versions.get(user_id, 0)
+        return version, self._entries.get((user_id, version))
+
+    def version(self, db: Session, user_id: int) -> int:
+        return self._versions.get(user_id, 0)
+
+    def store(self, db: Session, user_id: int, version: int, payload: AnalyticsResponse) -> None:
+        self._entries.set((user_id, version), payload)
+
+    def bump(self, db: Session, user_id: int) -> None:
+        # Deferred until the writer commits; bumping earlier would let a
+        # concurrent reader cache pre-commit data under the new version.
+        db.info.setdefault(_PENDING_KEY, set()).add(user_id)
+
+    def apply_bumps(self, user_ids) -> None:
+        with self._lock:
+            for user_id in user_ids:
+                self._versions[user_id] = self._versions.get(user_id, 0) + 1
+
+
+class DatabaseBackend:
+    """
+    Shared backend: one analytics_cache_entries row per user, visible to every worker.
+
+    A small per-process tier in front of it answers repeat reads without a
+    query. Its entries carry the version they were computed at; this
+    worker's own bumps drop them on commit, and bumps made through other
+    workers show here within ``local_ttl`` seconds.
+    """
+
+    def __init__(self, ttl: int, local_max_entries: int = 1024, local_ttl: float = 0):
+        self.ttl = ttl
+        self.scope = "db"
+        self._local = TTLCache(local_max_entries, local_ttl)
+
+    def lookup(self, db: Session, user_id: int) -> Tuple[int, Optional[Any]]:
+        local = self._local.get(user_id)
+        if local is not None:
+            return local
+
+        row = db.execute(
+            select(
+                AnalyticsCacheEntry.version,
+                AnalyticsCacheEntry.payload,
+                AnalyticsCacheEntry.expires_at,
+            ).where(AnalyticsCacheEntry.user_id == user_id)
+        ).first()
+        if row is None:
+            return 0, None
+        if row.payload is None or row.expires_at is None or row.expires_at <= datetime.utcnow():
+            return row.version, None
+        payload = AnalyticsResponse.model_validate(row.payload)
+        self._remember(user_id, row.version, payload, row.expires_at)
+        return row.version, payload
+
+    def version(self, db: Session, user_id: int) -> int:
+        # Always from the table: derived caches key files and reports on it
+        version = db.scalar(select(AnalyticsCacheEntry.version).where(AnalyticsCacheEntry.user_id == user_id))
+        return version or 0
+
+    def _remember(self, user_id: int, version: int, payload: AnalyticsResponse, expires_at: datetime) -> None:
+        # Never outlives the shared entry
+        ttl = min(self._local.ttl, (expires_at - datetime.utcnow()).total_seconds())
+        if ttl > 0:
+            self._local.set(user_id, (version, payload), ttl)
+
+    def store(self, db: Session, user_id: int, version: int, payload: AnalyticsResponse) -> None:
+        expires_at = datetime.utcnow() + timedelta(seconds=self.ttl)
+        values = {"payload": payload.model_dump(mode="json"), "expires_at": expires_at}
+        # Only write if no mutation bumped the version while we were computing
+        stmt = (
+            insert(AnalyticsCacheEntry)
+            .values(user_id=user_id, version=version, **values)
+            .on_conflict_do_update(
+                index_elements=[AnalyticsCacheEntry.user_id],
+                set_=values,
+                where=AnalyticsCacheEntry.version == version,
+            )
+            .returning(AnalyticsCacheEntry.version)
+        )
+        # In a session of its own: committing the caller's would end their
+        # transaction (and release their locks) behind their back
+        with SessionLocal() as own:
+            written = own.execute(stmt).first()
+            own.commit()
+        if written is not None:
+            self._remember(user_id, version, payload, expires_at)
+
+    def bump(self, db: Session, user_id: int) -> None:
+        # Runs inside the writer's transaction, so it commits atomically with the change
+        stmt = (
+            insert(AnalyticsCacheEntry)
+            .values(user_id=user_id, version=1, payload=None, expires_at=None)
+            .on_conflict_do_update(
+                index_elements=[AnalyticsCacheEntry.user_id],
+                set_={
+                    "version": AnalyticsCacheEntry.version + 1,
+                    "payload": None,
+                    "expires_at": None,
+                },
+            )
+        )
+        db.execute(stmt)
+        # The local copy goes once the change is visible to the next read
+        db.info.setdefault(_PENDING_KEY, set()).add(user_id)
+
+    def apply_bumps(self, user_ids) -> None:
+        for user_id in user_ids:
+            self._local.pop(user_id)
+
+
+class AnalyticsCache:
+    """Read-through cache for AnalyticsResponse with hit/miss counters."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, db: Session, user_id: int) -> AnalyticsResponse:
+        """Return the user's analytics, computing and storing them on a miss."""
+        version, cached = self.backend.lookup(db, user_id)
+        if cached is not None:
+            with self._lock:
+                self.hits += 1
+            return cached
+
+        with self._lock:
+            self.misses += 1
+        analytics = build_analytics(db, user_id)
+        try:
+            self.backend.store(db, user_id, version, analytics)
+        except Exception as e:
+            # A failed cache write must never fail the request
+            logger.warning(f"Failed to store analytics cache entry for user {user_id}: {e}")
+        return analytics
+
+    def version(self, db: Session, user_id: int) -> int:
+        """Current data version for a user, usable as a key by derived caches."""
+        return self.backend.version(db, user_id)
+
+    def version_key(self, db: Session, user_id: int) -> str:
+        """The user's data version as a string that stays unique across restarts, for keys kept on disk."""
+        return f"{self.backend.scope}.{self.version(db, user_id)}"
+
+    def invalidate(self, db: Session, user_id: int) -> None:
+        """Bump the user's version; call before committing a change to their data."""
+        with self._lock:
+            self.invalidations += 1
+        self.backend.bump(db, user_id)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+def _create_backend():
+    if settings.analytics_cache_backend == "database":
+        return DatabaseBackend(
+            settings.ANALYTICS_CACHE_TTL_SECONDS,
+            settings.ANALYTICS_CACHE_MAX_ENTRIES,
+            settings.ANALYTICS_CACHE_LOCAL_TTL_SECONDS,
+        )
+    return MemoryBackend(settings.ANALYTICS_CACHE_MAX_ENTRIES, settings.ANALYTICS_CACHE_TTL_SECONDS)
+
+
+analytics_cache = AnalyticsCache(_create_backend())
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending_invalidations(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        analytics_cache.backend.apply_bumps(pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_invalidations(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
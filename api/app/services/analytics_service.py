@@ -0,0 +1,150 @@
+"""Aggregation layer for the analytics dashboard."""
+
+from datetime import datetime, time
+
+from sqlalchemy import case, extract, func, select, true
+from sqlalchemy.orm import Session
+
+from app.models.task import Task, TaskStatus
+from app.models.risk import Risk, RiskStatus, RiskProbability, RiskImpact
+from app.models.ai_request import AIRequest
+from app.services.task_history import load_daily_counts
+from app.schemas.analytics import (
+    AnalyticsResponse, AnalyticsTotals, BurndownChart, BurndownDataPoint,
+    RiskDistribution, VelocityDataPoint
+)
+
+BURNDOWN_DAYS = 15
+VELOCITY_WEEKS = 6
+
+# Risk score weights: low=1, medium=2, high=3, critical=4
+PROBABILITY_WEIGHT = {
+    RiskProbability.LOW: 1,
+    RiskProbability.MEDIUM: 2,
+    RiskProbability.HIGH: 3,
+}
+IMPACT_WEIGHT = {
+    RiskImpact.LOW: 1,
+    RiskImpact.MEDIUM: 2,
+    RiskImpact.HIGH: 3,
+    RiskImpact.CRITICAL: 4,
+}
+MAX_RISK_SCORE = 12  # 3 * 4
+
+
+def _task_aggregates(owner_id: int):
+    """Totals and average lead time for one owner's tasks."""
+    done = Task.status == TaskStatus.DONE
+    columns = [
+        func.count(Task.id).label("total_tasks"),
+        func.count(Task.id).filter(done).label("completed_tasks"),
+        func.avg(extract("epoch", Task.updated_at - Task.created_at))
+        .filter(done, Task.created_at.isnot(None), Task.updated_at.isnot(None))
+        .label("lead_time_seconds"),
+    ]
+    return select(*columns).where(Task.owner_id == owner_id).subquery("task_stats")
+
+
+def _risk_aggregates(owner_id: int):
+    """Counts, impact distribution and average open-risk score for one owner."""
+    is_open = Risk.status == RiskStatus.OPEN
+    score = (
+        case(PROBABILITY_WEIGHT, value=Risk.probability, else_=2)
+        * case(IMPACT_WEIGHT, value=Risk.impact, else_=2)
+    )
+    columns = [
+        func.count(Risk.id).label("total_risks"),
+        func.count(Risk.id).filter(is_open).label("open_risks"),
+        func.avg(score).filter(is_open).label("open_risk_score"),
+    ]
+    for impact in RiskImpact:
+        columns.append(
+            func.count(Risk.id).filter(Risk.impact == impact).label(f"impact_{impact.value}")
+        )
+
+    return select(*columns).where(Risk.owner_id == owner_id).subquery("risk_stats")
+
+
+def _ai_aggregates(owner_id: int):
+    return (
+        select(func.count(AIRequest.id).label("ai_requests_count"))
+        .where(AIRequest.user_id == owner_id)
+        .subquery("ai_stats")
+    )
+
+
+def fetch_aggregates(db: Session, owner_id: int):
+    """
+    Compute every dashboard aggregate for a user in a single round-trip.
+
+    Each entity is reduced to one row by its own aggregate subquery and the
+    three rows are joined together, so no ORM objects are ever loaded.
+    """
+    tasks = _task_aggregates(owner_id)
+    risks = _risk_aggregates(owner_id)
+    ai = _ai_aggregates(owner_id)
+
+    stmt = select(tasks, risks, ai).select_from(
+        tasks.join(risks, true()).join(ai, true())
+    )
+    return db.execute(stmt).one()
+
+
+def build_analytics(db: Session, owner_id: int) -> AnalyticsResponse:
+    """Build the full analytics payload for a user."""
+    row = fetch_aggregates(db, owner_id)
+    daily = load_daily_counts(db, owner_id, days=VELOCITY_WEEKS * 7)
+
+    total_tasks = row.total_tasks
+    completed_tasks = row.completed_tasks
+
+    completion_rate = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
+    # Tasks completed per week over the last 4 weeks
+    velocity = sum(d.completions for d in daily[-28:]) / 4.0
+    average_lead_time = float(row.lead_time_seconds or 0) / 86400  # Convert to days
+    # Normalize to 0-100 scale
+    risk_score = float(row.open_risk_score or 0) / MAX_RISK_SCORE * 100
+
+    totals = AnalyticsTotals(
+        total_tasks=total_tasks,
+        completed_tasks=completed_tasks,
+        total_risks=row.total_risks,
+        open_risks=row.open_risks,
+        ai_requests_count=row.ai_requests_count,
+        completion_rate=round(completion_rate, 2),
+        velocity=round(velocity, 2),
+        average_lead_time=round(average_lead_time, 2),
+        risk_score=round(risk_score, 2),
+    )
+
+    burndown_data = [
+        BurndownDataPoint(
+            date=datetime.combine(d.day, time.min),
+            remaining_tasks=d.total_tasks - d.completed_tasks,
+            completed_tasks=d.completed_tasks,
+        )
+        for d in daily[-BURNDOWN_DAYS:]
+    ]
+
+    risk_distribution = RiskDistribution(
+        low=row.impact_low,
+        medium=row.impact_medium,
+        high=row.impact_high,
+        critical=row.impact_critical,
+    )
+
+    velocity_data = [
+        VelocityDataPoint(
+            week=f"Week {week + 1}",
+            tasks_completed=sum(d.completions for d in daily[week * 7:(week + 1) * 7]),
+            average=round(velocity, 2),
+        )
+        for week in range(VELOCITY_WEEKS)
+    ]
+
+    return AnalyticsResponse(
+        totals=totals,
+        burndown=BurndownChart(data_points=burndown_data),
+        risk_distribution=risk_distribution,
+        velocity_data=velocity_data,
+    )
@@ -0,0 +1,255 @@
+"""Streaming row export of user-owned tables as CSV, NDJSON or a zipped account archive."""
+
+from datetime import date, datetime
+from io import StringIO
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import csv
+import enum
+import hashlib
+import json
+import os
+import tempfile
+import time
+import uuid
+import zipfile
+
+from sqlalchemy import Date, DateTime, Enum, JSON, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database import SessionLocal
+from app.models.ai_request import AIRequest
+from app.models.post import Post
+from app.models.project import Project
+from app.models.risk import Risk
+from app.models.task import Task
+from app.services.analytics_cache import analytics_cache
+
+EXPORT_YIELD_PER = 1000  # Rows per server-side cursor fetch, and per streamed chunk
+
+Converter = Callable[[Any], Any]
+
+
+def _enum_value(value: enum.Enum) -> Any:
+    return value.value
+
+
+def _isoformat(value: "date | datetime") -> str:
+    return value.isoformat()
+
+
+def _json_text(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _json_converter(column) -> Optional[Converter]:
+    if isinstance(column.type, Enum):
+        return _enum_value
+    if isinstance(column.type, (DateTime, Date)):
+        return _isoformat
+    return None
+
+
+def _csv_converter(column) -> Optional[Converter]:
+    if isinstance(column.type, JSON):
+        return _json_text
+    return _json_converter(column)
+
+
+def _compile_values(columns, converter_for) -> Callable[[tuple], list]:
+    """
+    Build a function turning a result row into export-ready values.
+
+    The per-column conversions are decided once here, so encoding a row is
+    a list copy plus a call for each column that actually needs converting.
+    """
+    conversions = [
+        (index, converter)
+        for index, column in enumerate(columns)
+        if (converter := converter_for(column)) is not None
+    ]
+
+    def values(row: tuple) -> list:
+        out = list(row)
+        for index, converter in conversions:
+            value = out[index]
+            if value is not None:
+                out[index] = converter(value)
+        return out
+
+    return values
+
+
+class ExportEntity:
+    """One user-owned table: its columns and row encoders, compiled at import."""
+
+    def __init__(self, name: str, model, owner_column):
+        self.name = name
+        self.model = model
+        self.owner_column = owner_column
+        self.columns = list(model.__table__.columns)
+        self.field_names = [column.name for column in self.columns]
+        self._json_values = _compile_values(self.columns, _json_converter)
+        self._csv_values = _compile_values(self.columns, _csv_converter)
+
+    def json_record(self, row: tuple) -> Dict[str, Any]:
+        return dict(zip(self.field_names, self._json_values(row)))
+
+    def csv_record(self, row: tuple) -> list:
+        return self._csv_values(row)
+
+    def partitions(self, db: Session, owner_id: int) -> Iterator[List[tuple]]:
+        """Yield the owner's rows in batches, read through a server-side cursor."""
+        stmt = (
+            select(*self.columns)
+            .where(self.owner_column == owner_id)
+            .order_by(self.model.created_at, self.model.id)
+            .execution_options(yield_per=EXPORT_YIELD_PER)
+        )
+        yield from db.execute(stmt).partitions()
+
+
+EXPORT_ENTITIES: Dict[str, ExportEntity] = {
+    entity.name: entity
+    for entity in [
+        ExportEntity("tasks", Task, Task.owner_id),
+        ExportEntity("risks", Risk, Risk.owner_id),
+        ExportEntity("projects", Project, Project.owner_id),
+        ExportEntity("posts", Post, Post.user_id),
+        ExportEntity("ai_requests", AIRequest, AIRequest.user_id),
+    ]
+}
+
+
+def ndjson_chunks(db: Session, entity: ExportEntity, owner_id: int) -> Iterator[bytes]:
+    """Yield the owner's rows as NDJSON, one chunk per fetched batch."""
+    for rows in entity.partitions(db, owner_id):
+        lines = [
+            json.dumps(entity.json_record(row), ensure_ascii=False, separators=(",", ":"), default=str)
+            for row in rows
+        ]
+        yield ("\n".join(lines) + "\n").encode()
+
+
+def csv_chunks(db: Session, entity: ExportEntity, owner_id: int) -> Iterator[bytes]:
+    """Yield a CSV header, then the owner's rows one chunk per fetched batch."""
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+
+    def flush() -> bytes:
+        chunk = buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+        return chunk
+
+    writer.writerow(entity.field_names)
+    yield flush()
+    for rows in entity.partitions(db, owner_id):
+        writer.writerows(entity.csv_record(row) for row in rows)
+        yield flush()
+
+
+EXPORT_FORMATS = {
+    "csv": (csv_chunks, "text/csv; charset=utf-8"),
+    "ndjson": (ndjson_chunks, "application/x-ndjson"),
+}
+
+
+def stream_export(export_format: str, entity: ExportEntity, owner_id: int) -> Iterator[bytes]:
+    """
+    Stream an export in its own session.
+
+    Meant as a StreamingResponse body: the request's session is already
+    closed by the time the body is sent.
+    """
+    chunks, _ = EXPORT_FORMATS[export_format]
+    db = SessionLocal()
+    try:
+        yield from chunks(db, entity, owner_id)
+    finally:
+        db.close()
+
+
+def _archive_dir() -> Path:
+    path = Path(settings.USER_EXPORT_DIR or Path(tempfile.gettempdir()) / "jerrygfit-exports")
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _is_expired(path: Path) -> bool:
+    # Last use is the access time, set explicitly on reuse; the modification
+    # time stays that of the build, as Last-Modified depends on it
+    try:
+        return time.time() - path.stat().st_atime >= settings.USER_EXPORT_TTL_SECONDS
+    except FileNotFoundError:
+        return False
+
+
+def purge_expired_archives() -> None:
+    """Delete archives nobody has downloaded for USER_EXPORT_TTL_SECONDS."""
+    for path in _archive_dir().glob("account-*.zip"):
+        if _is_expired(path):
+            path.unlink(missing_ok=True)
+
+
+def write_account_archive(db: Session, owner_id: int, profile: Dict[str, Any], path: Path) -> None:
+    """
+    Write a zip holding user.json plus one NDJSON file per entity.
+
+    Each entity is streamed into its zip member batch by batch, so memory
+    use does not depend on how much data the account has.
+    """
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("user.json", json.dumps(profile, ensure_ascii=False, indent=2, default=str))
+        for entity in EXPORT_ENTITIES.values():
+            with archive.open(f"{entity.name}.ndjson", "w", force_zip64=True) as member:
+                for chunk in ndjson_chunks(db, entity, owner_id):
+                    member.write(chunk)
+
+
+def _archive_path(owner_id: int, key: str) -> Path:
+    return _archive_dir() / f"account-{owner_id}-{key}.zip"
+
+
+def _owner_archives(owner_id: int) -> List[Path]:
+    return list(_archive_dir().glob(f"account-{owner_id}-*.zip"))
+
+
+def discard_account_archive(owner_id: int) -> None:
+    """Delete the owner's archives, e.g. when the account is deleted."""
+    for path in _owner_archives(owner_id):
+        path.unlink(missing_ok=True)
+
+
+def account_archive(db: Session, owner_id: int, profile: Dict[str, Any]) -> Path:
+    """
+    Path to the owner's export archive, reusing the last one while their data is unchanged.
+
+    The archive is named after the owner's analytics data version, which
+    every change to their tasks, risks, projects, posts or AI requests
+    bumps, and a digest of their profile; so a reused archive is never
+    stale. The name therefore identifies the content and serves as its
+    ETag, so interrupted downloads can resume with a Range request. A new archive is written to
+    a temp name and renamed into place, so readers never see a partial file.
+    """
+    digest = hashlib.sha256(json.dumps(profile, sort_keys=True, default=str).encode()).hexdigest()[:12]
+    path = _archive_path(owner_id, f"{analytics_cache.version_key(db, owner_id)}-{digest}")
+    try:
+        # Marked as used so a download in progress keeps it from being purged
+        os.utime(path, ns=(time.time_ns(), path.stat().st_mtime_ns))
+        return path
+    except FileNotFoundError:
+        pass
+
+    purge_expired_archives()
+    partial = path.with_name(f".{path.name}.{uuid.uuid4().hex}.partial")
+    try:
+        write_account_archive(db, owner_id, profile, partial)
+        os.replace(partial, path)
+    finally:
+        partial.unlink(missing_ok=True)
+    for stale in _owner_archives(owner_id):
+        if stale != path:
+            stale.unlink(missing_ok=True)
+    return path
@@ -0,0 +1,337 @@
+"""
+Local hashtag suggestions from the hashtags users have already posted.
+
+HashtagIndex keeps in memory how much each hashtag is used and which
+hashtags appear together, weighted by the engagement of the posts using
+them: one set of counts over everyone's posts and one per user. To suggest
+hashtags for a caption it takes the hashtags the caption already has (and
+words that are known hashtags), ranks the tags seen alongside them,
+favouring the user's own history, and discounts tags so common they say
+little (inverse document frequency). No OpenAI call is involved.
+
+A background thread started with the app builds the index from the
+database and then keeps it current: post changes made through this process
+apply at once, other processes' changes are read back every
+HASHTAG_INDEX_SYNC_SECONDS (by posts.updated_at), and a full rebuild every
+HASHTAG_INDEX_REBUILD_SECONDS drops posts deleted elsewhere. A rebuild
+fills a separate index and swaps it in, so suggestions keep coming from
+the previous one meanwhile; requests never read the posts table.
+"""
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+from threading import Event, Lock, Thread
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Set, Tuple
+import logging
+import math
+import re
+import time
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import LatencyStats
+from app.database import SessionLocal
+from app.models.post import Post
+
+logger = logging.getLogger(__name__)
+
+# How much more a tag seen in the user's own posts counts than one seen in anyone's
+_USER_WEIGHT = 2.0
+
+_SEPARATOR_RE = re.compile(r"[\s,]+")
+_TAG_RE = re.compile(r"\w+")
+_CAPTION_TAG_RE = re.compile(r"#(\w+)")
+
+
+def parse_hashtags(value: Optional[str]) -> FrozenSet[str]:
+    """The hashtags in a Post.hashtags value ("#a #b" or "a, b"), lowercased with their '#'."""
+    tags = set()
+    for part in _SEPARATOR_RE.split(value or ""):
+        part = part.lstrip("#").lower()
+        if _TAG_RE.fullmatch(part):
+            tags.add(f"#{part}")
+    return frozenset(tags)
+
+
+def hashtags_in(text: str) -> List[str]:
+    """The #hashtags written in free text, lowercased, in order of first appearance."""
+    return list(dict.fromkeys(f"#{tag.lower()}" for tag in _CAPTION_TAG_RE.findall(text)))
+
+
+def post_weight(engagement_rate: Optional[float]) -> float:
+    # Damped, so one viral post does not drown out a user's usual tags
+    return 1.0 + math.log1p(max(engagement_rate or 0.0, 0.0))
+
+
+class HashtagSuggestion(NamedTuple):
+    tag: str
+    score: float
+    source: str  # "related" (seen with the caption's tags) or "popular" (the user's usual tags)
+
+
+class _IndexedPost(NamedTuple):
+    user_id: int
+    tags: FrozenSet[str]
+    weight: float
+
+
+class _Scope:
+    """Engagement-weighted hashtag usage and co-occurrence over one set of posts."""
+
+    def __init__(self):
+        self.posts = 0
+        self.doc_freq: Dict[str, int] = defaultdict(int)
+        self.weight: Dict[str, float] = defaultdict(float)
+        self.cooccurrence: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+
+    def add(self, tags: FrozenSet[str], weight: float) -> None:
+        self.posts += 1
+        for tag in tags:
+            self.doc_freq[tag] += 1
+            self.weight[tag] += weight
+            row = self.cooccurrence[tag]
+            for other in tags:
+                if other != tag:
+                    row[other] += weight
+
+    def remove(self, tags: FrozenSet[str], weight: float) -> None:
+        self.posts -= 1
+        for tag in tags:
+            self.doc_freq[tag] -= 1
+            if self.doc_freq[tag] <= 0:
+                del self.doc_freq[tag], self.weight[tag], self.cooccurrence[tag]
+                continue
+            self.weight[tag] -= weight
+            row = self.cooccurrence[tag]
+            for other in tags:
+                if other != tag:
+                    row[other] -= weight
+                    # What float rounding leaves of a pair no post has any more
+                    if row[other] < 1e-9:
+                        del row[other]
+
+    def idf(self, tag: str) -> float:
+        return math.log((1 + self.posts) / (1 + self.doc_freq.get(tag, 0))) + 1
+
+    def related(self, seeds: Iterable[str]) -> Dict[str, float]:
+        """Tags used alongside ``seeds``: engagement-weighted P(tag | seed), summed over seeds, times IDF."""
+        scores: Dict[str, float] = defaultdict(float)
+        for seed in seeds:
+            if seed not in self.weight:
+                continue
+            total = self.weight[seed]
+            for tag, weight in self.cooccurrence[seed].items():
+                scores[tag] += weight / total
+        return {tag: score * self.idf(tag) for tag, score in scores.items()}
+
+    def popular(self) -> Dict[str, float]:
+        """Every tag by its share of the scope's engagement-weighted usage."""
+        total = sum(self.weight.values()) or 1.0
+        return {tag: weight / total for tag, weight in self.weight.items()}
+
+
+class HashtagIndex:
+    def __init__(self):
+        self._lock = Lock()
+        self._posts: Dict[int, _IndexedPost] = {}
+        self._global = _Scope()
+        self._users: Dict[int, _Scope] = {}
+        self._built_at: Optional[float] = None
+        self._synced_at: Optional[float] = None
+        self._watermark: Optional[datetime] = None
+        # Posts deleted through this process while a rebuild was reading the table
+        self._removed_during_rebuild: Optional[Set[int]] = None
+        self._stopping = Event()
+        self._thread: Optional[Thread] = None
+        self.latency = LatencyStats()
+        self.rebuilds = 0
+        self.syncs = 0
+        self.refresh_failures = 0
+
+    @property
+    def built(self) -> bool:
+        return self._built_at is not None
+
+    def _add(self, post_id: int, post: _IndexedPost) -> None:
+        self._posts[post_id] = post
+        self._global.add(post.tags, post.weight)
+        self._users.setdefault(post.user_id, _Scope()).add(post.tags, post.weight)
+
+    def _remove(self, post_id: int) -> None:
+        post = self._posts.pop(post_id, None)
+        if post is None:
+            return
+        self._global.remove(post.tags, post.weight)
+        scope = self._users[post.user_id]
+        scope.remove(post.tags, post.weight)
+        if scope.posts <= 0:
+            del self._users[post.user_id]
+
+    def add_post(self, post_id: int, user_id: int, hashtags: Optional[str], engagement_rate: Optional[float]) -> None:
+        """Index a created or updated post, replacing what it contributed before."""
+        if not self.built:
+            # The first refresh reads it from the database
+            return
+        tags = parse_hashtags(hashtags)
+        with self._lock:
+            self._remove(post_id)
+            if tags:
+                self._add(post_id, _IndexedPost(user_id, tags, post_weight(engagement_rate)))
+
+    def remove_post(self, post_id: int) -> None:
+        with self._lock:
+            self._remove(post_id)
+            if self._removed_during_rebuild is not None:
+                self._removed_during_rebuild.add(post_id)
+
+    def remove_user(self, user_id: int) -> None:
+        """Forget a deleted account's posts."""
+        with self._lock:
+            for post_id in [post_id for post_id, post in self._posts.items() if post.user_id == user_id]:
+                self._remove(post_id)
+                if self._removed_during_rebuild is not None:
+                    self._removed_during_rebuild.add(post_id)
+
+    def refresh(self) -> None:
+        """
+        Build the index if it is due a rebuild, else read back posts changed since the last sync.
+
+        Blocking; the background thread calls it.
+        """
+        db = SessionLocal()
+        try:
+            if not self.built or time.monotonic() - self._built_at >= settings.HASHTAG_INDEX_REBUILD_SECONDS:
+                self._rebuild(db)
+            else:
+                self._sync(db)
+        finally:
+            db.close()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = Thread(target=self._run, name="hashtag-index", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                self.refresh_failures += 1
+                logger.warning(f"Failed to refresh hashtag index: {e}")
+            self._stopping.wait(settings.HASHTAG_INDEX_SYNC_SECONDS)
+
+    @staticmethod
+    def _post_rows(db: Session, *criteria) -> Iterable[Tuple[int, int, Optional[str], Optional[float]]]:
+        return db.execute(
+            select(Post.id, Post.user_id, Post.hashtags, Post.engagement_rate).where(*criteria)
+        )
+
+    def _rebuild(self, db: Session) -> None:
+        start = time.perf_counter()
+        as_of = datetime.utcnow()
+        self.load(self._post_rows(db, Post.hashtags.isnot(None), Post.hashtags != ""), as_of)
+        logger.info(
+            f"Hashtag index built from {len(self._posts)} posts in {time.perf_counter() - start:.2f}s"
+        )
+
+    def load(
+        self, rows: Iterable[Tuple[int, int, Optional[str], Optional[float]]], as_of: Optional[datetime] = None
+    ) -> None:
+        """Replace the index with ``rows`` of (post id, user id, hashtags, engagement rate), read at ``as_of``."""
+        with self._lock:
+            self._removed_during_rebuild = set()
+        rebuilt = HashtagIndex()
+        for post_id, user_id, hashtags, engagement_rate in rows:
+            tags = parse_hashtags(hashtags)
+            if tags:
+                rebuilt._add(post_id, _IndexedPost(user_id, tags, post_weight(engagement_rate)))
+
+        with self._lock:
+            for post_id in self._removed_during_rebuild:
+                rebuilt._remove(post_id)
+            self._removed_during_rebuild = None
+            self._posts, self._global, self._users = rebuilt._posts, rebuilt._global, rebuilt._users
+            self._built_at = self._synced_at = time.monotonic()
+            self._watermark = as_of or datetime.utcnow()
+            self.rebuilds += 1
+
+    def _sync(self, db: Session) -> None:
+        started_at = datetime.utcnow()
+        # Overlap the previous sync, for transactions that committed after it read
+        since = self._watermark - timedelta(seconds=max(settings.HASHTAG_INDEX_SYNC_SECONDS, 1.0))
+        rows = self._post_rows(db, Post.updated_at > since).all()
+        with self._lock:
+            for post_id, user_id, hashtags, engagement_rate in rows:
+                self._remove(post_id)
+                tags = parse_hashtags(hashtags)
+                if tags:
+                    self._add(post_id, _IndexedPost(user_id, tags, post_weight(engagement_rate)))
+            self._synced_at = time.monotonic()
+            self._watermark = started_at
+            self.syncs += 1
+
+    def suggest(self, user_id: int, caption: str, count: int = 15) -> List[HashtagSuggestion]:
+        """
+        Up to ``count`` hashtags for ``caption``, best first, excluding those it already has.
+
+        Tags seen with the caption's hashtags come first; if there are too
+        few, the user's own most engaging tags fill the rest.
+        """
+        start = time.perf_counter()
+        with self._lock:
+            user_scope = self._users.get(user_id)
+            seeds = set(hashtags_in(caption))
+            for word in _TAG_RE.findall(caption.lower()):
+                tag = f"#{word}"
+                if tag in self._global.weight:
+                    seeds.add(tag)
+
+            scores: Dict[str, float] = defaultdict(float)
+            for scope, factor in ((user_scope, _USER_WEIGHT), (self._global, 1.0)):
+                if scope is not None:
+                    for tag, score in scope.related(seeds).items():
+                        scores[tag] += factor * score
+            ranked = sorted((tag for tag in scores if tag not in seeds), key=lambda tag: (-scores[tag], tag))
+            suggestions = [HashtagSuggestion(tag, round(scores[tag], 4), "related") for tag in ranked[:count]]
+
+            if len(suggestions) < count and user_scope is not None:
+                chosen = seeds | {suggestion.tag for suggestion in suggestions}
+                popular = user_scope.popular()
+                for tag in sorted(popular, key=lambda tag: (-popular[tag], tag)):
+                    if len(suggestions) >= count:
+                        break
+                    if tag not in chosen:
+                        suggestions.append(HashtagSuggestion(tag, round(popular[tag], 4), "popular"))
+
+        self.latency.record(time.perf_counter() - start)
+        return suggestions
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "built": self.built,
+                "posts": len(self._posts),
+                "users": len(self._users),
+                "hashtags": len(self._global.weight),
+                "rebuilds": self.rebuilds,
+                "syncs": self.syncs,
+                "seconds_since_sync": (
+                    None if self._synced_at is None else round(time.monotonic() - self._synced_at, 1)
+                ),
+                "refresh_failures": self.refresh_failures,
+                "suggest_latency": self.latency.stats(),
+            }
+
+
+hashtag_index = HashtagIndex()
@@ -0,0 +1,381 @@
+"""Background jobs stored in Postgres and run by in-process worker threads."""
+
+from datetime import datetime, timedelta
+from threading import Event, Lock, Thread
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+import logging
+import time
+import uuid
+
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database import SessionLocal
+from app.models.ai_request import AIRequest
+from app.models.job import Job, JobStatus
+from app.models.user import User
+from app.schemas.ai import AIGenerateResponse
+from app.services.analytics_cache import analytics_cache
+from app.services.openai_service import (
+    AIRequestRejected, generated_items, openai_service, purge_expired_generation_flights, request_log_payload,
+)
+from app.services.reports import (
+    EXCEL_CONTENT_TYPE, PDF_CONTENT_TYPE, build_excel_report, build_pdf_report, report_filename,
+)
+from app.services.refresh_tokens import purge_expired_refresh_tokens
+
+logger = logging.getLogger(__name__)
+
+
+class JobOutput(NamedTuple):
+    """What a handler produces: a JSON result, a file to download, or both."""
+    result: Optional[Dict[str, Any]] = None
+    file: Optional[bytes] = None
+    filename: Optional[str] = None
+    content_type: Optional[str] = None
+
+
+class ClaimedJob(NamedTuple):
+    id: str
+    kind: str
+    user_id: int
+    payload: Dict[str, Any]
+    attempt: int
+    lease_token: str
+
+
+# Handlers take (db, user_id, payload) and leave their writes uncommitted:
+# they commit along with the job's success, and only if this worker still
+# holds the lease. ValueError means the job can never succeed and is not
+# retried; any other exception is retried with backoff.
+JobHandler = Callable[[Session, int, Dict[str, Any]], JobOutput]
+
+_handlers: Dict[str, JobHandler] = {}
+
+
+def job_handler(kind: str):
+    """Register the function that runs jobs of ``kind``."""
+    def register(func: JobHandler) -> JobHandler:
+        _handlers[kind] = func
+        return func
+    return register
+
+
+def enqueue_job(
+    db: Session,
+    user_id: int,
+    kind: str,
+    payload: Optional[Dict[str, Any]] = None,
+    max_attempts: Optional[int] = None,
+) -> Job:
+    """Create a queued job and wake the local workers."""
+    if kind not in _handlers:
+        raise ValueError(f"Unknown job kind: {kind}")
+
+    job = Job(
+        user_id=user_id,
+        kind=kind,
+        payload=payload or {},
+        status=JobStatus.QUEUED.value,
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+        run_after=datetime.utcnow(),
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    job_runner.wake()
+    return job
+
+
+def cancel_job(db: Session, job: Job) -> Job:
+    """
+    Cancel a job.
+
+    Queued jobs are cancelled at once. A running attempt cannot be
+    interrupted, so it is flagged and its outcome is discarded when it ends.
+    """
+    db.refresh(job, with_for_update=True)
+    if job.status in (JobStatus.QUEUED.value, JobStatus.RUNNING.value):
+        job.cancel_requested = True
+        if job.status == JobStatus.QUEUED.value:
+            _finish(job, JobStatus.CANCELLED)
+        db.commit()
+        db.refresh(job)
+    return job
+
+
+def _finish(job: Job, status: JobStatus) -> None:
+    now = datetime.utcnow()
+    job.status = status.value
+    job.finished_at = now
+    job.expires_at = now + timedelta(seconds=settings.JOB_RESULT_TTL_SECONDS)
+    job.lease_token = None
+
+
+def _retry_delay(attempt: int) -> timedelta:
+    return timedelta(seconds=settings.JOB_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+
+
+class JobRunner:
+    """
+    Pool of worker threads that claim and run jobs.
+
+    Workers in every API process poll the same table; ``FOR UPDATE SKIP
+    LOCKED`` hands each runnable job to exactly one of them.
+    """
+
+    def __init__(self):
+        self._threads: List[Thread] = []
+        self._stopping = Event()
+        self._wakeup = Event()
+        self._purge_lock = Lock()
+        self._last_purge = 0.0
+
+    def start(self, workers: int) -> None:
+        if self._threads or workers <= 0:
+            return
+        self._stopping.clear()
+        for n in range(workers):
+            thread = Thread(target=self._work, name=f"job-worker-{n}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"Started {workers} job workers")
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop polling; attempts already running are given ``timeout`` seconds to finish."""
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def wake(self) -> None:
+        self._wakeup.set()
+
+    def _work(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                ran = self.run_once()
+            except Exception as e:
+                logger.error(f"Job worker error: {e}")
+                ran = False
+            if not ran:
+                self._maybe_purge()
+                self._wakeup.wait(settings.JOB_POLL_INTERVAL_SECONDS)
+                self._wakeup.clear()
+
+    def run_once(self) -> bool:
+        """Claim and run one runnable job; returns False if there was none."""
+        claimed = self._claim()
+        if claimed is None:
+            return False
+
+        handler = _handlers.get(claimed.kind)
+        finished = Event()
+        Thread(
+            target=self._heartbeat, args=(claimed, finished), name=f"job-heartbeat-{claimed.id}", daemon=True
+        ).start()
+        db = SessionLocal()
+        try:
+            if handler is None:
+                raise ValueError(f"Unknown job kind: {claimed.kind}")
+            output = handler(db, claimed.user_id, claimed.payload)
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Job {claimed.id} ({claimed.kind}) attempt {claimed.attempt} failed: {e}")
+            self._record_failure(claimed, e)
+        else:
+            self._record_success(db, claimed, output)
+        finally:
+            finished.set()
+            db.close()
+        return True
+
+    @staticmethod
+    def _heartbeat(claimed: ClaimedJob, finished: Event) -> None:
+        """Renew the attempt's lease every third of JOB_LEASE_SECONDS until it finishes."""
+        while not finished.wait(settings.JOB_LEASE_SECONDS / 3):
+            db = SessionLocal()
+            try:
+                renewed = db.execute(
+                    update(Job)
+                    .where(Job.id == claimed.id, Job.lease_token == claimed.lease_token)
+                    .values(locked_at=datetime.utcnow())
+                ).rowcount
+                db.commit()
+            except Exception as e:
+                # Try again next beat; the lease has two more to go
+                logger.warning(f"Job {claimed.id} lease renewal failed: {e}")
+                continue
+            finally:
+                db.close()
+            if not renewed:
+                # Reclaimed or cancelled; _locked_job discards the outcome
+                return
+
+    def _claim(self) -> Optional[ClaimedJob]:
+        now = datetime.utcnow()
+        lease_expired = now - timedelta(seconds=settings.JOB_LEASE_SECONDS)
+        db = SessionLocal()
+        try:
+            while True:
+                job = db.execute(
+                    select(Job)
+                    .where(
+                        or_(
+                            and_(Job.status == JobStatus.QUEUED.value, Job.run_after <= now),
+                            # Running jobs whose worker died without finishing them
+                            and_(Job.status == JobStatus.RUNNING.value, Job.locked_at < lease_expired),
+                        )
+                    )
+                    .order_by(Job.run_after)
+                    .limit(1)
+                    .with_for_update(skip_locked=True)
+                ).scalar_one_or_none()
+                if job is None:
+                    return None
+
+                if job.cancel_requested:
+                    _finish(job, JobStatus.CANCELLED)
+                    db.commit()
+                    continue
+                if job.status == JobStatus.RUNNING.value and job.attempts >= job.max_attempts:
+                    job.error = "Job worker stopped before the job finished"
+                    _finish(job, JobStatus.FAILED)
+                    db.commit()
+                    continue
+
+                job.status = JobStatus.RUNNING.value
+                job.attempts += 1
+                job.lease_token = uuid.uuid4().hex
+                job.locked_at = now
+                job.started_at = job.started_at or now
+                claimed = ClaimedJob(job.id, job.kind, job.user_id, job.payload or {}, job.attempts, job.lease_token)
+                db.commit()
+                return claimed
+        finally:
+            db.close()
+
+    @staticmethod
+    def _locked_job(db: Session, claimed: ClaimedJob) -> Optional[Job]:
+        """The job row, if this worker still holds its lease."""
+        job = db.execute(
+            select(Job).where(Job.id == claimed.id).with_for_update()
+        ).scalar_one_or_none()
+        if job is None or job.lease_token != claimed.lease_token:
+            logger.warning(f"Job {claimed.id} lease lost; discarding attempt {claimed.attempt}")
+            return None
+        return job
+
+    def _record_success(self, db: Session, claimed: ClaimedJob, output: JobOutput) -> None:
+        # In the handler's transaction, so its writes commit only with the lease held
+        job = self._locked_job(db, claimed)
+        if job is None:
+            db.rollback()
+            return
+        if job.cancel_requested:
+            _finish(job, JobStatus.CANCELLED)
+        else:
+            job.result = output.result
+            job.result_file = output.file
+            job.result_filename = output.filename
+            job.result_content_type = output.content_type
+            job.error = None
+            _finish(job, JobStatus.SUCCEEDED)
+        db.commit()
+
+    def _record_failure(self, claimed: ClaimedJob, error: Exception) -> None:
+        db = SessionLocal()
+        try:
+            job = self._locked_job(db, claimed)
+            if job is None:
+                return
+            job.error = str(error)
+            if job.cancel_requested:
+                _finish(job, JobStatus.CANCELLED)
+            elif isinstance(error, ValueError) or job.attempts >= job.max_attempts:
+                _finish(job, JobStatus.FAILED)
+            else:
+                job.status = JobStatus.QUEUED.value
+                job.run_after = datetime.utcnow() + _retry_delay(job.attempts)
+                job.lease_token = None
+                job.locked_at = None
+            db.commit()
+        finally:
+            db.close()
+
+    def _maybe_purge(self) -> None:
+        """Delete expired job results, refresh tokens and shared AI results, at most once per interval."""
+        with self._purge_lock:
+            if time.monotonic() - self._last_purge < settings.JOB_PURGE_INTERVAL_SECONDS:
+                return
+            self._last_purge = time.monotonic()
+        purge_expired_jobs()
+        purge_expired_refresh_tokens()
+        if settings.AI_COALESCE_ACROSS_WORKERS:
+            purge_expired_generation_flights()
+
+
+def purge_expired_jobs() -> int:
+    db = SessionLocal()
+    try:
+        deleted = db.execute(delete(Job).where(Job.expires_at < datetime.utcnow())).rowcount
+        db.commit()
+        if deleted:
+            logger.info(f"Purged {deleted} expired jobs")
+        return deleted
+    finally:
+        db.close()
+
+
+job_runner = JobRunner()
+
+
+@job_handler("ai.generate")
+def _generate_ai_content(db: Session, user_id: int, payload: Dict[str, Any]) -> JobOutput:
+    request_type = payload["request_type"]
+    try:
+        result = openai_service.generate(
+            request_type, payload["prompt"], model=payload["model"], variants=payload.get("variants", 1)
+        )
+    except AIRequestRejected as e:
+        # Retrying would only be rejected again
+        raise ValueError(str(e)) from e
+    items = generated_items(request_type, result)
+
+    db.add(AIRequest(
+        user_id=user_id,
+        request_type=request_type,
+        prompt=payload["prompt"],
+        response=request_log_payload(items, result),
+        tokens_used=result["tokens_used"],
+    ))
+    analytics_cache.invalidate(db, user_id)
+
+    return JobOutput(result=AIGenerateResponse(
+        success=True,
+        data=items,
+        tokens_used=result["tokens_used"],
+        request_type=request_type,
+        cached=result["cached"],
+    ).model_dump())
+
+
+def _report_user(db: Session, user_id: int) -> User:
+    user = db.get(User, user_id)
+    if user is None:
+        raise ValueError(f"User {user_id} no longer exists")
+    return user
+
+
+@job_handler("analytics.export_pdf")
+def _export_analytics_pdf(db: Session, user_id: int, payload: Dict[str, Any]) -> JobOutput:
+    report = build_pdf_report(db, _report_user(db, user_id))
+    return JobOutput(file=report, filename=report_filename("pdf"), content_type=PDF_CONTENT_TYPE)
+
+
+@job_handler("analytics.export_excel")
+def _export_analytics_excel(db: Session, user_id: int, payload: Dict[str, Any]) -> JobOutput:
+    report = build_excel_report(db, _report_user(db, user_id))
+    return JobOutput(file=report, filename=report_filename("xlsx"), content_type=EXCEL_CONTENT_TYPE)
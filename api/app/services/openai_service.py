@@ -1,17 +1,268 @@
 """OpenAI service for AI content generation."""
 
-from typing import Any, Dict, List, Optional
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional
 import openai
-from openai import OpenAI, OpenAIError, APIError, RateLimitError, APIConnectionError
+from openai import AsyncOpenAI, OpenAI, OpenAIError, APIError, APIStatusError, RateLimitError, APIConnectionError
+import hashlib
+import json
 import logging
+import re
+from threading import Lock
 
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import DBAPIError
+
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.core.singleflight import SingleFlight
+from app.database import SessionLocal, async_engine
+from app.models.ai_generation_flight import AIGenerationFlight
+from app.services.openai_transport import AIServiceUnavailable, is_transient, openai_transport
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Initialize OpenAI client
-client = OpenAI(api_key=settings.OPENAI_API_KEY) if settings.OPENAI_API_KEY else None
+# Initialize OpenAI clients (the async one serves streaming and concurrent callers).
+# Retries are left to openai_transport, which also falls back between models.
+_client_options = dict(
+    api_key=settings.OPENAI_API_KEY,
+    base_url=settings.OPENAI_BASE_URL,
+    timeout=settings.AI_REQUEST_TIMEOUT_SECONDS,
+    max_retries=0,
+)
+client = OpenAI(**_client_options) if settings.OPENAI_API_KEY else None
+async_client = AsyncOpenAI(**_client_options) if settings.OPENAI_API_KEY else None
+
+
+ALLOWED_MODELS = ["gpt-4", "gpt-3.5-turbo", "gpt-4-turbo"]
+
+
+def resolve_model(model: Optional[str]) -> str:
+    """Validate model parameter, falling back to gpt-4."""
+    model = model or "gpt-4"
+    return model if model in ALLOWED_MODELS else "gpt-4"
+
+
+# Request types whose content is a JSON array to be returned as separate items
+JSON_LIST_REQUEST_TYPES = {"generate_risks", "generate_tasks"}
+
+# Request types that can ask for several alternatives from one call (the chat API's ``n``)
+VARIANT_REQUEST_TYPES = {"caption", "hashtag"}
+
+
+def variants_error(request_type: str, variants: int) -> Optional[str]:
+    """Why a request's ``variants`` cannot be served, or None if it can."""
+    if variants < 1:
+        return "variants must be at least 1"
+    if variants > 1 and request_type not in VARIANT_REQUEST_TYPES:
+        return f"variants is only supported for {', '.join(sorted(VARIANT_REQUEST_TYPES))} requests"
+    if variants > settings.AI_MAX_VARIANTS:
+        return f"variants cannot be more than {settings.AI_MAX_VARIANTS}"
+    return None
+
+
+def generated_items(request_type: str, result: Dict[str, Any]) -> list:
+    """Shape a generation result into the items returned to the client."""
+    if request_type in JSON_LIST_REQUEST_TYPES:
+        # Parse JSON response if possible
+        try:
+            return json.loads(result["content"])
+        except json.JSONDecodeError:
+            # If not valid JSON, return as single item
+            return [result]
+    if "variants" in result:
+        # One item per alternative; tokens_used is the whole call's
+        base = {k: v for k, v in result.items() if k != "variants"}
+        return [
+            {**base, "content": content, "variant": i}
+            for i, content in enumerate(result["variants"])
+        ]
+    return [result]
+
+
+def request_log_payload(items: list, result: Dict[str, Any]) -> Dict[str, Any]:
+    """AIRequest.response payload; cache hits are flagged so they can be told apart."""
+    if result.get("cached"):
+        return {"items": items, "cached": True}
+    return {"items": items}
+
+
+def _generation_output(result_type: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    output = {
+        "type": result_type,
+        "content": result["content"],
+        "tokens_used": result["tokens_used"],
+        "cached": result["cached"],
+    }
+    if "variants" in result:
+        output["variants"] = result["variants"]
+    return output
+
+
+class AIRequestRejected(Exception):
+    """OpenAI refused the request itself (a 4xx other than rate limiting); sending it again cannot help."""
+
+
+class GenerationRequest(NamedTuple):
+    """Fully built chat request for one AI Studio request type."""
+    result_type: str
+    messages: List[Dict[str, str]]
+    max_tokens: int
+
+
+_WORD_RE = re.compile(r"[#\w']+")
+
+
+def normalize_prompt(text: str) -> str:
+    """
+    Reduce a prompt to its lowercase words, in order, without punctuation.
+
+    "Leg day  motivation!" and "leg day, motivation" both become
+    "leg day motivation"; reordered or reworded prompts stay distinct.
+    """
+    words = (w.strip("'") for w in _WORD_RE.findall(text.lower()))
+    return " ".join(w for w in words if w)
+
+
+class GenerationCache:
+    """
+    Two-tier cache of chat completion results.
+
+    The exact tier is keyed on (model, system prompt, user prompt,
+    temperature, max_tokens). The similarity tier uses the same key with the
+    user prompt normalized, so prompts differing only in case, punctuation
+    or spacing share one generation.
+    Both tiers are size-bounded LRUs whose entries expire after ``ttl``.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl: int,
+        similarity: bool = True,
+        excluded_types: Optional[set] = None,
+        enabled: bool = True,
+    ):
+        self.enabled = enabled
+        self.similarity = similarity
+        self.excluded_types = excluded_types or set()
+        self._exact = TTLCache(max_entries, ttl)
+        self._similar = TTLCache(max_entries, ttl)
+        self._lock = Lock()
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+
+    def applies_to(self, request_type: Optional[str]) -> bool:
+        """Whether results for ``request_type`` may be cached; None opts out."""
+        return self.enabled and request_type is not None and request_type not in self.excluded_types
+
+    @staticmethod
+    def _key(model: str, messages: List[Dict[str, str]], temperature: float, max_tokens: int, normalize: bool) -> str:
+        system_prompt = "\n".join(m["content"] for m in messages if m["role"] == "system")
+        user_prompt = "\n".join(m["content"] for m in messages if m["role"] != "system")
+        if normalize:
+            user_prompt = normalize_prompt(user_prompt)
+        raw = json.dumps([model, system_prompt, user_prompt, temperature, max_tokens])
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, model: str, messages: List[Dict[str, str]], temperature: float, max_tokens: int) -> Optional[str]:
+        """Return cached content for the request, or None on a miss."""
+        content = self._exact.get(self._key(model, messages, temperature, max_tokens, False))
+        if content is not None:
+            with self._lock:
+                self.exact_hits += 1
+            return content
+
+        if self.similarity:
+            content = self._similar.get(self._key(model, messages, temperature, max_tokens, True))
+            if content is not None:
+                with self._lock:
+                    self.similar_hits += 1
+                return content
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, model: str, messages: List[Dict[str, str]], temperature: float, max_tokens: int, content: str) -> None:
+        if not content:
+            return
+        self._exact.set(self._key(model, messages, temperature, max_tokens, False), content)
+        if self.similarity:
+            self._similar.set(self._key(model, messages, temperature, max_tokens, True), content)
+
+    def clear(self) -> None:
+        self._exact.clear()
+        self._similar.clear()
+
+    def stats(self) -> dict:
+        hits = self.exact_hits + self.similar_hits
+        total = hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "similarity": self.similarity,
+            "excluded_types": sorted(self.excluded_types),
+            "entries": len(self._exact),
+            "exact_hits": self.exact_hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+        }
+
+
+generation_cache = GenerationCache(
+    settings.AI_CACHE_MAX_ENTRIES,
+    settings.AI_CACHE_TTL_SECONDS,
+    similarity=settings.AI_CACHE_SIMILARITY_ENABLED,
+    excluded_types=settings.ai_cache_excluded_types,
+    enabled=settings.AI_CACHE_ENABLED,
+)
+
+
+def _cached_result(content: str) -> Dict[str, Any]:
+    # A cache hit, or a result shared with an identical in-flight request, costs no tokens
+    return {"content": content, "tokens_used": 0, "cached": True}
+
+
+def _shared_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    # An identical in-flight request's result, variants included, at no token cost
+    return {**result, "tokens_used": 0, "cached": True}
+
+
+def _completion_result(
+    content: str, variants: List[str], tokens_used: int, model_used: str, n: int
+) -> Dict[str, Any]:
+    result = {
+        "content": content,
+        "tokens_used": tokens_used,
+        "cached": False,
+        "model": model_used,
+    }
+    if n > 1:
+        result["variants"] = variants
+    return result
+
+
+def _advisory_lock_id(key: str) -> int:
+    # The first 60 bits of the hex digest, so it fits a signed bigint
+    return int(key[:15], 16)
+
+
+def purge_expired_generation_flights() -> int:
+    """Delete shared results no waiting process can still want."""
+    db = SessionLocal()
+    try:
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.AI_COALESCE_WAIT_SECONDS)
+        deleted = db.execute(
+            delete(AIGenerationFlight).where(AIGenerationFlight.created_at < cutoff)
+        ).rowcount
+        db.commit()
+        return deleted
+    finally:
+        db.close()
 
 
 class OpenAIService:
@@ -21,6 +272,26 @@ class OpenAIService:
         if not client:
             logger.warning("OpenAI API key not configured. AI features will be disabled.")
         self.client = client
+        self.async_client = async_client
+        self.cache = generation_cache
+        self.transport = openai_transport
+        self.flights = SingleFlight()
+        self.shared_across_workers = 0
+
+    def _flight_key(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        use_cache: bool,
+        n: int = 1,
+    ) -> str:
+        # Requests that would share a cache entry also share an in-flight call
+        key = GenerationCache._key(model, messages, temperature, max_tokens, use_cache and self.cache.similarity)
+        if n > 1:
+            key = hashlib.sha256(f"{key}:{n}".encode()).hexdigest()
+        return key
 
     def _make_request(
         self,
@@ -28,6 +299,8 @@ class OpenAIService:
         model: str = "gpt-4",
         temperature: float = 0.7,
         max_tokens: int = 1000,
+        cache_type: Optional[str] = None,
+        n: int = 1,
     ) -> Dict[str, Any]:
         """
         Make a request to OpenAI API with error handling.
@@ -37,9 +310,12 @@ class OpenAIService:
             model: OpenAI model to use (default: gpt-4)
             temperature: Sampling temperature (0-2)
             max_tokens: Maximum tokens to generate
+            cache_type: Request type to cache the result under; None bypasses the cache
+            n: Alternatives to generate in the one call; more than one bypasses the cache
 
         Returns:
-            Dictionary with 'content' and 'tokens_used'
+            Dictionary with 'content', 'tokens_used' and 'cached', plus every
+            alternative's content as 'variants' when n is more than one
 
         Raises:
             ValueError: If API key is not configured
@@ -48,59 +324,338 @@ class OpenAIService:
         if not self.client:
             raise ValueError("OpenAI API key not configured. Please set OPENAI_API_KEY in your .env file.")
 
+        # Someone asking for alternatives wants fresh ones, not a cached answer
+        use_cache = n == 1 and self.cache.applies_to(cache_type)
+        if use_cache:
+            cached = self.cache.get(model, messages, temperature, max_tokens)
+            if cached is not None:
+                return _cached_result(cached)
+
+        if not settings.AI_COALESCE_ENABLED:
+            return self._complete(messages, model, temperature, max_tokens, use_cache, n)
+        result, shared = self.flights.do(
+            self._flight_key(messages, model, temperature, max_tokens, use_cache, n),
+            self._complete, messages, model, temperature, max_tokens, use_cache, n,
+        )
+        return _shared_result(result) if shared else result
+
+    def _complete(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        use_cache: bool,
+        n: int = 1,
+    ) -> Dict[str, Any]:
         try:
-            response = self.client.chat.completions.create(
-                model=model,
-                messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens,
+            response, model_used = self.transport.call(
+                model,
+                lambda candidate: self.client.chat.completions.create(
+                    model=candidate,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    n=n,
+                ),
             )
 
             content = response.choices[0].message.content
+            variants = [choice.message.content for choice in response.choices]
             tokens_used = response.usage.total_tokens
 
-            return {
-                "content": content,
-                "tokens_used": tokens_used,
-            }
+        except Exception as e:
+            raise self._translate_error(e)
+
+        # A fallback model's answer is not cached as the requested model's
+        if use_cache and model_used == model:
+            self.cache.set(model, messages, temperature, max_tokens, content)
+        return _completion_result(content, variants, tokens_used, model_used, n)
+
+    async def _make_request_async(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = "gpt-4",
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        cache_type: Optional[str] = None,
+        n: int = 1,
+    ) -> Dict[str, Any]:
+        """
+        Async counterpart of _make_request using the AsyncOpenAI client.
+
+        Awaiting it does not hold a threadpool thread while GPT responds.
+        """
+        if not self.async_client:
+            raise ValueError("OpenAI API key not configured. Please set OPENAI_API_KEY in your .env file.")
+
+        use_cache = n == 1 and self.cache.applies_to(cache_type)
+        if use_cache:
+            cached = self.cache.get(model, messages, temperature, max_tokens)
+            if cached is not None:
+                return _cached_result(cached)
+
+        hedge = cache_type in settings.ai_hedge_request_types
+        if not settings.AI_COALESCE_ENABLED:
+            return await self._complete_async(messages, model, temperature, max_tokens, use_cache, hedge, n)
+        key = self._flight_key(messages, model, temperature, max_tokens, use_cache, n)
+        # ai_generation_flights holds one content per key, so variant sets coalesce in-process only
+        if settings.AI_COALESCE_ACROSS_WORKERS and n == 1:
+            result, shared = await self.flights.do_async(
+                key, self._complete_across_workers, key, messages, model, temperature, max_tokens, use_cache, hedge
+            )
+        else:
+            result, shared = await self.flights.do_async(
+                key, self._complete_async, messages, model, temperature, max_tokens, use_cache, hedge, n
+            )
+        return _shared_result(result) if shared else result
 
-        except RateLimitError as e:
+    async def _complete_across_workers(
+        self,
+        key: str,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        use_cache: bool,
+        hedge: bool,
+    ) -> Dict[str, Any]:
+        """
+        _complete_async, unless another process is already making the same call.
+
+        The generating process holds a transaction-level advisory lock on the
+        key until it commits its result to ai_generation_flights, which
+        releases the lock and publishes the row at once. A process that finds
+        the lock taken waits on it, then reads the row; if there is none (the
+        call failed) or the wait times out, it makes the call itself.
+        """
+        lock_id = _advisory_lock_id(key)
+        async with async_engine.connect() as connection:
+            async with connection.begin():
+                if await connection.scalar(select(func.pg_try_advisory_xact_lock(lock_id))):
+                    result = await self._complete_async(messages, model, temperature, max_tokens, use_cache, hedge)
+                    if result["content"]:
+                        stmt = insert(AIGenerationFlight).values(
+                            key=key,
+                            content=result["content"],
+                            tokens_used=result["tokens_used"],
+                            created_at=datetime.utcnow(),
+                        )
+                        await connection.execute(stmt.on_conflict_do_update(
+                            index_elements=[AIGenerationFlight.key],
+                            set_={
+                                "content": stmt.excluded.content,
+                                "tokens_used": stmt.excluded.tokens_used,
+                                "created_at": stmt.excluded.created_at,
+                            },
+                        ))
+                    return result
+
+            content = None
+            try:
+                async with connection.begin():
+                    timeout_ms = int(settings.AI_COALESCE_WAIT_SECONDS * 1000)
+                    await connection.execute(text(f"SET LOCAL lock_timeout = {timeout_ms}"))
+                    await connection.execute(select(func.pg_advisory_xact_lock(lock_id)))
+                    cutoff = datetime.utcnow() - timedelta(seconds=settings.AI_COALESCE_WAIT_SECONDS)
+                    content = await connection.scalar(
+                        select(AIGenerationFlight.content)
+                        .where(AIGenerationFlight.key == key, AIGenerationFlight.created_at > cutoff)
+                    )
+            except DBAPIError as e:
+                logger.warning(f"Gave up waiting on another worker's identical AI generation: {e}")
+
+        if content is not None:
+            self.shared_across_workers += 1
+            return _cached_result(content)
+        return await self._complete_async(messages, model, temperature, max_tokens, use_cache, hedge)
+
+    async def _complete_async(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        use_cache: bool,
+        hedge: bool = False,
+        n: int = 1,
+    ) -> Dict[str, Any]:
+        try:
+            response, model_used = await self.transport.call_async(
+                model,
+                lambda candidate: self.async_client.chat.completions.create(
+                    model=candidate,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    n=n,
+                ),
+                hedge=hedge,
+            )
+            content = response.choices[0].message.content
+            variants = [choice.message.content for choice in response.choices]
+            tokens_used = response.usage.total_tokens
+
+        except Exception as e:
+            raise self._translate_error(e)
+
+        if use_cache and model_used == model:
+            self.cache.set(model, messages, temperature, max_tokens, content)
+        return _completion_result(content, variants, tokens_used, model_used, n)
+
+    async def stream_request(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = "gpt-4",
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        cache_type: Optional[str] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a chat completion as it is generated.
+
+        A cached result is replayed as a single fragment. Opening the stream
+        is retried and falls back like any other call; once tokens have been
+        sent a failure ends the stream. Closing the generator early closes
+        the upstream stream.
+
+        Yields:
+            {"delta": str} for each content fragment, then a single
+            {"content": str, "tokens_used": int, "cached": bool} once the stream completes
+        """
+        if not self.async_client:
+            raise ValueError("OpenAI API key not configured. Please set OPENAI_API_KEY in your .env file.")
+
+        use_cache = self.cache.applies_to(cache_type)
+        if use_cache:
+            cached = self.cache.get(model, messages, temperature, max_tokens)
+            if cached is not None:
+                yield {"delta": cached}
+                yield _cached_result(cached)
+                return
+
+        parts: List[str] = []
+        tokens_used = 0
+        try:
+            stream, model_used = await self.transport.call_async(
+                model,
+                lambda candidate: self.async_client.chat.completions.create(
+                    model=candidate,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    stream=True,
+                    stream_options={"include_usage": True},
+                ),
+            )
+            try:
+                async for chunk in stream:
+                    if chunk.usage is not None:
+                        tokens_used = chunk.usage.total_tokens
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        delta = chunk.choices[0].delta.content
+                        parts.append(delta)
+                        yield {"delta": delta}
+            finally:
+                # Closed early (the client went away), this stops OpenAI generating the rest
+                await stream.close()
+
+        except Exception as e:
+            raise self._translate_error(e)
+
+        content = "".join(parts)
+        if use_cache and model_used == model:
+            self.cache.set(model, messages, temperature, max_tokens, content)
+        yield {"content": content, "tokens_used": tokens_used, "cached": False, "model": model_used}
+
+    def coalescing_stats(self) -> dict:
+        return {
+            "enabled": settings.AI_COALESCE_ENABLED,
+            "across_workers": settings.AI_COALESCE_ACROSS_WORKERS,
+            **self.flights.stats(),
+            "shared_across_workers": self.shared_across_workers,
+        }
+
+    @staticmethod
+    def _translate_error(e: Exception) -> Exception:
+        """Log an OpenAI failure and convert it into a user-facing exception."""
+        if isinstance(e, AIServiceUnavailable):
+            # Already logged and user-facing
+            return e
+
+        if isinstance(e, RateLimitError):
             logger.error(f"OpenAI rate limit exceeded: {e}")
-            raise Exception("AI service is currently at capacity. Please try again in a few moments.")
+            return Exception("AI service is currently at capacity. Please try again in a few moments.")
 
-        except APIConnectionError as e:
+        if isinstance(e, APIConnectionError):
             logger.error(f"OpenAI API connection error: {e}")
-            raise Exception("Unable to connect to AI service. Please check your internet connection and try again.")
+            return Exception("Unable to connect to AI service. Please check your internet connection and try again.")
 
-        except APIError as e:
+        if isinstance(e, APIStatusError) and not is_transient(e):
             logger.error(f"OpenAI API error: {e}")
-            raise Exception(f"AI service error: {str(e)}")
+            return AIRequestRejected(f"AI service error: {str(e)}")
 
-        except OpenAIError as e:
+        if isinstance(e, APIError):
+            logger.error(f"OpenAI API error: {e}")
+            return Exception(f"AI service error: {str(e)}")
+
+        if isinstance(e, OpenAIError):
             logger.error(f"OpenAI error: {e}")
-            raise Exception(f"An error occurred with the AI service: {str(e)}")
+            return Exception(f"An error occurred with the AI service: {str(e)}")
 
-        except Exception as e:
-            logger.error(f"Unexpected error in OpenAI request: {e}")
-            raise Exception("An unexpected error occurred. Please try again.")
+        logger.error(f"Unexpected error in OpenAI request: {e}")
+        return Exception("An unexpected error occurred. Please try again.")
 
-    def generate_fitness_caption(
-        self,
-        context: str,
-        tone: str = "motivational",
-        model: str = "gpt-4"
-    ) -> Dict[str, Any]:
+    def build_request(self, request_type: str, prompt: str) -> GenerationRequest:
         """
-        Generate a fitness-themed social media caption.
+        Build the chat request used by /ai/generate for a request type.
 
         Args:
-            context: Context or topic for the caption
-            tone: Tone of the caption (motivational, educational, casual)
-            model: OpenAI model to use
+            request_type: AI Studio request type (caption, hashtag, workout_plan, ...)
+            prompt: User's prompt
 
         Returns:
-            Dictionary with generated content and token usage
+            GenerationRequest with result type, messages and token budget
+        """
+        if request_type == "caption":
+            return GenerationRequest("fitness_caption", self._caption_messages(prompt, "motivational"), 200)
+        if request_type == "hashtag":
+            return GenerationRequest("hashtags", self._hashtag_messages(prompt, "fitness", 15), 150)
+        if request_type == "workout_plan":
+            return GenerationRequest(
+                "workout_plan", self._workout_plan_messages(prompt, "intermediate", "30 minutes"), 800
+            )
+        if request_type == "generate_risks":
+            return GenerationRequest("project_risks", self._project_risks_messages(prompt), 1000)
+        if request_type == "generate_tasks":
+            return GenerationRequest("task_breakdown", self._task_breakdown_messages(prompt, "2 weeks"), 1000)
+        return GenerationRequest(request_type, self._general_messages(prompt), 800)
+
+    def generate(self, request_type: str, prompt: str, model: str = "gpt-4", variants: int = 1) -> Dict[str, Any]:
         """
+        Generate content for ``request_type`` with the request /ai/generate would build.
+
+        ``variants`` > 1 (VARIANT_REQUEST_TYPES only) returns that many
+        alternatives from one call as 'variants'; 'content' is the first.
+        """
+        request = self.build_request(request_type, prompt)
+        result = self._make_request(
+            request.messages, model=model, max_tokens=request.max_tokens, cache_type=request_type, n=variants
+        )
+        return _generation_output(request.result_type, result)
+
+    async def generate_async(
+        self, request_type: str, prompt: str, model: str = "gpt-4", variants: int = 1
+    ) -> Dict[str, Any]:
+        """Async equivalent of the generate_* method matching ``request_type``."""
+        request = self.build_request(request_type, prompt)
+        result = await self._make_request_async(
+            request.messages, model=model, max_tokens=request.max_tokens, cache_type=request_type, n=variants
+        )
+        return _generation_output(request.result_type, result)
+
+    @staticmethod
+    def _caption_messages(context: str, tone: str) -> List[Dict[str, str]]:
         system_prompt = (
             "You are a professional fitness content creator. "
             "Generate engaging, authentic, and inspiring social media captions "
@@ -113,38 +668,39 @@ class OpenAIService:
             f"The caption should be inspiring, relatable, and encourage action."
         )
 
-        messages = [
+        return [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt},
         ]
 
-        result = self._make_request(messages, model=model, max_tokens=200)
-
-        return {
-            "type": "fitness_caption",
-            "content": result["content"],
-            "tokens_used": result["tokens_used"],
-        }
-
-    def generate_hashtags(
+    def generate_fitness_caption(
         self,
-        caption: str,
-        niche: str = "fitness",
-        count: int = 15,
-        model: str = "gpt-4"
+        context: str,
+        tone: str = "motivational",
+        model: str = "gpt-4",
+        variants: int = 1,
     ) -> Dict[str, Any]:
         """
-        Generate relevant hashtags for social media posts.
+        Generate a fitness-themed social media caption.
 
         Args:
-            caption: The caption or content to generate hashtags for
-            niche: The niche or topic area
-            count: Number of hashtags to generate
+            context: Context or topic for the caption
+            tone: Tone of the caption (motivational, educational, casual)
             model: OpenAI model to use
+            variants: Alternative captions to generate in one call
 
         Returns:
-            Dictionary with generated hashtags and token usage
+            Dictionary with generated content and token usage, plus the
+            alternatives as 'variants' when more than one was asked for
         """
+        messages = self._caption_messages(context, tone)
+
+        result = self._make_request(messages, model=model, max_tokens=200, cache_type="caption", n=variants)
+
+        return _generation_output("fitness_caption", result)
+
+    @staticmethod
+    def _hashtag_messages(caption: str, niche: str, count: int) -> List[Dict[str, str]]:
         system_prompt = (
             "You are a social media growth expert. "
             "Generate highly relevant, trending hashtags that will maximize reach and engagement. "
@@ -157,38 +713,41 @@ class OpenAIService:
             f"Return only the hashtags separated by spaces, starting with #."
         )
 
-        messages = [
+        return [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt},
         ]
 
-        result = self._make_request(messages, model=model, max_tokens=150)
-
-        return {
-            "type": "hashtags",
-            "content": result["content"],
-            "tokens_used": result["tokens_used"],
-        }
-
-    def generate_workout_plan(
+    def generate_hashtags(
         self,
-        goal: str,
-        level: str = "intermediate",
-        duration: str = "30 minutes",
-        model: str = "gpt-4"
+        caption: str,
+        niche: str = "fitness",
+        count: int = 15,
+        model: str = "gpt-4",
+        variants: int = 1,
     ) -> Dict[str, Any]:
         """
-        Generate a detailed workout plan.
+        Generate relevant hashtags for social media posts.
 
         Args:
-            goal: Fitness goal (e.g., "build muscle", "lose weight")
-            level: Fitness level (beginner, intermediate, advanced)
-            duration: Workout duration
+            caption: The caption or content to generate hashtags for
+            niche: The niche or topic area
+            count: Number of hashtags to generate
             model: OpenAI model to use
+            variants: Alternative hashtag sets to generate in one call
 
         Returns:
-            Dictionary with generated workout plan and token usage
+            Dictionary with generated hashtags and token usage, plus the
+            alternatives as 'variants' when more than one was asked for
         """
+        messages = self._hashtag_messages(caption, niche, count)
+
+        result = self._make_request(messages, model=model, max_tokens=150, cache_type="hashtag", n=variants)
+
+        return _generation_output("hashtags", result)
+
+    @staticmethod
+    def _workout_plan_messages(goal: str, level: str, duration: str) -> List[Dict[str, str]]:
         system_prompt = (
             "You are a certified personal trainer with expertise in creating "
             "safe, effective workout programs. Provide structured workout plans "
@@ -204,34 +763,43 @@ class OpenAIService:
             f"- Safety tips"
         )
 
-        messages = [
+        return [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt},
         ]
 
-        result = self._make_request(messages, model=model, max_tokens=800)
-
-        return {
-            "type": "workout_plan",
-            "content": result["content"],
-            "tokens_used": result["tokens_used"],
-        }
-
-    def generate_project_risks(
+    def generate_workout_plan(
         self,
-        project_description: str,
+        goal: str,
+        level: str = "intermediate",
+        duration: str = "30 minutes",
         model: str = "gpt-4"
     ) -> Dict[str, Any]:
         """
-        Generate potential project risks with mitigation strategies.
+        Generate a detailed workout plan.
 
         Args:
-            project_description: Description of the project
+            goal: Fitness goal (e.g., "build muscle", "lose weight")
+            level: Fitness level (beginner, intermediate, advanced)
+            duration: Workout duration
             model: OpenAI model to use
 
         Returns:
-            Dictionary with list of risks and token usage
+            Dictionary with generated workout plan and token usage
         """
+        messages = self._workout_plan_messages(goal, level, duration)
+
+        result = self._make_request(messages, model=model, max_tokens=800, cache_type="workout_plan")
+
+        return {
+            "type": "workout_plan",
+            "content": result["content"],
+            "tokens_used": result["tokens_used"],
+            "cached": result["cached"],
+        }
+
+    @staticmethod
+    def _project_risks_messages(project_description: str) -> List[Dict[str, str]]:
         system_prompt = (
             "You are a project management expert. Analyze projects and identify "
             "potential risks with their probability, impact, and mitigation strategies. "
@@ -249,36 +817,39 @@ class OpenAIService:
             f"Format as JSON array."
         )
 
-        messages = [
+        return [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt},
         ]
 
-        result = self._make_request(messages, model=model, max_tokens=1000)
-
-        return {
-            "type": "project_risks",
-            "content": result["content"],
-            "tokens_used": result["tokens_used"],
-        }
-
-    def generate_task_breakdown(
+    def generate_project_risks(
         self,
-        project_goal: str,
-        timeframe: str = "2 weeks",
+        project_description: str,
         model: str = "gpt-4"
     ) -> Dict[str, Any]:
         """
-        Generate a task breakdown for a project.
+        Generate potential project risks with mitigation strategies.
 
         Args:
-            project_goal: The project goal or description
-            timeframe: Project timeframe
+            project_description: Description of the project
             model: OpenAI model to use
 
         Returns:
-            Dictionary with task list and token usage
+            Dictionary with list of risks and token usage
         """
+        messages = self._project_risks_messages(project_description)
+
+        result = self._make_request(messages, model=model, max_tokens=1000, cache_type="generate_risks")
+
+        return {
+            "type": "project_risks",
+            "content": result["content"],
+            "tokens_used": result["tokens_used"],
+            "cached": result["cached"],
+        }
+
+    @staticmethod
+    def _task_breakdown_messages(project_goal: str, timeframe: str) -> List[Dict[str, str]]:
         system_prompt = (
             "You are a project management expert. Break down projects into "
             "actionable tasks with priorities and realistic timelines. "
@@ -297,19 +868,51 @@ class OpenAIService:
             f"Format as JSON array."
         )
 
-        messages = [
+        return [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt},
         ]
 
-        result = self._make_request(messages, model=model, max_tokens=1000)
+    def generate_task_breakdown(
+        self,
+        project_goal: str,
+        timeframe: str = "2 weeks",
+        model: str = "gpt-4"
+    ) -> Dict[str, Any]:
+        """
+        Generate a task breakdown for a project.
+
+        Args:
+            project_goal: The project goal or description
+            timeframe: Project timeframe
+            model: OpenAI model to use
+
+        Returns:
+            Dictionary with task list and token usage
+        """
+        messages = self._task_breakdown_messages(project_goal, timeframe)
+
+        result = self._make_request(messages, model=model, max_tokens=1000, cache_type="generate_tasks")
 
         return {
             "type": "task_breakdown",
             "content": result["content"],
             "tokens_used": result["tokens_used"],
+            "cached": result["cached"],
         }
 
+    @staticmethod
+    def _general_messages(prompt: str) -> List[Dict[str, str]]:
+        system_prompt = (
+            "You are a helpful AI assistant specializing in fitness, wellness, "
+            "and project management. Provide accurate, actionable, and inspiring content."
+        )
+
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt},
+        ]
+
     def generate_general_content(
         self,
         request_type: str,
@@ -327,22 +930,15 @@ class OpenAIService:
         Returns:
             Dictionary with generated content and token usage
         """
-        system_prompt = (
-            "You are a helpful AI assistant specializing in fitness, wellness, "
-            "and project management. Provide accurate, actionable, and inspiring content."
-        )
-
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": prompt},
-        ]
+        messages = self._general_messages(prompt)
 
-        result = self._make_request(messages, model=model, max_tokens=800)
+        result = self._make_request(messages, model=model, max_tokens=800, cache_type=request_type)
 
         return {
             "type": request_type,
             "content": result["content"],
             "tokens_used": result["tokens_used"],
+            "cached": result["cached"],
         }
 
 
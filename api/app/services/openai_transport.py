@@ -0,0 +1,313 @@
+"""
+Resilient calls to the OpenAI API.
+
+Every chat completion goes through OpenAITransport, which retries
+transient failures (timeouts, connection errors, 408/409/429 and 5xx)
+with jittered exponential backoff, honouring Retry-After; skips models
+whose circuit breaker is open; and falls back along AI_FALLBACK_MODELS
+when the requested model keeps failing. Errors the request itself caused
+(400, 401, ...) are raised at once. When every model is exhausted the
+call fails with AIServiceUnavailable, which the routes turn into a 503.
+
+Short generations can be hedged: if the first call has not answered
+within the model's p95 latency a second identical call is sent, the first
+answer is used and the other call is cancelled.
+"""
+
+from threading import Lock
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import random
+import time
+
+from openai import APIConnectionError, APIStatusError, RateLimitError
+
+from app.core.config import settings
+from app.core.metrics import LatencyStats
+
+logger = logging.getLogger(__name__)
+
+# Timed calls a model needs before its own p95 replaces AI_HEDGE_AFTER_SECONDS
+_HEDGE_MIN_SAMPLES = 20
+
+
+class AIServiceUnavailable(Exception):
+    """Raised when no model in the fallback chain could answer; retry after ``retry_after`` seconds."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def is_transient(e: Exception) -> bool:
+    """Whether the call may succeed if repeated."""
+    if isinstance(e, APIConnectionError):  # Includes timeouts
+        return True
+    return isinstance(e, APIStatusError) and (e.status_code in (408, 409, 429) or e.status_code >= 500)
+
+
+def retry_after_seconds(e: Exception) -> Optional[float]:
+    """The wait an error response asked for, if any."""
+    response = getattr(e, "response", None)
+    if response is None:
+        return None
+    try:
+        if "retry-after-ms" in response.headers:
+            return float(response.headers["retry-after-ms"]) / 1000
+        if "retry-after" in response.headers:
+            return float(response.headers["retry-after"])
+    except ValueError:
+        # The HTTP-date form is not worth parsing for waits this short
+        pass
+    return None
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one model.
+
+    After ``failure_threshold`` transient failures in a row the breaker
+    opens and the model is skipped for ``reset_timeout`` seconds. Then one
+    trial call is let through: success closes the breaker, failure opens it
+    for another ``reset_timeout``.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_started_at: Optional[float] = None
+        self.times_opened = 0
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            now = time.monotonic()
+            if now - self._opened_at < self.reset_timeout:
+                return False
+            # A trial that never reported back (its caller was cancelled) expires too
+            if self._trial_started_at is not None and now - self._trial_started_at < self.reset_timeout:
+                return False
+            self._trial_started_at = now
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_started_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    self.times_opened += 1
+                    logger.warning(f"Circuit breaker opened after {self._failures} consecutive failures")
+                self._opened_at = time.monotonic()
+                self._trial_started_at = None
+
+    def retry_after(self) -> float:
+        """Seconds until the breaker lets a trial call through (0 if closed)."""
+        with self._lock:
+            if self._opened_at is None:
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        return "open" if self.retry_after() > 0 else "half_open"
+
+
+class OpenAITransport:
+    def __init__(self):
+        self._lock = Lock()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._latency: Dict[str, LatencyStats] = {}
+        self.retries = 0
+        self.fallbacks = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.unavailable = 0
+
+    def _breaker(self, model: str) -> CircuitBreaker:
+        with self._lock:
+            if model not in self._breakers:
+                self._breakers[model] = CircuitBreaker(
+                    settings.AI_BREAKER_FAILURE_THRESHOLD, settings.AI_BREAKER_RESET_SECONDS
+                )
+                self._latency[model] = LatencyStats()
+            return self._breakers[model]
+
+    @staticmethod
+    def models_for(model: str) -> List[str]:
+        """The requested model followed by its fallbacks."""
+        chain = settings.ai_fallback_models
+        if model not in chain:
+            return [model]
+        return chain[chain.index(model):]
+
+    @staticmethod
+    def _backoff(attempt: int, error: Exception) -> Optional[float]:
+        """Seconds to wait before repeating failed ``attempt`` (1-based); None moves on to the next model."""
+        if attempt >= settings.AI_RETRY_MAX_ATTEMPTS:
+            return None
+        requested = retry_after_seconds(error)
+        if requested is not None:
+            return requested if requested <= settings.AI_RETRY_MAX_BACKOFF_SECONDS else None
+        cap = min(settings.AI_RETRY_MAX_BACKOFF_SECONDS, settings.AI_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+        # Equal jitter: at least half the backoff, so retries still spread out
+        return cap / 2 + random.uniform(0, cap / 2)
+
+    def _succeeded(self, model: str, requested: str, seconds: float) -> None:
+        self._breaker(model).record_success()
+        self._latency[model].record(seconds)
+        if model != requested:
+            with self._lock:
+                self.fallbacks += 1
+            logger.warning(f"OpenAI request for {requested} served by fallback model {model}")
+
+    def _failed(self, model: str, error: Exception) -> None:
+        if is_transient(error):
+            self._breaker(model).record_failure()
+        else:
+            # The model answered; the request itself was rejected
+            self._breaker(model).record_success()
+
+    def _unavailable(self, model: str, error: Optional[Exception]) -> AIServiceUnavailable:
+        with self._lock:
+            self.unavailable += 1
+        waits = [self._breaker(m).retry_after() for m in self.models_for(model)]
+        retry_after = (error and retry_after_seconds(error)) or min(waits) or 1
+        if error is None:
+            logger.error(f"OpenAI request for {model} refused: every model's circuit breaker is open")
+        else:
+            logger.error(f"OpenAI request for {model} failed on every model: {error}")
+        if isinstance(error, RateLimitError):
+            message = "AI service is currently at capacity. Please try again in a few moments."
+        else:
+            message = "AI service is temporarily unavailable. Please try again in a few moments."
+        return AIServiceUnavailable(message, max(1, round(retry_after)))
+
+    def call(self, model: str, send: Callable[[str], Any]) -> Tuple[Any, str]:
+        """
+        Call ``send(model)`` with retries and fallbacks.
+
+        Returns the response and the model that produced it.
+        """
+        error = None
+        for candidate in self.models_for(model):
+            breaker = self._breaker(candidate)
+            for attempt in range(1, settings.AI_RETRY_MAX_ATTEMPTS + 1):
+                if not breaker.allow():
+                    break
+                start = time.perf_counter()
+                try:
+                    response = send(candidate)
+                except Exception as e:
+                    self._failed(candidate, e)
+                    if not is_transient(e):
+                        raise
+                    error = e
+                    delay = self._backoff(attempt, e)
+                    if delay is None:
+                        break
+                    with self._lock:
+                        self.retries += 1
+                    time.sleep(delay)
+                    continue
+                self._succeeded(candidate, model, time.perf_counter() - start)
+                return response, candidate
+        raise self._unavailable(model, error)
+
+    async def call_async(
+        self, model: str, send: Callable[[str], Awaitable[Any]], hedge: bool = False
+    ) -> Tuple[Any, str]:
+        """Async counterpart of call; ``hedge`` sends a second call if the first is slow."""
+        error = None
+        for candidate in self.models_for(model):
+            breaker = self._breaker(candidate)
+            for attempt in range(1, settings.AI_RETRY_MAX_ATTEMPTS + 1):
+                if not breaker.allow():
+                    break
+                start = time.perf_counter()
+                try:
+                    if hedge:
+                        response = await self._hedged(send, candidate)
+                    else:
+                        response = await send(candidate)
+                except Exception as e:
+                    self._failed(candidate, e)
+                    if not is_transient(e):
+                        raise
+                    error = e
+                    delay = self._backoff(attempt, e)
+                    if delay is None:
+                        break
+                    with self._lock:
+                        self.retries += 1
+                    await asyncio.sleep(delay)
+                    continue
+                self._succeeded(candidate, model, time.perf_counter() - start)
+                return response, candidate
+        raise self._unavailable(model, error)
+
+    def _hedge_delay(self, model: str) -> float:
+        latency = self._latency[model]
+        if latency.count < _HEDGE_MIN_SAMPLES:
+            return settings.AI_HEDGE_AFTER_SECONDS
+        return latency.percentile(0.95) or settings.AI_HEDGE_AFTER_SECONDS
+
+    async def _hedged(self, send: Callable[[str], Awaitable[Any]], model: str) -> Any:
+        tasks = [asyncio.ensure_future(send(model))]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self._hedge_delay(model))
+            if not done:
+                with self._lock:
+                    self.hedges += 1
+                tasks.append(asyncio.ensure_future(send(model)))
+
+            error = None
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not tasks[0]:
+                            with self._lock:
+                                self.hedge_wins += 1
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def stats(self) -> dict:
+        with self._lock:
+            models = list(self._breakers)
+        return {
+            "retries": self.retries,
+            "fallbacks": self.fallbacks,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "unavailable": self.unavailable,
+            "models": {
+                model: {
+                    "breaker": self._breakers[model].state,
+                    "breaker_opened": self._breakers[model].times_opened,
+                    "latency": self._latency[model].stats(),
+                }
+                for model in models
+            },
+        }
+
+
+openai_transport = OpenAITransport()
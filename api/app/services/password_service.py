@@ -0,0 +1,109 @@
+"""
+Password hashing off the API processes.
+
+bcrypt burns a few hundred milliseconds of CPU per call, so hashes and
+verifications run in a small process pool. The number running or queued
+is capped: past PASSWORD_HASH_MAX_PENDING callers get PasswordHasherBusy
+straight away (a 503), instead of a login spike queueing work that would
+finish long after its clients gave up.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from threading import Lock
+from typing import Optional, Tuple
+import asyncio
+import logging
+import multiprocessing
+import time
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.metrics import LatencyStats
+from app.core.passwords import get_password_hash, verify_and_update_password, verify_password
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when PASSWORD_HASH_MAX_PENDING hashes are already running or queued."""
+
+
+class PasswordHasher:
+    def __init__(self):
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = Lock()
+        self.pending = 0
+        self.rejected = 0
+        self.latency = LatencyStats()
+
+    def _get_pool(self) -> Optional[ProcessPoolExecutor]:
+        """The hashing pool, created on first use (None hashes in the threadpool)."""
+        if settings.PASSWORD_HASH_PROCESSES <= 0:
+            return None
+        with self._lock:
+            if self._pool is None:
+                # spawn: worker processes must not inherit the parent's DB connections or threads
+                self._pool = ProcessPoolExecutor(
+                    max_workers=settings.PASSWORD_HASH_PROCESSES,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._pool
+
+    def _discard_pool(self, pool: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self.pending >= settings.PASSWORD_HASH_MAX_PENDING:
+                self.rejected += 1
+                raise PasswordHasherBusy()
+            self.pending += 1
+
+        start = time.perf_counter()
+        try:
+            pool = self._get_pool()
+            if pool is None:
+                return await run_in_threadpool(fn, *args)
+            try:
+                return await asyncio.wrap_future(pool.submit(fn, *args))
+            except BrokenProcessPool:
+                logger.warning("Password hashing pool broke; hashing in-thread")
+                self._discard_pool(pool)
+                return await run_in_threadpool(fn, *args)
+        finally:
+            with self._lock:
+                self.pending -= 1
+            self.latency.record(time.perf_counter() - start)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, password, hashed_password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Verify a password; the second item is a replacement hash if the stored one is outdated."""
+        return await self._run(verify_and_update_password, password, hashed_password)
+
+    def stats(self) -> dict:
+        return {
+            "processes": settings.PASSWORD_HASH_PROCESSES,
+            "pending": self.pending,
+            "max_pending": settings.PASSWORD_HASH_MAX_PENDING,
+            "rejected": self.rejected,
+            "latency": self.latency.stats(),
+        }
+
+
+password_hasher = PasswordHasher()
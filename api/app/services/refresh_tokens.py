@@ -0,0 +1,200 @@
+"""
+Refresh-token rotation.
+
+Every refresh consumes the presented token and issues the next one in its
+family. The consume is one UPDATE on the token's primary key that also
+returns the owner's current claims, so a refresh needs no separate users
+lookup. Presenting an already consumed token means it was copied: the
+whole family is revoked, logging out both the thief and the victim. The
+exception is a token rotated within REFRESH_TOKEN_REUSE_GRACE_SECONDS
+whose successor is still active, which is what a client refreshing twice
+at once looks like: that is refused with RefreshTokenJustRotated and the
+client retries with the token it now holds.
+
+Tokens issued before rotation carry no jti. They are recorded under the
+hash of the whole token when first exchanged, so each works only once.
+
+Tokens of revoked families are remembered in a per-process LRU, so
+replaying them is rejected without touching the database.
+"""
+
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+import hashlib
+import logging
+import uuid
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.security import create_refresh_token
+from app.database import SessionLocal
+from app.models.refresh_token import RefreshToken
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+revoked_jtis = TTLCache(
+    settings.REFRESH_TOKEN_REVOKED_CACHE_MAX_ENTRIES, settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400
+)
+_reuse_detected = 0
+
+
+class RefreshTokenJustRotated(Exception):
+    """The token was rotated moments ago; the client should retry with its successor."""
+
+
+def _hash_jti(jti: str) -> str:
+    return hashlib.sha256(jti.encode()).hexdigest()
+
+
+def issue_refresh_token(db: AsyncSession, user_id: int, family_id: Optional[str] = None) -> str:
+    """Add a refresh token row (a new family unless ``family_id`` is given); the caller commits."""
+    jti = uuid.uuid4().hex
+    family_id = family_id or uuid.uuid4().hex
+    expires_delta = timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    db.add(RefreshToken(
+        jti_hash=_hash_jti(jti),
+        family_id=family_id,
+        user_id=user_id,
+        expires_at=datetime.utcnow() + expires_delta,
+    ))
+    return create_refresh_token(
+        data={"sub": str(user_id), "jti": jti, "fam": family_id}, expires_delta=expires_delta
+    )
+
+
+async def rotate_refresh_token(db: AsyncSession, payload: dict) -> Optional[Tuple[Row, str]]:
+    """
+    Consume a decoded refresh token and issue its successor.
+
+    Returns the owner's (id, role, is_active, auth_epoch) and the new
+    refresh token, or None if the token is not valid; the caller commits.
+    Raises RefreshTokenJustRotated for a replay inside the grace window.
+    """
+    jti_hash = _hash_jti(payload["jti"])
+    if revoked_jtis.get(jti_hash) is not None:
+        return None
+
+    # A Core UPDATE ... FROM users: ORM-enabled updates cannot return
+    # columns of another table
+    tokens, users = RefreshToken.__table__, User.__table__
+    now = datetime.utcnow()
+    consumed = (await db.execute(
+        update(tokens)
+        .where(
+            tokens.c.jti_hash == jti_hash,
+            tokens.c.revoked_at.is_(None),
+            tokens.c.expires_at > now,
+            tokens.c.user_id == users.c.id,
+        )
+        .values(revoked_at=now)
+        .returning(tokens.c.family_id, users.c.id, users.c.role, users.c.is_active, users.c.auth_epoch)
+    )).first()
+
+    if consumed is None:
+        await _presented_again(db, jti_hash, payload.get("sub"))
+        return None
+
+    if not consumed.is_active:
+        return None
+    return consumed, issue_refresh_token(db, consumed.id, consumed.family_id)
+
+
+async def consume_legacy_refresh_token(db: AsyncSession, token: str, payload: dict) -> Optional[str]:
+    """
+    Record a decoded refresh token issued before rotation (no jti) as consumed.
+
+    Returns a new family id for its successor, or None if the token was
+    already exchanged; the caller checks the user and commits.
+    """
+    # The whole token stands in for the jti it lacks
+    jti_hash = _hash_jti(token)
+    if revoked_jtis.get(jti_hash) is not None:
+        return None
+
+    family_id = uuid.uuid4().hex
+    now = datetime.utcnow()
+    recorded = await db.scalar(
+        insert(RefreshToken)
+        .values(
+            jti_hash=jti_hash,
+            family_id=family_id,
+            user_id=int(payload["sub"]),
+            expires_at=datetime.utcfromtimestamp(payload["exp"]),
+            revoked_at=now,
+        )
+        .on_conflict_do_nothing(index_elements=[RefreshToken.jti_hash])
+        .returning(RefreshToken.family_id)
+    )
+    if recorded is None:
+        await _presented_again(db, jti_hash, payload.get("sub"))
+        return None
+    return family_id
+
+
+async def _presented_again(db: AsyncSession, jti_hash: str, sub: Optional[str]) -> None:
+    """
+    Deal with a token that could not be consumed because it already was.
+
+    Raises RefreshTokenJustRotated inside the grace window, otherwise
+    revokes the token's family. Does nothing for unknown or expired tokens.
+    """
+    global _reuse_detected
+    reused = (await db.execute(
+        select(RefreshToken.family_id, RefreshToken.revoked_at)
+        .where(RefreshToken.jti_hash == jti_hash, RefreshToken.revoked_at.is_not(None))
+    )).first()
+    if reused is None:
+        return
+
+    grace = timedelta(seconds=settings.REFRESH_TOKEN_REUSE_GRACE_SECONDS)
+    if reused.revoked_at > datetime.utcnow() - grace:
+        # Rotated, not revoked: logout and reuse leave no active token behind
+        successor = await db.scalar(
+            select(RefreshToken.jti_hash)
+            .where(RefreshToken.family_id == reused.family_id, RefreshToken.revoked_at.is_(None))
+            .limit(1)
+        )
+        if successor is not None:
+            raise RefreshTokenJustRotated()
+
+    _reuse_detected += 1
+    logger.warning(f"Refresh token reuse for user {sub}; revoking its family")
+    await revoke_refresh_family(db, reused.family_id)
+    revoked_jtis.set(jti_hash, True)
+
+
+async def revoke_refresh_family(db: AsyncSession, family_id: str) -> None:
+    """Revoke every active token in a family (logout, or reuse detected); the caller commits."""
+    revoked = await db.scalars(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+        .returning(RefreshToken.jti_hash)
+        .execution_options(synchronize_session=False)
+    )
+    for jti_hash in revoked:
+        revoked_jtis.set(jti_hash, True)
+
+
+def purge_expired_refresh_tokens() -> int:
+    db = SessionLocal()
+    try:
+        deleted = db.execute(
+            delete(RefreshToken).where(RefreshToken.expires_at < datetime.utcnow())
+        ).rowcount
+        db.commit()
+        if deleted:
+            logger.info(f"Purged {deleted} expired refresh tokens")
+        return deleted
+    finally:
+        db.close()
+
+
+def refresh_token_stats() -> dict:
+    return {"revoked_cache": revoked_jtis.stats(), "reuse_detected": _reuse_detected}
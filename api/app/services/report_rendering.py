@@ -0,0 +1,90 @@
+"""
+PDF rendering for analytics reports.
+
+Only depends on reportlab, so worker processes that run ``render_pdf``
+start quickly; the data it renders is gathered by app.services.reports.
+"""
+
+from io import BytesIO
+from typing import List, NamedTuple, Tuple
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+
+class PdfReportData(NamedTuple):
+    """Everything shown in the PDF, as plain picklable values."""
+    title: str
+    generated_at: str
+    summary_rows: List[Tuple[str, str]]
+    risk_rows: List[Tuple[str, str]]
+    project_count: int
+    project_rows: List[Tuple[str, str, str]]  # First few projects: name, status, progress
+
+
+# Styles are built once per process and shared by every render
+STYLES = getSampleStyleSheet()
+NORMAL_STYLE = STYLES['Normal']
+TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=STYLES['Heading1'],
+    fontSize=24,
+    textColor=colors.HexColor('#1e40af'),
+    spaceAfter=30,
+)
+HEADING_STYLE = ParagraphStyle(
+    'CustomHeading',
+    parent=STYLES['Heading2'],
+    fontSize=16,
+    textColor=colors.HexColor('#3b82f6'),
+    spaceBefore=20,
+    spaceAfter=12,
+)
+TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3b82f6')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+])
+TWO_COLUMN_WIDTHS = [3*inch, 2*inch]
+PROJECT_COLUMN_WIDTHS = [3*inch, 1.5*inch, 1*inch]
+
+
+def _table(header: List[str], rows, col_widths) -> Table:
+    table = Table([header, *rows], colWidths=col_widths)
+    table.setStyle(TABLE_STYLE)
+    return table
+
+
+def render_pdf(data: PdfReportData) -> bytes:
+    """Lay out and build the analytics report PDF."""
+    elements = [
+        Paragraph(f"Analytics Report - {data.title}", TITLE_STYLE),
+        Paragraph(f"Generated on {data.generated_at} UTC", NORMAL_STYLE),
+        Spacer(1, 0.3*inch),
+
+        Paragraph("Summary Metrics", HEADING_STYLE),
+        _table(['Metric', 'Value'], data.summary_rows, TWO_COLUMN_WIDTHS),
+        Spacer(1, 0.3*inch),
+
+        Paragraph("Risk Distribution", HEADING_STYLE),
+        _table(['Severity', 'Count'], data.risk_rows, TWO_COLUMN_WIDTHS),
+        Spacer(1, 0.3*inch),
+
+        Paragraph(f"Projects ({data.project_count} total)", HEADING_STYLE),
+    ]
+    if data.project_rows:
+        elements.append(_table(['Name', 'Status', 'Progress'], data.project_rows, PROJECT_COLUMN_WIDTHS))
+    else:
+        elements.append(Paragraph("No projects found.", NORMAL_STYLE))
+
+    buffer = BytesIO()
+    SimpleDocTemplate(buffer, pagesize=letter).build(elements)
+    return buffer.getvalue()
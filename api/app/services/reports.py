@@ -0,0 +1,319 @@
+"""PDF and Excel analytics report builders."""
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from io import BytesIO
+from tempfile import SpooledTemporaryFile
+from threading import Lock
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Tuple
+import asyncio
+import logging
+import multiprocessing
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, Side
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.user import User
+from app.models.task import Task
+from app.models.risk import Risk
+from app.models.project import Project
+from app.services.analytics_cache import analytics_cache
+from app.services.report_rendering import PdfReportData, render_pdf
+
+logger = logging.getLogger(__name__)
+
+PDF_CONTENT_TYPE = "application/pdf"
+EXCEL_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+EXCEL_YIELD_PER = 1000  # Rows fetched per server-side cursor round-trip
+EXCEL_SPOOL_MAX_BYTES = 8 * 1024 * 1024  # Larger workbooks spill to disk
+FILE_CHUNK_SIZE = 64 * 1024
+
+# Header look of the previous pandas export
+HEADER_FONT = Font(bold=True)
+_THIN = Side(style='thin')
+HEADER_BORDER = Border(left=_THIN, right=_THIN, top=_THIN, bottom=_THIN)
+HEADER_ALIGNMENT = Alignment(horizontal='center', vertical='top')
+
+
+def report_filename(extension: str) -> str:
+    return f"analytics_report_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.{extension}"
+
+
+PDF_PROJECT_ROWS = 10  # Projects listed in the PDF; the heading shows the full count
+
+_pdf_cache = TTLCache(settings.REPORT_CACHE_MAX_ENTRIES, settings.REPORT_CACHE_TTL_SECONDS)
+_render_pool: Optional[ProcessPoolExecutor] = None
+_render_pool_lock = Lock()
+
+
+def _get_render_pool() -> Optional[ProcessPoolExecutor]:
+    """The shared PDF render pool, created on first use (None renders in-thread)."""
+    global _render_pool
+    if settings.REPORT_RENDER_PROCESSES <= 0:
+        return None
+    with _render_pool_lock:
+        if _render_pool is None:
+            # spawn: worker processes must not inherit the parent's DB connections or threads
+            _render_pool = ProcessPoolExecutor(
+                max_workers=settings.REPORT_RENDER_PROCESSES,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _render_pool
+
+
+def _discard_render_pool(pool: ProcessPoolExecutor) -> None:
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is pool:
+            _render_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_render_pool() -> None:
+    global _render_pool
+    with _render_pool_lock:
+        pool, _render_pool = _render_pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _pdf_cache_key(db: Session, user: User) -> tuple:
+    # The analytics version moves on every change to the user's tasks, risks,
+    # projects and AI requests, so a new version means a new report
+    return user.id, analytics_cache.version(db, user.id), user.full_name or user.username
+
+
+def pdf_report_data(db: Session, user: User) -> PdfReportData:
+    """Gather the values shown in the user's PDF report."""
+    analytics = analytics_cache.get(db, user.id)
+    totals = analytics.totals
+    distribution = analytics.risk_distribution
+
+    project_count = db.execute(
+        select(func.count(Project.id)).where(Project.owner_id == user.id)
+    ).scalar_one()
+    projects = db.execute(
+        select(Project.name, Project.status, Project.progress)
+        .where(Project.owner_id == user.id)
+        .order_by(Project.created_at, Project.id)
+        .limit(PDF_PROJECT_ROWS)
+    ).all()
+
+    return PdfReportData(
+        title=user.full_name or user.username,
+        generated_at=datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'),
+        summary_rows=[
+            ('Total Tasks', str(totals.total_tasks)),
+            ('Completed Tasks', str(totals.completed_tasks)),
+            ('Completion Rate', f"{totals.completion_rate:.1f}%"),
+            ('Velocity', f"{totals.velocity:.1f} tasks/week"),
+            ('Average Lead Time', f"{totals.average_lead_time:.1f} days"),
+            ('Total Risks', str(totals.total_risks)),
+            ('Open Risks', str(totals.open_risks)),
+            ('Risk Score', f"{totals.risk_score:.1f}/100"),
+        ],
+        risk_rows=[
+            ('Low', str(distribution.low)),
+            ('Medium', str(distribution.medium)),
+            ('High', str(distribution.high)),
+            ('Critical', str(distribution.critical)),
+        ],
+        project_count=project_count,
+        project_rows=[(p.name, p.status.value.upper(), f"{p.progress:.0f}%") for p in projects],
+    )
+
+
+def build_pdf_report(db: Session, user: User) -> bytes:
+    """
+    Render the user's analytics PDF report.
+
+    Served from the report cache while the user's analytics version is
+    unchanged; otherwise rendered in the process pool, waiting for it.
+    """
+    key = _pdf_cache_key(db, user)
+    cached = _pdf_cache.get(key)
+    if cached is not None:
+        return cached
+
+    data = pdf_report_data(db, user)
+    pool = _get_render_pool()
+    if pool is None:
+        pdf = render_pdf(data)
+    else:
+        try:
+            pdf = pool.submit(render_pdf, data).result()
+        except BrokenProcessPool:
+            logger.warning("PDF render pool broke; rendering in-thread")
+            _discard_render_pool(pool)
+            pdf = render_pdf(data)
+
+    _pdf_cache.set(key, pdf)
+    return pdf
+
+
+async def build_pdf_report_async(db: AsyncSession, user: User) -> bytes:
+    """
+    build_pdf_report for async routes.
+
+    The render is awaited from the process pool, so neither the event loop
+    nor a threadpool thread is held while reportlab lays out the document.
+    """
+    key = await db.run_sync(_pdf_cache_key, user)
+    cached = _pdf_cache.get(key)
+    if cached is not None:
+        return cached
+
+    data = await db.run_sync(pdf_report_data, user)
+    pool = _get_render_pool()
+    if pool is None:
+        pdf = await run_in_threadpool(render_pdf, data)
+    else:
+        try:
+            pdf = await asyncio.wrap_future(pool.submit(render_pdf, data))
+        except BrokenProcessPool:
+            logger.warning("PDF render pool broke; rendering in-thread")
+            _discard_render_pool(pool)
+            pdf = await run_in_threadpool(render_pdf, data)
+
+    _pdf_cache.set(key, pdf)
+    return pdf
+
+
+def report_cache_stats() -> dict:
+    return _pdf_cache.stats()
+
+
+def _excel_header(sheet, titles: List[str]) -> list:
+    cells = []
+    for title in titles:
+        cell = WriteOnlyCell(sheet, value=title)
+        cell.font = HEADER_FONT
+        cell.border = HEADER_BORDER
+        cell.alignment = HEADER_ALIGNMENT
+        cells.append(cell)
+    return cells
+
+
+def _excel_rows(db: Session, user: User) -> Iterator[Tuple[str, List[str], Iterable[tuple]]]:
+    """Yield (sheet name, header, rows) for each data sheet, rows streamed from the database."""
+    def stream(*columns, owner):
+        # Plain column tuples through a server-side cursor: no ORM objects,
+        # and at most EXCEL_YIELD_PER rows in memory at a time
+        model = owner.class_
+        stmt = (
+            select(*columns)
+            .where(owner == user.id)
+            .order_by(model.created_at, model.id)
+            .execution_options(yield_per=EXCEL_YIELD_PER)
+        )
+        return db.execute(stmt)
+
+    def day(value: Optional[datetime]) -> Optional[str]:
+        return value.strftime('%Y-%m-%d') if value else None
+
+    tasks = stream(
+        Task.id, Task.title, Task.status, Task.priority, Task.created_at, Task.completed,
+        owner=Task.owner_id,
+    )
+    yield 'Tasks', ['ID', 'Title', 'Status', 'Priority', 'Created', 'Completed'], (
+        (t.id, t.title, t.status.value, t.priority.value, day(t.created_at), t.completed)
+        for t in tasks
+    )
+
+    risks = stream(
+        Risk.id, Risk.title, Risk.severity, Risk.probability, Risk.impact, Risk.status, Risk.created_at,
+        owner=Risk.owner_id,
+    )
+    yield 'Risks', ['ID', 'Title', 'Severity', 'Probability', 'Impact', 'Status', 'Created'], (
+        (r.id, r.title, r.severity.value, r.probability.value, r.impact.value, r.status.value, day(r.created_at))
+        for r in risks
+    )
+
+    projects = stream(
+        Project.id, Project.name, Project.status, Project.progress, Project.created_at,
+        owner=Project.owner_id,
+    )
+    yield 'Projects', ['ID', 'Name', 'Status', 'Progress', 'Created'], (
+        (p.id, p.name, p.status.value, f"{p.progress:.0f}%", day(p.created_at))
+        for p in projects
+    )
+
+
+def write_excel_report(db: Session, user: User, fileobj: BinaryIO) -> None:
+    """
+    Write the user's analytics Excel workbook to ``fileobj``.
+
+    Uses openpyxl's write-only mode, which spools each sheet to disk as rows
+    are appended, so memory stays flat however many rows the user has.
+    Sheets without rows are left out.
+    """
+    analytics = analytics_cache.get(db, user.id)
+    totals = analytics.totals
+
+    workbook = Workbook(write_only=True)
+
+    summary = workbook.create_sheet('Summary')
+    summary.append(_excel_header(summary, ['Metric', 'Value']))
+    for row in [
+        ('Total Tasks', totals.total_tasks),
+        ('Completed Tasks', totals.completed_tasks),
+        ('Completion Rate', f"{totals.completion_rate:.1f}%"),
+        ('Velocity', f"{totals.velocity:.1f} tasks/week"),
+        ('Average Lead Time', f"{totals.average_lead_time:.1f} days"),
+        ('Total Risks', totals.total_risks),
+        ('Open Risks', totals.open_risks),
+        ('Risk Score', f"{totals.risk_score:.1f}/100"),
+    ]:
+        summary.append(row)
+
+    for title, header, rows in _excel_rows(db, user):
+        sheet = None
+        for row in rows:
+            if sheet is None:
+                sheet = workbook.create_sheet(title)
+                sheet.append(_excel_header(sheet, header))
+            sheet.append(row)
+
+    if analytics.velocity_data:
+        velocity = workbook.create_sheet('Velocity')
+        velocity.append(_excel_header(velocity, ['Week', 'Tasks Completed', 'Average']))
+        for v in analytics.velocity_data:
+            velocity.append((v.week, v.tasks_completed, v.average))
+
+    workbook.save(fileobj)
+
+
+def spool_excel_report(db: Session, user: User) -> SpooledTemporaryFile:
+    """Write the Excel report to a temp file (in memory while small), rewound for reading."""
+    spool = SpooledTemporaryFile(max_size=EXCEL_SPOOL_MAX_BYTES)
+    try:
+        write_excel_report(db, user, spool)
+    except Exception:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
+
+
+def iter_file(fileobj: BinaryIO, chunk_size: int = FILE_CHUNK_SIZE) -> Iterator[bytes]:
+    """Read ``fileobj`` in chunks for a StreamingResponse, closing it at the end."""
+    try:
+        while chunk := fileobj.read(chunk_size):
+            yield chunk
+    finally:
+        fileobj.close()
+
+
+def build_excel_report(db: Session, user: User) -> bytes:
+    """Render the user's analytics Excel workbook."""
+    buffer = BytesIO()
+    write_excel_report(db, user, buffer)
+    return buffer.getvalue()
@@ -0,0 +1,164 @@
+"""Task status history: transition log and daily snapshot rollup."""
+
+from datetime import date, datetime, time, timedelta
+from typing import List, NamedTuple, Optional
+
+from sqlalchemy import exists, func, literal, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.task import TaskStatus
+from app.models.task_event import TaskEvent, TaskDailySnapshot
+
+
+class DailyTaskCounts(NamedTuple):
+    day: date
+    total_tasks: int
+    completed_tasks: int
+    completions: int
+
+
+def _status_value(status) -> Optional[str]:
+    if status is None:
+        return None
+    return TaskStatus(status).value
+
+
+def record_task_transition(
+    db: Session,
+    task_id: int,
+    owner_id: int,
+    from_status,
+    to_status,
+    when: Optional[datetime] = None,
+) -> None:
+    """
+    Append a status transition and fold it into the owner's snapshot for today.
+
+    Runs inside the caller's transaction, so the log, the rollup and the task
+    change are committed atomically. Pass ``from_status=None`` for a newly
+    created task and ``to_status=None`` for a deleted one.
+
+    A day's ``completions`` counts the tasks moved into done that day and
+    still done (and not deleted) at its end, each once however often it
+    was reopened. Transitions must be recorded in time order.
+    """
+    from_value = _status_value(from_status)
+    to_value = _status_value(to_status)
+    if from_value == to_value:
+        return
+
+    when = when or datetime.utcnow()
+    done = TaskStatus.DONE.value
+
+    completions_delta = int(to_value == done)
+    if from_value == done and _completed_on_day(db, task_id, owner_id, when):
+        # Reopened or deleted the day it was completed: take that completion back
+        completions_delta -= 1
+
+    db.add(
+        TaskEvent(
+            task_id=task_id,
+            owner_id=owner_id,
+            from_status=from_value,
+            to_status=to_value,
+            created_at=when,
+        )
+    )
+
+    total_delta = (to_value is not None) - (from_value is not None)
+    completed_delta = (to_value == done) - (from_value == done)
+
+    db.execute(
+        _snapshot_upsert(owner_id, when.date(), total_delta, completed_delta, completions_delta)
+    )
+
+
+def _completed_on_day(db: Session, task_id: int, owner_id: int, when: datetime) -> bool:
+    """Whether the task moved into done earlier on ``when``'s day."""
+    # Sessions do not autoflush, and the earlier transition may be pending in this one
+    db.flush()
+    return db.scalar(select(exists().where(
+        TaskEvent.owner_id == owner_id,
+        TaskEvent.task_id == task_id,
+        TaskEvent.to_status == TaskStatus.DONE.value,
+        TaskEvent.created_at >= datetime.combine(when.date(), time.min),
+        TaskEvent.created_at <= when,
+    )))
+
+
+def _snapshot_upsert(owner_id: int, day: date, total_delta: int, completed_delta: int, completions_delta: int):
+    """INSERT today's row carrying forward the latest earlier row, or bump it in place."""
+    snapshot = TaskDailySnapshot
+
+    def carried(column):
+        previous = (
+            select(column)
+            .where(snapshot.owner_id == owner_id, snapshot.day < day)
+            .order_by(snapshot.day.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+        return func.coalesce(previous, 0)
+
+    stmt = insert(snapshot).from_select(
+        ["owner_id", "day", "total_tasks", "completed_tasks", "completions"],
+        select(
+            literal(owner_id),
+            literal(day),
+            carried(snapshot.total_tasks) + total_delta,
+            carried(snapshot.completed_tasks) + completed_delta,
+            literal(completions_delta),
+        ),
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[snapshot.owner_id, snapshot.day],
+        set_={
+            "total_tasks": snapshot.total_tasks + total_delta,
+            "completed_tasks": snapshot.completed_tasks + completed_delta,
+            "completions": snapshot.completions + completions_delta,
+        },
+    )
+
+
+def load_daily_counts(db: Session, owner_id: int, days: int, today: Optional[date] = None) -> List[DailyTaskCounts]:
+    """
+    Return one entry per day for the last ``days`` days, oldest first.
+
+    Only days with activity have a snapshot row, so this reads at most
+    ``days + 1`` rows (the window plus the last row before it) and forward
+    fills the gaps. Days before any history count as zero.
+    """
+    today = today or datetime.utcnow().date()
+    start = today - timedelta(days=days - 1)
+    snapshot = TaskDailySnapshot
+
+    carry_in = (
+        select(func.max(snapshot.day))
+        .where(snapshot.owner_id == owner_id, snapshot.day <= start)
+        .scalar_subquery()
+    )
+    rows = db.execute(
+        select(snapshot.day, snapshot.total_tasks, snapshot.completed_tasks, snapshot.completions)
+        .where(
+            snapshot.owner_id == owner_id,
+            snapshot.day >= func.coalesce(carry_in, start),
+            snapshot.day <= today,
+        )
+        .order_by(snapshot.day)
+    ).all()
+
+    series = []
+    total = completed = 0
+    index = 0
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        completions = 0
+        while index < len(rows) and rows[index].day <= day:
+            total = rows[index].total_tasks
+            completed = rows[index].completed_tasks
+            if rows[index].day == day:
+                completions = rows[index].completions
+            index += 1
+        series.append(DailyTaskCounts(day, total, completed, completions))
+    return series
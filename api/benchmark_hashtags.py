@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark: local hashtag suggestions against GPT generation.
+
+Builds a HashtagIndex from synthetic posts (topic clusters of hashtags
+with random engagement), then prints latency percentiles for:
+
+    local  hashtag_index.suggest for a caption, in this process
+    gpt    openai_service.generate_hashtags, the single GPT call the
+           suggestions replace (each caption is unique, so nothing is
+           served from the generation cache)
+
+plus how long building the index took. The gpt mode needs OPENAI_API_KEY
+(and OPENAI_BASE_URL to benchmark against fake_openai_server.py); like the
+API it also needs DATABASE_URL and SECRET_KEY set, though neither mode
+touches the database.
+
+Usage:
+    python benchmark_hashtags.py [--users 500] [--posts 50000] [--queries 2000] [--gpt-calls 20] [--modes local,gpt]
+"""
+
+import argparse
+import random
+import sys
+import time
+import uuid
+
+from benchmark_load import percentile
+from app.services.hashtag_recommender import HashtagIndex
+from app.services.openai_service import openai_service
+
+TOPICS = 40
+TAGS_PER_TOPIC = 25
+GENERIC_TAGS = ["#fitness", "#gym", "#motivation", "#workout", "#health", "#fitfam"]
+
+
+def topic_tags(topic: int) -> list:
+    return [f"#topic{topic}tag{i}" for i in range(TAGS_PER_TOPIC)]
+
+
+def synthetic_posts(users: int, posts: int, rng: random.Random):
+    """(post id, user id, hashtags, engagement rate) rows; each user sticks to a few topics."""
+    user_topics = {user: rng.sample(range(TOPICS), 3) for user in range(1, users + 1)}
+    for post_id in range(1, posts + 1):
+        user = rng.randint(1, users)
+        tags = rng.sample(topic_tags(rng.choice(user_topics[user])), rng.randint(3, 8))
+        tags += rng.sample(GENERIC_TAGS, rng.randint(0, 2))
+        yield post_id, user, " ".join(tags), rng.lognormvariate(2, 0.8)
+
+
+def caption(rng: random.Random) -> str:
+    tag = rng.choice(topic_tags(rng.randrange(TOPICS)))
+    return f"Another session done {tag} {uuid.uuid4().hex[:6]}"
+
+
+def report(mode: str, latencies: list) -> None:
+    print(
+        f"{mode:<6} n={len(latencies):<6} p50 {percentile(latencies, 0.50):9.3f} ms"
+        f"  p95 {percentile(latencies, 0.95):9.3f} ms  p99 {percentile(latencies, 0.99):9.3f} ms"
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--posts", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--gpt-calls", type=int, default=20)
+    parser.add_argument("--count", type=int, default=15, help="hashtags per suggestion")
+    parser.add_argument("--modes", default="local,gpt")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    for mode in args.modes.split(","):
+        if mode == "local":
+            index = HashtagIndex()
+            start = time.perf_counter()
+            index.load(synthetic_posts(args.users, args.posts, rng))
+            stats = index.stats()
+            print(
+                f"index  {stats['posts']} posts, {stats['hashtags']} hashtags, "
+                f"built in {time.perf_counter() - start:.2f}s"
+            )
+            latencies = []
+            for _ in range(args.queries):
+                user, text = rng.randint(1, args.users), caption(rng)
+                start = time.perf_counter()
+                index.suggest(user, text, args.count)
+                latencies.append(time.perf_counter() - start)
+            report(mode, latencies)
+        elif mode == "gpt":
+            if not openai_service.client:
+                print("gpt    skipped: OPENAI_API_KEY is not set", file=sys.stderr)
+                continue
+            latencies = []
+            for _ in range(args.gpt_calls):
+                text = caption(rng)
+                start = time.perf_counter()
+                openai_service.generate_hashtags(text, count=args.count)
+                latencies.append(time.perf_counter() - start)
+            report(mode, latencies)
+        else:
+            print(f"unknown mode: {mode}", file=sys.stderr)
+            return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
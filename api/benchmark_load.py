@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+HTTP load benchmark for authenticated read routes.
+
+Registers (or logs in) a benchmark user against a running API, seeds a
+few tasks, then keeps ``--concurrency`` requests in flight for
+``--duration`` seconds, cycling through the routes below. Prints requests
+per second and latency percentiles per route and overall.
+
+Run the server the way production does (e.g. ``uvicorn main:app
+--workers 1``) and point the benchmark at it; compare two builds by
+running it against each in turn. Start it with RATE_LIMIT_ENABLED=false,
+or the per-user limit rejects most of the run with 429.
+
+Usage:
+    python benchmark_load.py [--url http://127.0.0.1:8000] [--concurrency 64] [--duration 20]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+from collections import defaultdict
+
+import httpx
+
+ROUTES = [
+    "/users/me",
+    "/tasks/?limit=20",
+    "/tasks/?cursor=&limit=20",
+    "/analytics/",
+]
+
+
+def percentile(samples, p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000 if ordered else 0.0
+
+
+async def login(client: httpx.AsyncClient, prefix: str) -> dict:
+    name = f"bench-{uuid.uuid4().hex[:8]}"
+    password = "Benchmark123!"
+    response = await client.post(
+        f"{prefix}/auth/register", json={"email": f"{name}@example.com", "username": name, "password": password}
+    )
+    response.raise_for_status()
+    response = await client.post(f"{prefix}/auth/login", data={"username": name, "password": password})
+    response.raise_for_status()
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    for n in range(50):
+        await client.post(f"{prefix}/tasks/", headers=headers, json={"title": f"Task {n}"})
+    return headers
+
+
+async def run(url: str, prefix: str, concurrency: int, duration: float, timeout: float) -> None:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=timeout) as client:
+        headers = await login(client, prefix)
+        latencies = defaultdict(list)
+        errors = 0
+        deadline = time.perf_counter() + duration
+
+        async def worker(offset: int) -> None:
+            nonlocal errors
+            n = offset
+            while time.perf_counter() < deadline:
+                route = ROUTES[n % len(ROUTES)]
+                n += 1
+                start = time.perf_counter()
+                try:
+                    response = await client.get(prefix + route, headers=headers)
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                if response.status_code != 200:
+                    errors += 1
+                    continue
+                latencies[route].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    everything = [sample for samples in latencies.values() for sample in samples]
+    print(f"{url}  concurrency={concurrency}  duration={elapsed:.1f}s  errors={errors}")
+    print(f"{'route':<28}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for route in ROUTES:
+        samples = latencies[route]
+        print(f"{route:<28}{len(samples) / elapsed:>10.1f}{percentile(samples, .5):>10.1f}{percentile(samples, .99):>10.1f}")
+    print(f"{'all':<28}{len(everything) / elapsed:>10.1f}{percentile(everything, .5):>10.1f}{percentile(everything, .99):>10.1f}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--prefix", default="/api/v1")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout; timeouts count as errors")
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.prefix, args.concurrency, args.duration, args.timeout))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Login throughput benchmark.
+
+Registers a few users against a running API, then keeps ``--concurrency``
+logins in flight for ``--duration`` seconds. Prints logins per second,
+latency percentiles, and how many logins were shed with 503 while the
+password hashing pool was saturated.
+
+Compare builds or settings (PASSWORD_HASH_PROCESSES,
+PASSWORD_HASH_MAX_PENDING, BCRYPT_ROUNDS) by restarting the server with
+each and running this against it. A --probe route is requested alongside
+the logins to show whether the rest of the API stays responsive. Start
+the server with RATE_LIMIT_ENABLED=false so the benchmark measures
+hashing rather than the rate limiter.
+
+Usage:
+    python benchmark_login.py [--url http://127.0.0.1:8000] [--concurrency 32] [--duration 20]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+
+import httpx
+
+from benchmark_load import percentile
+
+PASSWORD = "Benchmark123!"
+
+
+async def register(client: httpx.AsyncClient, prefix: str, count: int) -> list:
+    names = []
+    for _ in range(count):
+        name = f"bench-{uuid.uuid4().hex[:8]}"
+        response = await client.post(
+            f"{prefix}/auth/register", json={"email": f"{name}@example.com", "username": name, "password": PASSWORD}
+        )
+        response.raise_for_status()
+        names.append(name)
+    return names
+
+
+async def run(url: str, prefix: str, concurrency: int, duration: float, users: int, probe: str, timeout: float) -> None:
+    limits = httpx.Limits(max_connections=concurrency + 1, max_keepalive_connections=concurrency + 1)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=timeout) as client:
+        names = await register(client, prefix, users)
+        latencies, probe_latencies = [], []
+        shed = errors = 0
+        deadline = time.perf_counter() + duration
+
+        async def worker(offset: int) -> None:
+            nonlocal shed, errors
+            n = offset
+            while time.perf_counter() < deadline:
+                name = names[n % len(names)]
+                n += 1
+                start = time.perf_counter()
+                try:
+                    response = await client.post(f"{prefix}/auth/login", data={"username": name, "password": PASSWORD})
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                if response.status_code == 503:
+                    shed += 1
+                    await asyncio.sleep(float(response.headers.get("Retry-After", 1)))
+                    continue
+                if response.status_code != 200:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - start)
+
+        async def prober() -> None:
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    await client.get(probe)
+                except httpx.HTTPError:
+                    pass
+                probe_latencies.append(time.perf_counter() - start)
+                await asyncio.sleep(0.1)
+
+        start = time.perf_counter()
+        await asyncio.gather(prober(), *(worker(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    print(f"{url}  concurrency={concurrency}  duration={elapsed:.1f}s  shed(503)={shed}  errors={errors}")
+    print(f"{'':<10}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    print(f"{'logins':<10}{len(latencies) / elapsed:>10.1f}{percentile(latencies, .5):>10.1f}{percentile(latencies, .99):>10.1f}")
+    print(f"{'probe':<10}{len(probe_latencies) / elapsed:>10.1f}{percentile(probe_latencies, .5):>10.1f}{percentile(probe_latencies, .99):>10.1f}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--prefix", default="/api/v1")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--users", type=int, default=8, help="distinct accounts to log in as")
+    parser.add_argument("--probe", default="/health", help="path (without prefix) timed alongside the logins")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout; timeouts count as errors")
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.prefix, args.concurrency, args.duration, args.users, args.probe, args.timeout))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
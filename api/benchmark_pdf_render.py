@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for analytics PDF rendering.
+
+Renders a synthetic report repeatedly and prints renders per second for:
+
+    legacy  styles and table styles rebuilt for every render, as the PDF
+            route used to do
+    inline  render_pdf with the module-level styles, in this process
+    pool    render_pdf in a spawn ProcessPoolExecutor with --workers processes
+
+No database is needed.
+
+Usage:
+    python benchmark_pdf_render.py [--renders 200] [--workers 4] [--modes legacy,inline,pool]
+"""
+
+import argparse
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from app.services.report_rendering import PdfReportData, render_pdf
+
+
+def sample_data() -> PdfReportData:
+    return PdfReportData(
+        title="Benchmark User",
+        generated_at="2025-01-01 00:00:00",
+        summary_rows=[
+            ('Total Tasks', '50000'),
+            ('Completed Tasks', '21000'),
+            ('Completion Rate', '42.0%'),
+            ('Velocity', '12.5 tasks/week'),
+            ('Average Lead Time', '3.2 days'),
+            ('Total Risks', '8000'),
+            ('Open Risks', '2300'),
+            ('Risk Score', '37.5/100'),
+        ],
+        risk_rows=[('Low', '3000'), ('Medium', '2500'), ('High', '1700'), ('Critical', '800')],
+        project_count=2000,
+        project_rows=[(f"Project {i}", "ACTIVE", f"{i * 9}%") for i in range(10)],
+    )
+
+
+def legacy_render(data: PdfReportData) -> bytes:
+    """The pre-refactor layout code: every style object built per call."""
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    elements = []
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle', parent=styles['Heading1'], fontSize=24,
+        textColor=colors.HexColor('#1e40af'), spaceAfter=30,
+    )
+    heading_style = ParagraphStyle(
+        'CustomHeading', parent=styles['Heading2'], fontSize=16,
+        textColor=colors.HexColor('#3b82f6'), spaceBefore=20, spaceAfter=12,
+    )
+
+    def table(header, rows, widths):
+        t = Table([header, *rows], colWidths=widths)
+        t.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3b82f6')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ]))
+        return t
+
+    elements.append(Paragraph(f"Analytics Report - {data.title}", title_style))
+    elements.append(Paragraph(f"Generated on {data.generated_at} UTC", styles['Normal']))
+    elements.append(Spacer(1, 0.3*inch))
+    elements.append(Paragraph("Summary Metrics", heading_style))
+    elements.append(table(['Metric', 'Value'], data.summary_rows, [3*inch, 2*inch]))
+    elements.append(Spacer(1, 0.3*inch))
+    elements.append(Paragraph("Risk Distribution", heading_style))
+    elements.append(table(['Severity', 'Count'], data.risk_rows, [3*inch, 2*inch]))
+    elements.append(Spacer(1, 0.3*inch))
+    elements.append(Paragraph(f"Projects ({data.project_count} total)", heading_style))
+    elements.append(table(['Name', 'Status', 'Progress'], data.project_rows, [3*inch, 1.5*inch, 1*inch]))
+    doc.build(elements)
+    return buffer.getvalue()
+
+
+def run_serial(render, data: PdfReportData, renders: int) -> float:
+    render(data)  # Warm-up: font and module caches
+    start = time.perf_counter()
+    for _ in range(renders):
+        render(data)
+    return renders / (time.perf_counter() - start)
+
+
+def run_pool(data: PdfReportData, renders: int, workers: int) -> float:
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        list(pool.map(render_pdf, [data] * workers))  # Warm-up: start every worker
+        start = time.perf_counter()
+        list(pool.map(render_pdf, [data] * renders))
+        return renders / (time.perf_counter() - start)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--renders", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--modes", default="legacy,inline,pool")
+    args = parser.parse_args()
+
+    data = sample_data()
+    for mode in args.modes.split(","):
+        if mode == "legacy":
+            rate = run_serial(legacy_render, data, args.renders)
+        elif mode == "inline":
+            rate = run_serial(render_pdf, data, args.renders)
+        elif mode == "pool":
+            rate = run_pool(data, args.renders, args.workers)
+            mode = f"pool x{args.workers}"
+        else:
+            print(f"unknown mode: {mode}", file=sys.stderr)
+            return 2
+        print(f"{mode:<10} {rate:8.1f} renders/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+EXPLAIN-based check that owner-scoped router queries use indexes.
+
+Seeds a few hundred users with tasks, risks, projects, posts and AI
+requests inside a transaction, calls the read routes through the real
+FastAPI app, captures every SQL statement they issue and runs EXPLAIN on
+each one. Any sequential scan on an application table is reported and the
+script exits non-zero. All seeded rows are rolled back at the end.
+
+Run it against a migrated development database, never production.
+
+Usage:
+    python check_query_plans.py [--users 200]
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from datetime import datetime, timedelta
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.pagination import encode_cursor
+from app.core.principals import Principal
+from app.core.security import get_current_principal, get_current_user
+from app.database import async_engine, get_async_db, get_db
+from app.models import AIRequest, Post, Project, Risk, Task, TaskDailySnapshot, User
+from main import app
+
+APP_TABLES = {
+    "users", "tasks", "risks", "projects", "posts", "ai_requests",
+    "task_events", "task_daily_snapshots", "analytics_cache_entries",
+}
+
+ROWS_PER_USER = {"tasks": 60, "risks": 20, "projects": 6, "posts": 30, "ai_requests": 40}
+
+
+def seed(db, user_count: int) -> User:
+    """Insert ``user_count`` users with data and return the first one."""
+    now = datetime.utcnow()
+    users = db.execute(
+        insert(User).returning(User.id),
+        [
+            {"email": f"plan-check-{i}@example.com", "username": f"plan-check-{i}", "role": "user"}
+            for i in range(user_count)
+        ],
+    ).scalars().all()
+
+    def rows(count, build):
+        return [build(user_id, n) for user_id in users for n in range(count)]
+
+    def stamp(n):
+        return now - timedelta(hours=n)
+
+    db.execute(insert(Task), rows(ROWS_PER_USER["tasks"], lambda u, n: {
+        "title": f"Task {n}", "owner_id": u, "status": ["todo", "in_progress", "done"][n % 3],
+        "priority": "medium", "completed": n % 3 == 2, "created_at": stamp(n), "updated_at": stamp(n),
+    }))
+    db.execute(insert(Risk), rows(ROWS_PER_USER["risks"], lambda u, n: {
+        "title": f"Risk {n}", "owner_id": u, "status": ["open", "mitigated", "closed"][n % 3],
+        "created_at": stamp(n), "updated_at": stamp(n),
+    }))
+    db.execute(insert(Project), rows(ROWS_PER_USER["projects"], lambda u, n: {
+        "name": f"Project {n}", "owner_id": u, "progress": 0.0, "created_at": stamp(n), "updated_at": stamp(n),
+    }))
+    db.execute(insert(Post), rows(ROWS_PER_USER["posts"], lambda u, n: {
+        "title": f"Post {n}", "content": "content", "user_id": u, "created_at": stamp(n), "updated_at": stamp(n),
+    }))
+    db.execute(insert(AIRequest), rows(ROWS_PER_USER["ai_requests"], lambda u, n: {
+        "user_id": u, "request_type": "caption", "prompt": "prompt", "tokens_used": 0, "created_at": stamp(n),
+    }))
+    db.execute(insert(TaskDailySnapshot), rows(42, lambda u, n: {
+        "owner_id": u, "day": (now - timedelta(days=n)).date(),
+        "total_tasks": 60, "completed_tasks": 20, "completions": 1,
+    }))
+
+    for table in APP_TABLES:
+        db.execute(text(f"ANALYZE {table}"))
+
+    return db.get(User, users[0])
+
+
+def seq_scans(plan: dict):
+    """Yield relation names of every Seq Scan node in an EXPLAIN JSON plan."""
+    if plan.get("Node Type") == "Seq Scan":
+        yield plan.get("Relation Name")
+    for child in plan.get("Plans", []):
+        yield from seq_scans(child)
+
+
+async def check(user_count: int) -> int:
+    # Routes run on the async engine, so seed through it as well: the seeded
+    # rows are only visible inside this connection's open transaction
+    connection = await async_engine.connect()
+    transaction = await connection.begin()
+    db = AsyncSession(bind=connection, join_transaction_mode="create_savepoint")
+    user = await db.run_sync(seed, user_count)
+    ids = {
+        name: await db.scalar(select(model.id).where(owner == user.id).limit(1))
+        for name, model, owner in [
+            ("tasks", Task, Task.owner_id), ("risks", Risk, Risk.owner_id),
+            ("projects", Project, Project.owner_id), ("posts", Post, Post.user_id),
+        ]
+    }
+
+    async def override_async_db():
+        yield db
+
+    def override_db():
+        yield db.sync_session
+
+    app.dependency_overrides[get_async_db] = override_async_db
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_current_user] = lambda: user
+    app.dependency_overrides[get_current_principal] = lambda: Principal(user.id, user.role, user.is_active)
+
+    captured = []
+
+    @event.listens_for(connection.sync_connection, "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    prefix = settings.API_V1_STR
+    routes = [
+        f"{prefix}/tasks/", f"{prefix}/tasks/{ids['tasks']}",
+        f"{prefix}/risks/", f"{prefix}/risks/{ids['risks']}",
+        f"{prefix}/projects/", f"{prefix}/projects/{ids['projects']}",
+        f"{prefix}/posts/", f"{prefix}/posts/{ids['posts']}",
+        f"{prefix}/ai/history",
+        f"{prefix}/analytics/",
+    ]
+    # Keyset pagination: first page and a page seeked past a cursor
+    cursor = encode_cursor(datetime.utcnow() - timedelta(hours=10), 0)
+    for collection in ["tasks/", "risks/", "projects/", "posts/", "ai/history"]:
+        routes.append(f"{prefix}/{collection}?cursor=&limit=5")
+        routes.append(f"{prefix}/{collection}?cursor={cursor}&limit=5")
+
+    failures = 0
+    client = AsyncClient(transport=ASGITransport(app=app), base_url="http://check")
+    try:
+        for route in routes:
+            captured.clear()
+            response = await client.get(route)
+            if response.status_code != 200:
+                print(f"FAIL {route}: HTTP {response.status_code}")
+                failures += 1
+                continue
+
+            route_failures = 0
+            for statement, parameters in list(captured):
+                explain = await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+                plan = explain.scalar()
+                plan = plan if isinstance(plan, list) else json.loads(plan)
+                scanned = sorted({r for r in seq_scans(plan[0]["Plan"]) if r in APP_TABLES})
+                if scanned:
+                    route_failures += 1
+                    print(f"FAIL {route}: sequential scan on {', '.join(scanned)}")
+                    print("     " + " ".join(statement.split())[:200])
+            failures += route_failures
+            if not route_failures:
+                print(f"ok   {route} ({len(captured)} queries)")
+    finally:
+        event.remove(connection.sync_connection, "before_cursor_execute", capture)
+        app.dependency_overrides.clear()
+        await client.aclose()
+        await db.close()
+        await transaction.rollback()
+        await connection.close()
+        await async_engine.dispose()
+
+    print(f"\n{failures} failing quer{'y' if failures == 1 else 'ies'}")
+    return 1 if failures else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=200, help="number of users to seed")
+    args = parser.parse_args()
+    return asyncio.run(check(args.users))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -72,7 +72,11 @@ def login_demo_user():
         return None
 
 def create_tasks(headers):
-    """Create demo tasks"""
+    """
+    Create demo tasks through the API, which records their status history
+    and the daily snapshots analytics reads. Done tasks are created in
+    progress and then completed, so each records a completion.
+    """
     print("\n" + "="*60)
     print("Creating Tasks...")
     print("="*60)
@@ -139,8 +143,15 @@ def create_tasks(headers):
     created_count = 0
     for task_data in tasks:
         try:
-            response = requests.post(f"{BASE_URL}/tasks", json=task_data, headers=headers)
-            if response.status_code == 200:
+            completed = task_data["status"] == "done"
+            if completed:
+                task_data = {**task_data, "status": "in_progress"}
+            response = requests.post(f"{BASE_URL}/tasks/", json=task_data, headers=headers)
+            if response.status_code == 201:
+                if completed:
+                    requests.put(
+                        f"{BASE_URL}/tasks/{response.json()['id']}", json={"status": "done"}, headers=headers
+                    ).raise_for_status()
                 created_count += 1
                 print(f"✅ Created task: {task_data['title']}")
             else:
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the OpenAI chat completions API.
+
+Answers POST /v1/chat/completions with a canned reply built from the
+user prompt, either as a single JSON response or as a server-sent event
+stream (``stream: true``). Useful for exercising the AI Studio endpoints
+without an API key or network access, and for testing how the API copes
+with an unreliable upstream: failures and slow responses can be injected
+at startup or changed at runtime through /_fake/faults.
+
+Usage:
+    uvicorn fake_openai_server:app --port 8001
+    # then run the API with
+    OPENAI_API_KEY=test OPENAI_BASE_URL=http://localhost:8001/v1 uvicorn main:app
+
+Environment:
+    FAKE_OPENAI_LATENCY   seconds to wait before responding (default 0)
+    FAKE_OPENAI_TOKEN_DELAY  seconds between streamed chunks (default 0.02)
+    FAKE_OPENAI_ERROR_RATE   fraction of requests that fail (default 0)
+    FAKE_OPENAI_ERROR_STATUS  status of those failures (default 500)
+    FAKE_OPENAI_RETRY_AFTER  Retry-After seconds sent with 429 failures (default 1)
+    FAKE_OPENAI_DOWN_MODELS  comma-separated models that always fail with 503
+    FAKE_OPENAI_SLOW_RATE    fraction of requests given extra latency (default 0)
+    FAKE_OPENAI_SLOW_LATENCY  seconds of that extra latency (default 5)
+
+Runtime control:
+    GET /_fake/faults         current fault settings (lowercase names, no prefix)
+    PUT /_fake/faults         change some of them, e.g. {"error_rate": 0.5}
+                              fail_next / slow_next (runtime only) make exactly
+                              the next N requests fail with error_status or
+                              wait slow_latency, for deterministic tests
+    GET /_fake/stats          requests received and failures injected, per model
+    POST /_fake/stats/reset   zero the counters
+"""
+
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+from collections import Counter
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+app = FastAPI(title="Fake OpenAI")
+
+LATENCY = float(os.getenv("FAKE_OPENAI_LATENCY", "0"))
+TOKEN_DELAY = float(os.getenv("FAKE_OPENAI_TOKEN_DELAY", "0.02"))
+
+faults = {
+    "error_rate": float(os.getenv("FAKE_OPENAI_ERROR_RATE", "0")),
+    "error_status": int(os.getenv("FAKE_OPENAI_ERROR_STATUS", "500")),
+    "retry_after": float(os.getenv("FAKE_OPENAI_RETRY_AFTER", "1")),
+    "down_models": [m for m in os.getenv("FAKE_OPENAI_DOWN_MODELS", "").split(",") if m],
+    "slow_rate": float(os.getenv("FAKE_OPENAI_SLOW_RATE", "0")),
+    "slow_latency": float(os.getenv("FAKE_OPENAI_SLOW_LATENCY", "5")),
+    "fail_next": 0,
+    "slow_next": 0,
+}
+requests_by_model: Counter = Counter()
+failures_by_model: Counter = Counter()
+
+
+def _reply_for(messages: list) -> str:
+    prompt = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+    first_line = prompt.strip().splitlines()[0] if prompt.strip() else ""
+    return f"Fake reply to: {first_line} 💪 #fitness #motivation"
+
+
+def _usage(messages: list, completion: str) -> dict:
+    prompt_tokens = sum(len(m["content"].split()) for m in messages)
+    completion_tokens = len(completion.split())
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+def _error(status: int, message: str, headers: dict = None) -> JSONResponse:
+    return JSONResponse(
+        status_code=status,
+        content={"error": {"message": message, "type": "fake_fault", "code": None}},
+        headers=headers,
+    )
+
+
+def _injected_fault(model: str):
+    """The failure to answer this request with, if one is due."""
+    if model in faults["down_models"]:
+        return _error(503, f"The model {model} is down (injected)")
+    if faults["fail_next"] > 0:
+        faults["fail_next"] -= 1
+    elif random.random() >= faults["error_rate"]:
+        return None
+    status = faults["error_status"]
+    headers = {"Retry-After": str(faults["retry_after"])} if status == 429 else None
+    return _error(status, f"Injected {status}", headers)
+
+
+@app.get("/_fake/faults")
+async def get_faults():
+    return faults
+
+
+@app.put("/_fake/faults")
+async def update_faults(changes: dict):
+    unknown = set(changes) - set(faults)
+    if unknown:
+        return _error(400, f"Unknown faults: {', '.join(sorted(unknown))}")
+    faults.update(changes)
+    return faults
+
+
+@app.get("/_fake/stats")
+async def get_stats():
+    return {"requests": dict(requests_by_model), "failures": dict(failures_by_model)}
+
+
+@app.post("/_fake/stats/reset")
+async def reset_stats():
+    requests_by_model.clear()
+    failures_by_model.clear()
+    return {"requests": {}, "failures": {}}
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    messages = body.get("messages", [])
+    model = body.get("model", "gpt-4")
+    n = int(body.get("n") or 1)
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+    created = int(time.time())
+    requests_by_model[model] += 1
+
+    if LATENCY:
+        await asyncio.sleep(LATENCY)
+    if faults["slow_next"] > 0:
+        faults["slow_next"] -= 1
+        await asyncio.sleep(faults["slow_latency"])
+    elif random.random() < faults["slow_rate"]:
+        await asyncio.sleep(faults["slow_latency"])
+
+    fault = _injected_fault(model)
+    if fault is not None:
+        failures_by_model[model] += 1
+        return fault
+
+    replies = [
+        _reply_for(messages) if n == 1 else f"{_reply_for(messages)} (variant {i + 1})"
+        for i in range(n)
+    ]
+
+    if not body.get("stream"):
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [
+                {
+                    "index": i,
+                    "message": {"role": "assistant", "content": reply},
+                    "finish_reason": "stop",
+                }
+                for i, reply in enumerate(replies)
+            ],
+            "usage": _usage(messages, " ".join(replies)),
+        }
+
+    async def stream():
+        def chunk(choices, usage=None):
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": choices,
+                "usage": usage,
+            }
+            return f"data: {json.dumps(payload)}\n\n"
+
+        for i, reply in enumerate(replies):
+            for word in reply.split(" "):
+                yield chunk([{"index": i, "delta": {"content": word + " "}, "finish_reason": None}])
+                await asyncio.sleep(TOKEN_DELAY)
+            yield chunk([{"index": i, "delta": {}, "finish_reason": "stop"}])
+
+        if (body.get("stream_options") or {}).get("include_usage"):
+            yield chunk([], usage=_usage(messages, " ".join(replies)))
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
@@ -1,16 +1,22 @@
 import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from starlette.middleware.sessions import SessionMiddleware
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
+from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from pathlib import Path
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
+from starlette.responses import JSONResponse
 
+from app.core.bulkheads import BulkheadFull
 from app.core.config import settings
+from app.core.principals import principal_cache
+from app.core.rate_limit import RateLimitMiddleware, limiter, shutdown_rate_limit_storage
+from app.core.revocations import claim_revocations
+from app.database import async_engine, engine
 # Import routers directly to avoid circular import issues on Windows
 from app.routers.auth import router as auth_router
 from app.routers.risks import router as risks_router
@@ -21,6 +27,13 @@ from app.routers.users import router as users_router
 from app.routers.projects import router as projects_router
 from app.routers.posts import router as posts_router
 from app.routers.oauth import router as oauth_router
+from app.routers.jobs import router as jobs_router
+from app.routers.export import router as export_router
+from app.routers.metrics import router as metrics_router
+from app.services.hashtag_recommender import hashtag_index
+from app.services.jobs import job_runner
+from app.services.password_service import PasswordHasherBusy, password_hasher
+from app.services.reports import shutdown_render_pool
 
 # Configure logging
 logging.basicConfig(
@@ -33,9 +46,6 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Initialize rate limiter
-limiter = Limiter(key_func=get_remote_address, default_limits=["100/minute"])
-
 # Custom middleware to handle X-Forwarded-Proto for proper HTTPS redirects
 class ForwardedProtoMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
@@ -46,16 +56,57 @@ class ForwardedProtoMiddleware(BaseHTTPMiddleware):
         response = await call_next(request)
         return response
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Background job workers live as long as the API process
+    job_runner.start(settings.JOB_WORKERS)
+    principal_cache.start_listener(engine)
+    claim_revocations.start()
+    hashtag_index.start()
+    yield
+    hashtag_index.stop()
+    claim_revocations.stop()
+    principal_cache.stop_listener()
+    job_runner.stop()
+    shutdown_render_pool()
+    password_hasher.shutdown()
+    shutdown_rate_limit_storage()
+    await async_engine.dispose()
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     docs_url=f"{settings.API_V1_STR}/docs",
     redoc_url=f"{settings.API_V1_STR}/redoc",
+    lifespan=lifespan,
 )
 
 # Add rate limiter to app state
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+app.add_middleware(RateLimitMiddleware)
+
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    # Fail fast while the hashing pool is saturated; clients retry shortly
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Password service is busy, please retry shortly"},
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.exception_handler(BulkheadFull)
+async def bulkhead_full_handler(request: Request, exc: BulkheadFull):
+    # The route's pool stayed full for its whole queue timeout
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server is busy, please retry shortly"},
+        headers={"Retry-After": "1"},
+    )
+
 
 # Add ForwardedProto middleware first (before CORS)
 app.add_middleware(ForwardedProtoMiddleware)
@@ -92,9 +143,13 @@ app.include_router(analytics_router, prefix=f"{settings.API_V1_STR}/analytics",
 app.include_router(users_router, prefix=f"{settings.API_V1_STR}/users", tags=["users"])
 app.include_router(projects_router, prefix=f"{settings.API_V1_STR}/projects", tags=["projects"])
 app.include_router(posts_router, prefix=f"{settings.API_V1_STR}/posts", tags=["posts"])
+app.include_router(jobs_router, prefix=f"{settings.API_V1_STR}/jobs", tags=["jobs"])
+app.include_router(export_router, prefix=f"{settings.API_V1_STR}/export", tags=["export"])
+app.include_router(metrics_router, prefix=f"{settings.API_V1_STR}/metrics", tags=["metrics"])
 
 
 @app.get("/")
+@limiter.exempt
 def root():
     """Root endpoint."""
     return {
@@ -105,6 +160,7 @@ def root():
 
 
 @app.get("/health")
+@limiter.exempt
 def health_check():
     """Health check endpoint."""
     return {"status": "healthy"}
@@ -15,6 +15,8 @@ from app.models.task import Task, TaskStatus, TaskPriority
 from app.models.risk import Risk, RiskSeverity, RiskStatus, RiskProbability, RiskImpact
 from app.models.post import Post
 from app.models.ai_request import AIRequest
+from app.models.task_event import TaskEvent, TaskDailySnapshot
+from app.services.task_history import record_task_transition
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -30,6 +32,8 @@ def clear_database(db: Session):
     db.query(AIRequest).delete()
     db.query(Post).delete()
     db.query(Risk).delete()
+    db.query(TaskDailySnapshot).delete()
+    db.query(TaskEvent).delete()
     db.query(Task).delete()
     db.query(Project).delete()
     db.query(User).delete()
@@ -285,6 +289,27 @@ def seed_tasks(db: Session, projects: list, users: list):
     print(f"✅ Created {len(tasks)} tasks")
     return tasks
 
+def seed_task_history(db: Session, tasks: list):
+    """Backdate tasks over the last four weeks and record their status history, as the tasks router would"""
+    print("\n📈 Recording task history...")
+
+    now = datetime.utcnow()
+    transitions = []
+    for i, task in enumerate(tasks):
+        created = now - timedelta(days=27 - 2 * i, hours=3)
+        task.created_at = created
+        transitions.append((created, task, None, TaskStatus.TODO))
+        if task.status != TaskStatus.TODO:
+            moved = min(created + timedelta(days=1 + i % 3), now)
+            transitions.append((moved, task, TaskStatus.TODO, task.status))
+
+    # Snapshots carry each day forward from the one before, so record in time order
+    for when, task, from_status, to_status in sorted(transitions, key=lambda t: t[0]):
+        record_task_transition(db, task.id, task.owner_id, from_status, to_status, when=when)
+
+    db.commit()
+    print(f"✅ Recorded {len(transitions)} task transitions")
+
 def seed_risks(db: Session, users: list):
     """Create risk entries"""
     print("\n⚠️  Creating risks...")
@@ -515,6 +540,7 @@ def main():
         users = seed_users(db)
         projects = seed_projects(db, users)
         tasks = seed_tasks(db, projects, users)
+        seed_task_history(db, tasks)
         risks = seed_risks(db, users)
         posts = seed_posts(db, projects, users)
         ai_requests = seed_ai_requests(db, users)
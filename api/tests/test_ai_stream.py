@@ -0,0 +1,142 @@
+import asyncio
+import json
+
+import pytest
+from openai import AsyncOpenAI
+
+from app.core.config import settings
+from app.core.principals import Principal
+from app.core.security import get_current_principal
+from app.routers import ai
+from app.services.openai_service import openai_service
+from main import app
+
+STREAM_PATH = f"{settings.API_V1_STR}/ai/generate/stream"
+
+
+@pytest.fixture
+def logged(monkeypatch, fake_openai, fake_openai_server):
+    """AIRequest rows the stream route writes, captured instead of inserted."""
+    rows = []
+
+    async def log_ai_requests(user_id, new_rows):
+        rows.extend({"user_id": user_id, **row} for row in new_rows)
+
+    monkeypatch.setattr(ai, "_log_ai_requests", log_ai_requests)
+    monkeypatch.setattr(
+        openai_service, "async_client",
+        AsyncOpenAI(api_key="test", base_url=fake_openai_server, max_retries=0, timeout=10),
+    )
+    monkeypatch.setattr(openai_service.cache, "enabled", False)
+    app.dependency_overrides[get_current_principal] = lambda: Principal(7, "user", True)
+    yield rows
+    app.dependency_overrides.clear()
+
+
+async def post_stream(body: dict, disconnect_after_tokens=None):
+    """
+    Call the app directly over ASGI and return the messages it sent.
+
+    With ``disconnect_after_tokens``, the client disconnects once it has
+    received that many ``token`` events, as a closed browser tab would.
+    """
+    sent = []
+    disconnected = asyncio.Event()
+    request_read = False
+
+    async def receive():
+        nonlocal request_read
+        if not request_read:
+            request_read = True
+            return {"type": "http.request", "body": json.dumps(body).encode(), "more_body": False}
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+        if disconnect_after_tokens is not None and len(sse_events(sent)) >= disconnect_after_tokens:
+            disconnected.set()
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": STREAM_PATH,
+        "raw_path": STREAM_PATH.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"testserver"), (b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    await asyncio.wait_for(app(scope, receive, send), timeout=20)
+    return sent
+
+
+def sse_events(sent: list) -> list:
+    """(event, data) pairs from the response body, checking each frame's layout."""
+    body = b"".join(m.get("body", b"") for m in sent if m["type"] == "http.response.body").decode()
+    frames = body.split("\n\n")
+    assert frames[-1] == "", "every event ends with a blank line"
+    events = []
+    for frame in frames[:-1]:
+        event_line, data_line = frame.split("\n")
+        assert event_line.startswith("event: ") and data_line.startswith("data: ")
+        events.append((event_line[len("event: "):], json.loads(data_line[len("data: "):])))
+    return events
+
+
+async def test_stream_sends_tokens_then_done(logged):
+    sent = await post_stream({"prompt": "Leg day done", "request_type": "caption"})
+
+    start = sent[0]
+    headers = dict(start["headers"])
+    assert start["status"] == 200
+    assert headers[b"content-type"].startswith(b"text/event-stream")
+    assert headers[b"cache-control"] == b"no-cache"
+
+    events = sse_events(sent)
+    names = [name for name, _ in events]
+    assert names[-1] == "done" and set(names[:-1]) == {"token"} and len(names) > 2
+    streamed = "".join(data["content"] for name, data in events if name == "token")
+
+    done = events[-1][1]
+    assert done["success"] is True and done["cached"] is False
+    assert done["data"][0]["content"] == streamed
+    assert done["tokens_used"] > 0
+
+    assert len(logged) == 1
+    assert logged[0]["user_id"] == 7 and logged[0]["request_type"] == "caption"
+    assert logged[0]["tokens_used"] == done["tokens_used"]
+    assert logged[0]["response"]["items"][0]["content"] == streamed
+
+
+async def test_stream_failure_ends_with_error_event(logged, fake_openai):
+    fake_openai.faults.update(fail_next=1, error_status=400)
+
+    events = sse_events(await post_stream({"prompt": "Leg day done", "request_type": "caption"}))
+
+    assert [name for name, _ in events] == ["error"]
+    assert "Failed to generate AI content" in events[0][1]["detail"]
+    assert len(logged) == 1 and "error" in logged[0]["response"]
+    assert logged[0]["tokens_used"] == 0
+
+
+async def test_client_disconnect_logs_partial_stream(logged, fake_openai, monkeypatch):
+    # Slow enough that the reply is far from finished when the client leaves
+    monkeypatch.setattr(fake_openai, "TOKEN_DELAY", 0.2)
+
+    sent = await post_stream({"prompt": "Leg day done", "request_type": "caption"}, disconnect_after_tokens=2)
+
+    events = sse_events(sent)
+    assert [name for name, _ in events] == ["token", "token"]
+    streamed = "".join(data["content"] for _, data in events)
+
+    assert len(logged) == 1
+    row = logged[0]
+    assert row["user_id"] == 7
+    assert "disconnected" in row["response"]["error"]
+    assert row["response"]["content"] == streamed
+    assert row["tokens_used"] == 2
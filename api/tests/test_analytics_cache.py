@@ -0,0 +1,78 @@
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import event, insert, select
+
+from app.core.config import Settings
+from app.database import SessionLocal, engine
+from app.models import AnalyticsCacheEntry, User
+from app.services.analytics_cache import AnalyticsCache, DatabaseBackend, analytics_cache
+
+
+def test_backend_defaults_to_database_with_several_workers():
+    assert Settings(WEB_CONCURRENCY=1).analytics_cache_backend == "memory"
+    assert Settings(WEB_CONCURRENCY=4).analytics_cache_backend == "database"
+    assert Settings(WEB_CONCURRENCY=1, ANALYTICS_CACHE_BACKEND="database").analytics_cache_backend == "database"
+
+
+def test_memory_backend_refused_with_several_workers():
+    with pytest.raises(ValidationError, match="WEB_CONCURRENCY"):
+        Settings(WEB_CONCURRENCY=4, ANALYTICS_CACHE_BACKEND="memory")
+
+
+def test_database_store_leaves_the_callers_transaction_open(committed_user):
+    cache = AnalyticsCache(DatabaseBackend(ttl=60))
+    with SessionLocal() as db:
+        db.execute(select(User.id).where(User.id == committed_user))
+        transaction = db.get_transaction()
+
+        analytics = cache.get(db, committed_user)
+
+        assert db.get_transaction() is transaction and transaction.is_active
+        db.rollback()
+
+        # Written and committed all the same, so the next request hits
+        assert db.scalar(
+            select(AnalyticsCacheEntry.payload).where(AnalyticsCacheEntry.user_id == committed_user)
+        ) is not None
+        assert cache.get(db, committed_user) == analytics
+        assert cache.hits == 1 and cache.misses == 1
+
+
+def test_failed_store_does_not_roll_back_the_caller(db):
+    # Not committed, so the cache's own session cannot see the user (foreign key violation)
+    user_id = db.execute(
+        insert(User).returning(User.id), {"email": "uncommitted@example.com", "username": "uncommitted", "role": "user"}
+    ).scalar_one()
+
+    AnalyticsCache(DatabaseBackend(ttl=60)).get(db, user_id)
+
+    assert db.get(User, user_id) is not None
+
+
+
+def test_database_backend_serves_repeat_hits_from_memory_until_a_bump(committed_user, monkeypatch):
+    backend = DatabaseBackend(ttl=60, local_ttl=60)
+    # The commit hook applies bumps to the module's cache
+    monkeypatch.setattr(analytics_cache, "backend", backend)
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with SessionLocal() as db:
+        first = analytics_cache.get(db, committed_user)
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            assert analytics_cache.get(db, committed_user) is first
+            assert statements == []
+
+            analytics_cache.invalidate(db, committed_user)
+            db.commit()
+            version = analytics_cache.version(db, committed_user)
+            statements.clear()
+            assert analytics_cache.get(db, committed_user) is not first
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    assert statements  # The bump dropped the local copy
+    assert backend.lookup(None, committed_user)[0] == version
@@ -0,0 +1,81 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import uuid
+
+import pytest
+from sqlalchemy import event, insert
+
+from app.models import AIRequest, Risk, Task, TaskDailySnapshot, User
+from app.services.analytics_service import build_analytics
+
+# One for every aggregate (tasks, risks, AI requests joined), one for the daily history
+ANALYTICS_QUERIES = 2
+
+
+@contextmanager
+def count_queries(db):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    connection = db.connection()
+    event.listen(connection, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(connection, "before_cursor_execute", before_cursor_execute)
+
+
+def seed_user(db, rows: int) -> int:
+    name = f"analytics-{uuid.uuid4().hex[:8]}"
+    user_id = db.execute(
+        insert(User).returning(User.id), {"email": f"{name}@example.com", "username": name, "role": "user"}
+    ).scalar_one()
+    now = datetime.utcnow()
+    db.execute(insert(Task), [
+        {
+            "title": f"Task {n}", "owner_id": user_id, "status": ["todo", "in_progress", "done"][n % 3],
+            "priority": "medium", "completed": n % 3 == 2,
+            "created_at": now - timedelta(days=2), "updated_at": now,
+        }
+        for n in range(rows)
+    ])
+    db.execute(insert(Risk), [
+        {
+            "title": f"Risk {n}", "owner_id": user_id, "status": ["open", "mitigated"][n % 2],
+            "probability": "high", "impact": "critical", "created_at": now, "updated_at": now,
+        }
+        for n in range(rows)
+    ])
+    db.execute(insert(AIRequest), [
+        {"user_id": user_id, "request_type": "caption", "prompt": "p", "tokens_used": 1, "created_at": now}
+        for _ in range(rows)
+    ])
+    db.execute(insert(TaskDailySnapshot), [
+        {"owner_id": user_id, "day": (now - timedelta(days=n)).date(),
+         "total_tasks": rows, "completed_tasks": rows // 3, "completions": 1}
+        for n in range(rows)
+    ])
+    return user_id
+
+
+@pytest.mark.parametrize("rows", [3, 60])
+def test_build_analytics_query_count_does_not_grow_with_data(db, rows):
+    user_id = seed_user(db, rows)
+
+    with count_queries(db) as statements:
+        analytics = build_analytics(db, user_id)
+
+    assert len(statements) == ANALYTICS_QUERIES, statements
+    assert all(statement.lstrip().upper().startswith("SELECT") for statement in statements)
+
+    totals = analytics.totals
+    assert totals.total_tasks == rows
+    assert totals.completed_tasks == rows // 3
+    assert totals.total_risks == rows
+    assert totals.open_risks == (rows + 1) // 2
+    assert totals.ai_requests_count == rows
+    assert totals.average_lead_time == pytest.approx(2, abs=0.01)
+    assert totals.risk_score == 100  # Every open risk is high x critical
+    assert analytics.risk_distribution.critical == rows
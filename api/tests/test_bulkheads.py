@@ -0,0 +1,19 @@
+from fastapi.routing import APIRoute
+
+from app.core.config import settings
+from main import app
+
+# Routes that can call the model; every other /ai route is a cheap read or write
+MODEL_ROUTES = {"/ai/generate", "/ai/generate/batch", "/ai/generate/stream", "/ai/hashtags/suggest"}
+
+
+def test_only_routes_calling_the_model_use_the_ai_pool():
+    prefix = settings.API_V1_STR
+    pools = {
+        route.path[len(prefix):]: route.bulkhead.name
+        for route in app.routes
+        if isinstance(route, APIRoute) and route.path.startswith(f"{prefix}/ai/")
+    }
+
+    assert {path for path, pool in pools.items() if pool == "ai"} == MODEL_ROUTES
+    assert pools["/ai/history"] == pools["/ai/cache/stats"] == "crud"
@@ -0,0 +1,60 @@
+import zipfile
+
+from fastapi.testclient import TestClient
+from sqlalchemy import delete
+
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.database import SessionLocal
+from app.models import Task
+from app.services.analytics_cache import analytics_cache
+from app.services.data_export import account_archive, discard_account_archive
+from main import app
+
+
+def test_account_archive_is_reused_until_the_data_changes(committed_user, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "USER_EXPORT_DIR", str(tmp_path))
+    profile = {"id": committed_user, "username": "archive"}
+
+    with SessionLocal() as db:
+        first = account_archive(db, committed_user, profile)
+        assert account_archive(db, committed_user, profile) == first
+
+        db.add(Task(title="Added after the export", owner_id=committed_user))
+        analytics_cache.invalidate(db, committed_user)
+        db.commit()
+
+        second = account_archive(db, committed_user, profile)
+        assert second != first
+        assert not first.exists()
+        with zipfile.ZipFile(second) as archive:
+            assert "Added after the export" in archive.read("tasks.ndjson").decode()
+
+        # A changed profile is a different archive too
+        third = account_archive(db, committed_user, {**profile, "username": "renamed"})
+        assert third != second
+
+        db.execute(delete(Task).where(Task.owner_id == committed_user))
+        db.commit()
+
+    discard_account_archive(committed_user)
+    assert not list(tmp_path.glob(f"account-{committed_user}-*.zip"))
+
+
+def test_account_archive_download_resumes_with_if_range(committed_user, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "USER_EXPORT_DIR", str(tmp_path))
+    client = TestClient(app)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(committed_user)})}"}
+    url = f"{settings.API_V1_STR}/users/me/export.zip"
+
+    first = client.get(url, headers=headers)
+    assert first.status_code == 200
+
+    # Reusing the archive must not change its validators
+    resumed = client.get(url, headers={**headers, "Range": "bytes=10-", "If-Range": first.headers["etag"]})
+    assert resumed.status_code == 206
+    assert resumed.headers["etag"] == first.headers["etag"]
+    assert resumed.headers["last-modified"] == first.headers["last-modified"]
+    assert resumed.content == first.content[10:]
+
+    discard_account_archive(committed_user)
@@ -0,0 +1,21 @@
+from app.services.openai_service import GenerationCache, normalize_prompt
+
+
+def test_normalize_prompt_keeps_word_order():
+    assert normalize_prompt("Leg day  motivation!") == "leg day motivation"
+    assert normalize_prompt("leg day, motivation") == "leg day motivation"
+    assert normalize_prompt("Don't skip #LegDay") == "don't skip #legday"
+    assert normalize_prompt("motivation for leg day") != normalize_prompt("leg day motivation")
+    assert normalize_prompt("dog bites man") != normalize_prompt("man bites dog")
+
+
+def test_similarity_tier_only_matches_cosmetic_differences():
+    cache = GenerationCache(16, 60)
+    messages = [{"role": "system", "content": "s"}, {"role": "user", "content": "Leg day motivation"}]
+    cache.set("gpt-4", messages, 0.7, 100, "cached")
+
+    respaced = [messages[0], {"role": "user", "content": "leg day   motivation!"}]
+    reordered = [messages[0], {"role": "user", "content": "motivation for leg day"}]
+    assert cache.get("gpt-4", respaced, 0.7, 100) == "cached"
+    assert cache.get("gpt-4", reordered, 0.7, 100) is None
+    assert cache.stats()["similar_hits"] == 1
@@ -0,0 +1,87 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.principals import Principal
+from app.core.security import get_current_principal
+from app.services import hashtag_recommender
+from app.services.hashtag_recommender import HashtagIndex
+from main import app
+
+OLD_POSTS = [(1, 7, "#legday #squats", 1.0), (2, 7, "#legday #squats", 2.0)]
+NEW_POSTS = [(1, 7, "#legday #deadlift", 1.0), (2, 7, "#legday #deadlift", 2.0)]
+
+
+def suggested_tags(index, caption="#legday"):
+    return [suggestion.tag for suggestion in index.suggest(7, caption)]
+
+
+def test_previous_index_is_served_while_rebuilding():
+    index = HashtagIndex()
+    index.load(OLD_POSTS)
+    reading, release = threading.Event(), threading.Event()
+
+    def slow_rows():
+        yield NEW_POSTS[0]
+        reading.set()
+        release.wait(5)
+        yield NEW_POSTS[1]
+
+    rebuild = threading.Thread(target=index.load, args=(slow_rows(),))
+    rebuild.start()
+    assert reading.wait(5)
+
+    assert suggested_tags(index) == ["#squats"]
+    release.set()
+    rebuild.join(5)
+    assert suggested_tags(index) == ["#deadlift"]
+
+
+def test_background_thread_builds_then_syncs(monkeypatch):
+    monkeypatch.setattr(settings, "HASHTAG_INDEX_SYNC_SECONDS", 0.05)
+    index = HashtagIndex()
+    calls = []
+
+    def rebuild(db):
+        calls.append("rebuild")
+        index.load(OLD_POSTS)
+
+    def sync(db):
+        calls.append("sync")
+
+    monkeypatch.setattr(index, "_rebuild", rebuild)
+    monkeypatch.setattr(index, "_sync", sync)
+    monkeypatch.setattr(hashtag_recommender, "SessionLocal", lambda: SimpleNamespace(close=lambda: None))
+
+    index.start()
+    try:
+        deadline = time.monotonic() + 5
+        while calls.count("sync") < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        index.stop()
+
+    assert calls[0] == "rebuild" and calls.count("rebuild") == 1
+    assert calls.count("sync") >= 2
+    assert index.stats()["built"] is True
+
+
+def test_suggest_route_never_refreshes_inline(monkeypatch):
+    index = HashtagIndex()
+    index.load(OLD_POSTS)
+    monkeypatch.setattr(index, "refresh", lambda: pytest.fail("refreshed inside a request"))
+    monkeypatch.setattr("app.routers.ai.hashtag_index", index)
+    app.dependency_overrides[get_current_principal] = lambda: Principal(7, "user", True)
+    try:
+        response = TestClient(app).post(
+            f"{settings.API_V1_STR}/ai/hashtags/suggest", json={"caption": "Leg day #legday", "enrich": False}
+        )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert [suggestion["tag"] for suggestion in response.json()["hashtags"]] == ["#squats"]
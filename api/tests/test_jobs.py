@@ -0,0 +1,106 @@
+import threading
+import time
+
+import pytest
+from openai import OpenAI
+from sqlalchemy import func, select, update
+
+from app.core.config import settings
+from app.database import SessionLocal
+from app.models.ai_request import AIRequest
+from app.models.job import Job, JobStatus
+from app.services import jobs
+from app.services.jobs import JobOutput, JobRunner, enqueue_job, job_handler
+from app.services.openai_service import openai_service
+
+
+def job_state(job_id):
+    with SessionLocal() as db:
+        job = db.get(Job, job_id)
+        return job.status, job.attempts, job.error
+
+
+def enqueue(user_id, kind, payload=None):
+    with SessionLocal() as db:
+        return enqueue_job(db, user_id, kind, payload).id
+
+
+@pytest.fixture
+def fake_client(monkeypatch, fake_openai, fake_openai_server):
+    monkeypatch.setattr(openai_service, "client", OpenAI(api_key="test", base_url=fake_openai_server, max_retries=0))
+    monkeypatch.setattr(openai_service.cache, "enabled", False)
+    monkeypatch.setattr(settings, "AI_RETRY_MAX_ATTEMPTS", 1)
+    monkeypatch.setattr(settings, "AI_BREAKER_FAILURE_THRESHOLD", 100)
+    monkeypatch.setattr(settings, "AI_FALLBACK_MODELS", "gpt-4")
+    return fake_openai
+
+
+GENERATE = {"request_type": "caption", "prompt": "Leg day", "model": "gpt-4"}
+
+
+def test_rejected_generation_is_not_retried(committed_user, fake_client):
+    fake_client.faults.update(fail_next=1, error_status=400)
+    job_id = enqueue(committed_user, "ai.generate", GENERATE)
+
+    assert JobRunner().run_once()
+
+    status, attempts, error = job_state(job_id)
+    assert (status, attempts) == (JobStatus.FAILED.value, 1)
+    assert "AI service error" in error
+
+
+def test_unavailable_generation_is_retried(committed_user, fake_client):
+    fake_client.faults.update(fail_next=1, error_status=503)
+    job_id = enqueue(committed_user, "ai.generate", GENERATE)
+
+    assert JobRunner().run_once()
+
+    status, attempts, _ = job_state(job_id)
+    assert (status, attempts) == (JobStatus.QUEUED.value, 1)
+
+
+def test_generation_is_not_logged_when_the_lease_was_lost(committed_user, fake_client, monkeypatch):
+    job_id = enqueue(committed_user, "ai.generate", GENERATE)
+    generate = openai_service.generate
+
+    def generate_then_lose_lease(*args, **kwargs):
+        result = generate(*args, **kwargs)
+        # Another worker reclaims the job while this one is still generating
+        with SessionLocal() as db:
+            db.execute(update(Job).where(Job.id == job_id).values(lease_token="reclaimed"))
+            db.commit()
+        return result
+
+    monkeypatch.setattr(openai_service, "generate", generate_then_lose_lease)
+
+    assert JobRunner().run_once()
+
+    with SessionLocal() as db:
+        assert db.scalar(select(func.count()).where(AIRequest.user_id == committed_user)) == 0
+        assert db.get(Job, job_id).status == JobStatus.RUNNING.value
+
+
+@pytest.fixture
+def slow_job_kind():
+    @job_handler("test.slow")
+    def slow(db, user_id, payload):
+        time.sleep(payload["seconds"])
+        return JobOutput(result={"slept": payload["seconds"]})
+
+    yield "test.slow"
+    jobs._handlers.pop("test.slow")
+
+
+def test_lease_is_renewed_while_the_job_runs(committed_user, slow_job_kind, monkeypatch):
+    monkeypatch.setattr(settings, "JOB_LEASE_SECONDS", 0.3)
+    job_id = enqueue(committed_user, slow_job_kind, {"seconds": 1.2})
+
+    worker = threading.Thread(target=JobRunner().run_once)
+    worker.start()
+    time.sleep(0.8)
+    # Well past the lease: without renewal another worker would reclaim the job here
+    assert JobRunner()._claim() is None
+    worker.join(5)
+
+    status, attempts, _ = job_state(job_id)
+    assert (status, attempts) == (JobStatus.SUCCEEDED.value, 1)
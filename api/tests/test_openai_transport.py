@@ -0,0 +1,231 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from openai import AsyncOpenAI, BadRequestError, OpenAI
+
+from app.core.config import settings
+from app.services import openai_transport as transport_module
+from app.services.openai_transport import AIServiceUnavailable, CircuitBreaker, OpenAITransport
+
+MESSAGES = [{"role": "user", "content": "leg day"}]
+
+
+@pytest.fixture(autouse=True)
+def fast_transport_settings(monkeypatch):
+    monkeypatch.setattr(settings, "AI_RETRY_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(settings, "AI_RETRY_BACKOFF_SECONDS", 0.01)
+    monkeypatch.setattr(settings, "AI_RETRY_MAX_BACKOFF_SECONDS", 1.0)
+    monkeypatch.setattr(settings, "AI_BREAKER_FAILURE_THRESHOLD", 100)
+    monkeypatch.setattr(settings, "AI_BREAKER_RESET_SECONDS", 30.0)
+    monkeypatch.setattr(settings, "AI_FALLBACK_MODELS", "gpt-4,gpt-4-turbo,gpt-3.5-turbo")
+
+
+@pytest.fixture
+def client(fake_openai_server):
+    return OpenAI(api_key="test", base_url=fake_openai_server, max_retries=0, timeout=10)
+
+
+@pytest.fixture
+def async_client(fake_openai_server):
+    return AsyncOpenAI(api_key="test", base_url=fake_openai_server, max_retries=0, timeout=10)
+
+
+def sender(client):
+    return lambda model: client.chat.completions.create(model=model, messages=MESSAGES)
+
+
+@pytest.mark.parametrize("status", [429, 500, 503])
+def test_transient_failures_are_retried(fake_openai, client, status):
+    fake_openai.faults.update(fail_next=2, error_status=status, retry_after=0.01)
+    transport = OpenAITransport()
+
+    response, model_used = transport.call("gpt-4", sender(client))
+
+    assert model_used == "gpt-4"
+    assert response.choices[0].message.content
+    assert fake_openai.requests_by_model == {"gpt-4": 3}
+    assert transport.retries == 2
+
+
+def test_retry_after_is_honoured(fake_openai, client):
+    fake_openai.faults.update(fail_next=1, error_status=429, retry_after=0.5)
+    transport = OpenAITransport()
+
+    start = time.perf_counter()
+    transport.call("gpt-4", sender(client))
+
+    assert time.perf_counter() - start >= 0.5
+    assert fake_openai.requests_by_model == {"gpt-4": 2}
+
+
+def test_retry_after_beyond_backoff_cap_moves_to_next_model(fake_openai, client):
+    fake_openai.faults.update(fail_next=1, error_status=429, retry_after=60)
+    transport = OpenAITransport()
+
+    start = time.perf_counter()
+    _, model_used = transport.call("gpt-4", sender(client))
+
+    assert time.perf_counter() - start < 5
+    assert model_used == "gpt-4-turbo"
+    assert fake_openai.requests_by_model == {"gpt-4": 1, "gpt-4-turbo": 1}
+
+
+def test_bad_request_is_not_retried(fake_openai, client):
+    fake_openai.faults.update(fail_next=1, error_status=400)
+    transport = OpenAITransport()
+
+    with pytest.raises(BadRequestError):
+        transport.call("gpt-4", sender(client))
+
+    assert fake_openai.requests_by_model == {"gpt-4": 1}
+    assert transport.retries == 0
+    assert transport.stats()["models"]["gpt-4"]["breaker"] == "closed"
+
+
+def test_falls_back_along_the_chain(fake_openai, client):
+    fake_openai.faults.update(down_models=["gpt-4", "gpt-4-turbo"])
+    transport = OpenAITransport()
+
+    _, model_used = transport.call("gpt-4", sender(client))
+
+    assert model_used == "gpt-3.5-turbo"
+    assert fake_openai.requests_by_model == {"gpt-4": 3, "gpt-4-turbo": 3, "gpt-3.5-turbo": 1}
+    assert transport.fallbacks == 1
+
+
+def test_unavailable_when_every_model_fails(fake_openai, client):
+    fake_openai.faults.update(down_models=["gpt-4", "gpt-4-turbo", "gpt-3.5-turbo"])
+
+    with pytest.raises(AIServiceUnavailable) as excinfo:
+        OpenAITransport().call("gpt-4-turbo", sender(client))
+
+    assert excinfo.value.retry_after >= 1
+    # The chain starts at the requested model
+    assert "gpt-4" not in fake_openai.requests_by_model
+
+
+def test_open_breaker_skips_the_model(fake_openai, client, monkeypatch):
+    monkeypatch.setattr(settings, "AI_BREAKER_FAILURE_THRESHOLD", 2)
+    fake_openai.faults.update(down_models=["gpt-4"])
+    transport = OpenAITransport()
+
+    transport.call("gpt-4", sender(client))
+    assert fake_openai.requests_by_model["gpt-4"] == 2
+    transport.call("gpt-4", sender(client))
+
+    assert fake_openai.requests_by_model["gpt-4"] == 2
+    assert transport.stats()["models"]["gpt-4"]["breaker"] == "open"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_breaker_open_half_open_closed(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(transport_module.time, "monotonic", clock)
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+
+    breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    clock.now += 10
+    assert breaker.state == "half_open"
+    assert breaker.allow()  # The one trial call
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+    assert breaker.times_opened == 1
+
+
+def test_failed_trial_reopens_breaker(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(transport_module.time, "monotonic", clock)
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+
+    breaker.record_failure()
+    clock.now += 10
+    assert breaker.allow()
+    breaker.record_failure()
+
+    assert breaker.state == "open" and not breaker.allow()
+    clock.now += 9
+    assert not breaker.allow()
+    clock.now += 1
+    assert breaker.allow()
+
+
+def error_with_headers(**headers):
+    return SimpleNamespace(response=SimpleNamespace(headers=headers))
+
+
+@pytest.mark.parametrize("jitter", [0.0, 1.0])
+def test_backoff_bounds(monkeypatch, jitter):
+    monkeypatch.setattr(settings, "AI_RETRY_MAX_ATTEMPTS", 10)
+    monkeypatch.setattr(settings, "AI_RETRY_BACKOFF_SECONDS", 0.5)
+    monkeypatch.setattr(settings, "AI_RETRY_MAX_BACKOFF_SECONDS", 4.0)
+    monkeypatch.setattr(transport_module.random, "uniform", lambda a, b: a + (b - a) * jitter)
+    error = error_with_headers()
+
+    for attempt in range(1, 10):
+        cap = min(4.0, 0.5 * 2 ** (attempt - 1))
+        delay = OpenAITransport._backoff(attempt, error)
+        assert cap / 2 <= delay <= cap
+    assert OpenAITransport._backoff(10, error) is None
+
+
+def test_backoff_uses_retry_after_up_to_the_cap(monkeypatch):
+    monkeypatch.setattr(settings, "AI_RETRY_MAX_BACKOFF_SECONDS", 4.0)
+
+    assert OpenAITransport._backoff(1, error_with_headers(**{"retry-after": "3"})) == 3
+    assert OpenAITransport._backoff(1, error_with_headers(**{"retry-after-ms": "250"})) == 0.25
+    assert OpenAITransport._backoff(1, error_with_headers(**{"retry-after": "30"})) is None
+
+
+async def test_async_call_retries(fake_openai, async_client):
+    fake_openai.faults.update(fail_next=1, error_status=500)
+    transport = OpenAITransport()
+
+    _, model_used = await transport.call_async("gpt-4", sender(async_client))
+
+    assert model_used == "gpt-4"
+    assert fake_openai.requests_by_model == {"gpt-4": 2}
+
+
+async def test_hedge_cancels_the_slower_call(fake_openai, async_client, monkeypatch):
+    monkeypatch.setattr(settings, "AI_HEDGE_AFTER_SECONDS", 0.1)
+    fake_openai.faults.update(slow_next=1, slow_latency=5)
+    transport = OpenAITransport()
+    started, cancelled = [], []
+
+    async def send(model):
+        call = len(started)
+        started.append(call)
+        try:
+            return await async_client.chat.completions.create(model=model, messages=MESSAGES)
+        except asyncio.CancelledError:
+            cancelled.append(call)
+            raise
+
+    start = time.perf_counter()
+    response, _ = await transport.call_async("gpt-4", send, hedge=True)
+    elapsed = time.perf_counter() - start
+    for _ in range(100):  # Let the cancellation be delivered
+        if cancelled:
+            break
+        await asyncio.sleep(0.01)
+
+    assert elapsed < 2
+    assert response.choices[0].message.content
+    assert started == [0, 1]
+    assert cancelled == [0]
+    assert transport.hedges == 1 and transport.hedge_wins == 1
@@ -0,0 +1,35 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.pagination import MAX_PAGE_SIZE, _page, decode_cursor
+from app.core.principals import Principal
+from app.core.security import get_current_principal
+from main import app
+
+LIST_ROUTES = ["tasks/", "risks/", "projects/", "posts/", "ai/history"]
+
+
+@pytest.fixture
+def client():
+    app.dependency_overrides[get_current_principal] = lambda: Principal(1, "user", True)
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.parametrize("route", LIST_ROUTES)
+@pytest.mark.parametrize("query", ["limit=0", "limit=-1", f"limit={MAX_PAGE_SIZE + 1}", "skip=-1", "cursor=&limit=0"])
+def test_list_routes_reject_out_of_range_paging(client, route, query):
+    response = client.get(f"{settings.API_V1_STR}/{route}?{query}")
+    assert response.status_code == 422
+
+
+def test_page_cursor_points_at_last_returned_row():
+    rows = [SimpleNamespace(id=i, created_at=datetime(2025, 1, 1, 0, i)) for i in range(4)]
+    page = _page(rows, 3)
+    assert page["items"] == rows[:3]
+    assert decode_cursor(page["next_cursor"]) == (rows[2].created_at, 2)
+    assert _page(rows[:3], 3)["next_cursor"] is None
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+from starlette.requests import Request
+
+from app.core.config import settings
+from app.core.rate_limit import rate_limit_key
+from app.core.security import create_access_token, create_refresh_token
+
+
+def make_request(peer: str, forwarded_for: str = None, token: str = None) -> Request:
+    headers = []
+    if forwarded_for:
+        headers.append((b"x-forwarded-for", forwarded_for.encode()))
+    if token:
+        headers.append((b"authorization", f"Bearer {token}".encode()))
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers, "client": (peer, 1234)})
+
+
+@pytest.fixture
+def trusted_proxy(monkeypatch):
+    monkeypatch.setattr(settings, "TRUSTED_PROXIES", "10.0.0.0/8")
+
+
+def test_forwarded_for_ignored_without_trusted_proxies():
+    assert rate_limit_key(make_request("1.2.3.4", "9.9.9.9")) == "ip:1.2.3.4"
+
+
+def test_forwarded_for_ignored_from_untrusted_peer(trusted_proxy):
+    assert rate_limit_key(make_request("1.2.3.4", "9.9.9.9")) == "ip:1.2.3.4"
+
+
+def test_forwarded_for_last_untrusted_hop_from_trusted_proxy(trusted_proxy):
+    # The client may prepend anything; only the hop our proxy appended counts
+    assert rate_limit_key(make_request("10.0.0.5", "6.6.6.6, 5.5.5.5")) == "ip:5.5.5.5"
+    assert rate_limit_key(make_request("10.0.0.5", "5.5.5.5, 10.0.0.9")) == "ip:5.5.5.5"
+
+
+def test_access_token_keys_on_user():
+    token = create_access_token({"sub": "7"})
+    assert rate_limit_key(make_request("1.2.3.4", token=token)) == "user:7"
+
+
+def test_refresh_token_does_not_key_on_user():
+    token = create_refresh_token({"sub": "7"})
+    assert rate_limit_key(make_request("1.2.3.4", token=token)) == "ip:1.2.3.4"
+
+
+async def test_streamed_response_starts_once_under_rate_limiting():
+    from slowapi import Limiter
+    from starlette.applications import Starlette
+    from starlette.responses import StreamingResponse
+    from starlette.routing import Route
+
+    from app.core.rate_limit import RateLimitMiddleware
+
+    async def chunks():
+        for chunk in (b"a", b"b", b"c"):
+            yield chunk
+
+    async def stream(request):
+        return StreamingResponse(chunks())
+
+    app = Starlette(routes=[Route("/stream", stream)])
+    app.state.limiter = Limiter(
+        key_func=lambda request: "k", default_limits=["10/minute"], storage_uri="memory://", headers_enabled=True
+    )
+    app.add_middleware(RateLimitMiddleware)
+
+    sent = []
+
+    async def receive():
+        # A client that stays connected and sends nothing more
+        await asyncio.sleep(60)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/stream", "headers": [], "query_string": b"",
+             "client": ("1.2.3.4", 1234), "server": ("test", 80), "scheme": "http", "root_path": ""}
+    await app(scope, receive, send)
+
+    assert [m["type"] for m in sent] == ["http.response.start"] + ["http.response.body"] * 4
+    assert (b"x-ratelimit-limit", b"10") in sent[0]["headers"]
+    assert b"".join(m.get("body", b"") for m in sent[1:]) == b"abc"
@@ -0,0 +1,103 @@
+import uuid
+
+import pytest
+from sqlalchemy import delete, insert
+
+from app.core.config import settings
+from app.core.security import create_refresh_token, decode_access_token
+from app.database import AsyncSessionLocal, async_engine
+from app.models import User
+from app.services.refresh_tokens import (
+    RefreshTokenJustRotated,
+    consume_legacy_refresh_token,
+    issue_refresh_token,
+    revoke_refresh_family,
+    rotate_refresh_token,
+)
+
+
+@pytest.fixture
+async def session(database):
+    async with AsyncSessionLocal() as db:
+        yield db
+    # Pooled asyncpg connections belong to this test's event loop
+    await async_engine.dispose()
+
+
+@pytest.fixture
+async def user_id(session):
+    name = f"refresh-{uuid.uuid4().hex[:8]}"
+    user_id = (await session.execute(
+        insert(User).returning(User.id), {"email": f"{name}@example.com", "username": name, "role": "user"}
+    )).scalar_one()
+    await session.commit()
+    yield user_id
+    await session.execute(delete(User).where(User.id == user_id))
+    await session.commit()
+
+
+async def rotate(db, token):
+    rotated = await rotate_refresh_token(db, decode_access_token(token))
+    await db.commit()
+    return rotated
+
+
+async def login(db, user_id):
+    token = issue_refresh_token(db, user_id)
+    await db.commit()
+    return token
+
+
+async def test_rotation_consumes_the_token(session, user_id):
+    first = await login(session, user_id)
+    principal, second = await rotate(session, first)
+
+    assert principal.id == user_id
+    assert (await rotate(session, second)) is not None
+
+
+async def test_replay_inside_grace_window_asks_for_retry(session, user_id):
+    first = await login(session, user_id)
+    _, second = await rotate(session, first)
+
+    with pytest.raises(RefreshTokenJustRotated):
+        await rotate(session, first)
+    await session.rollback()
+
+    # The family survived, so the successor still works
+    assert (await rotate(session, second)) is not None
+
+
+async def test_replay_after_grace_window_revokes_family(session, user_id, monkeypatch):
+    monkeypatch.setattr(settings, "REFRESH_TOKEN_REUSE_GRACE_SECONDS", 0)
+    first = await login(session, user_id)
+    _, second = await rotate(session, first)
+
+    assert (await rotate(session, first)) is None
+    assert (await rotate(session, second)) is None
+
+
+async def test_replay_after_logout_is_rejected(session, user_id):
+    first = await login(session, user_id)
+    _, second = await rotate(session, first)
+    await revoke_refresh_family(session, decode_access_token(second)["fam"])
+    await session.commit()
+
+    # Inside the grace window, but there is no successor left to retry with
+    assert (await rotate(session, first)) is None
+
+
+async def test_legacy_token_is_accepted_once(session, user_id, monkeypatch):
+    monkeypatch.setattr(settings, "REFRESH_TOKEN_REUSE_GRACE_SECONDS", 0)
+    legacy = create_refresh_token(data={"sub": str(user_id)})
+    payload = decode_access_token(legacy)
+
+    family_id = await consume_legacy_refresh_token(session, legacy, payload)
+    assert family_id is not None
+    successor = issue_refresh_token(session, user_id, family_id)
+    await session.commit()
+
+    assert (await consume_legacy_refresh_token(session, legacy, payload)) is None
+    await session.commit()
+    # Replaying it counts as reuse: the family it started is revoked
+    assert (await rotate(session, successor)) is None
@@ -0,0 +1,38 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from app.core.principals import Principal, principal_cache
+from app.core.revocations import ClaimRevocations
+from app.models.auth_revocation import AuthRevocation
+
+# No foreign key on auth_revocations, so ids need no users row
+USER_ID = 2_000_000_001
+
+
+def test_merge_reports_raised_epochs():
+    revocations = ClaimRevocations(refresh_interval=30)
+    later = datetime.utcnow() + timedelta(minutes=5)
+
+    assert revocations._merge({1: (3, later), 2: (1, later)}) == {1, 2}
+    assert revocations._merge({1: (3, later), 2: (2, later)}) == {2}
+    assert revocations._merge({1: (2, later)}) == set()
+
+
+def test_refresh_evicts_cached_principal_of_revoked_user(db):
+    revocations = ClaimRevocations(refresh_interval=30)
+    revocations.refresh(db)
+    principal_cache.set(Principal(USER_ID, "admin", True), principal_cache.generation)
+
+    # Another process demoted the user: only the revocation row tells us
+    db.execute(insert(AuthRevocation), {"user_id": USER_ID, "auth_epoch": 4, "revoked_at": datetime.utcnow()})
+    revocations.refresh(db)
+
+    assert principal_cache.get(USER_ID) is None
+    assert not revocations.is_current(USER_ID, 3)
+
+    # Nothing new on the next refresh, so a principal cached since stays
+    principal_cache.set(Principal(USER_ID, "user", True), principal_cache.generation)
+    revocations.refresh(db)
+    assert principal_cache.get(USER_ID) == Principal(USER_ID, "user", True)
+    principal_cache.evict([USER_ID])
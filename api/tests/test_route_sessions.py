@@ -0,0 +1,20 @@
+from fastapi.routing import APIRoute
+
+from app.database import get_async_db, get_db
+from main import app
+
+
+def _calls(dependant) -> set:
+    calls = {dependant.call}
+    for sub in dependant.dependencies:
+        calls |= _calls(sub)
+    return calls
+
+
+def test_no_route_holds_both_a_sync_and_an_async_session():
+    mixed = [
+        f"{sorted(route.methods)} {route.path}"
+        for route in app.routes
+        if isinstance(route, APIRoute) and {get_db, get_async_db} <= _calls(route.dependant)
+    ]
+    assert mixed == []
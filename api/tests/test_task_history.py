@@ -0,0 +1,59 @@
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import insert
+
+from app.models import User
+from app.models.task import TaskStatus
+from app.services.task_history import load_daily_counts, record_task_transition
+
+TODO, DONE = TaskStatus.TODO, TaskStatus.DONE
+DAY = date(2025, 3, 10)
+
+
+def at(hour: int, day: date = DAY) -> datetime:
+    return datetime(day.year, day.month, day.day, hour)
+
+
+def owner(db) -> int:
+    return db.execute(
+        insert(User).returning(User.id), {"email": "history@example.com", "username": "history", "role": "user"}
+    ).scalar_one()
+
+
+def day_counts(db, owner_id: int, day: date = DAY):
+    return load_daily_counts(db, owner_id, 1, today=day)[0]
+
+
+def test_reopened_and_completed_again_counts_once(db):
+    owner_id = owner(db)
+    for hour, (from_status, to_status) in enumerate([(None, TODO), (TODO, DONE), (DONE, TODO), (TODO, DONE)]):
+        record_task_transition(db, 1, owner_id, from_status, to_status, when=at(hour + 8))
+
+    counts = day_counts(db, owner_id)
+    assert (counts.total_tasks, counts.completed_tasks, counts.completions) == (1, 1, 1)
+
+
+def test_reopened_or_deleted_the_same_day_is_no_completion(db):
+    owner_id = owner(db)
+    record_task_transition(db, 1, owner_id, None, DONE, when=at(8))
+    record_task_transition(db, 2, owner_id, None, TODO, when=at(8))
+    record_task_transition(db, 2, owner_id, TODO, DONE, when=at(9))
+    record_task_transition(db, 1, owner_id, DONE, None, when=at(10))
+    record_task_transition(db, 2, owner_id, DONE, TODO, when=at(11))
+
+    counts = day_counts(db, owner_id)
+    assert (counts.total_tasks, counts.completed_tasks, counts.completions) == (1, 0, 0)
+
+
+def test_reopening_later_keeps_the_earlier_days_completion(db):
+    owner_id = owner(db)
+    next_day = DAY + timedelta(days=1)
+    record_task_transition(db, 1, owner_id, None, TODO, when=at(8))
+    record_task_transition(db, 1, owner_id, TODO, DONE, when=at(9))
+    record_task_transition(db, 1, owner_id, DONE, TODO, when=at(9, next_day))
+    record_task_transition(db, 1, owner_id, TODO, DONE, when=at(10, next_day))
+    record_task_transition(db, 1, owner_id, DONE, None, when=at(11, next_day))
+
+    first, second = load_daily_counts(db, owner_id, 2, today=next_day)
+    assert (first.completed_tasks, first.completions) == (1, 1)
+    assert (second.total_tasks, second.completed_tasks, second.completions) == (0, 0, 0)
@@ -0,0 +1,40 @@
+import pytest
+
+from app.core.config import settings
+from app.core.security import create_access_token, decode_access_token
+
+
+@pytest.fixture
+def kidless_token():
+    # Signed while SECRET_KEY was the active key
+    return create_access_token({"sub": "7"})
+
+
+@pytest.fixture
+def rotated(monkeypatch):
+    monkeypatch.setattr(settings, "JWT_SIGNING_KEYS", {"2026-10": "new-signing-key"})
+    monkeypatch.setattr(settings, "JWT_ACTIVE_KID", "2026-10")
+
+
+def test_kidless_token_accepted_while_legacy_tokens_are(kidless_token, rotated):
+    assert decode_access_token(kidless_token)["sub"] == "7"
+
+
+def test_kidless_token_rejected_once_secret_key_is_retired(kidless_token, rotated, monkeypatch):
+    monkeypatch.setattr(settings, "JWT_ACCEPT_LEGACY_TOKENS", False)
+
+    assert decode_access_token(kidless_token) is None
+    assert decode_access_token(create_access_token({"sub": "7"}))["sub"] == "7"
+
+
+def test_kidless_token_accepted_while_secret_key_is_listed(kidless_token, rotated, monkeypatch):
+    monkeypatch.setattr(settings, "JWT_ACCEPT_LEGACY_TOKENS", False)
+    monkeypatch.setattr(settings, "JWT_SIGNING_KEYS", {**settings.JWT_SIGNING_KEYS, "old": settings.SECRET_KEY})
+
+    assert decode_access_token(kidless_token)["sub"] == "7"
+
+
+def test_kidless_tokens_always_accepted_while_secret_key_signs(kidless_token, monkeypatch):
+    monkeypatch.setattr(settings, "JWT_ACCEPT_LEGACY_TOKENS", False)
+
+    assert decode_access_token(kidless_token)["sub"] == "7"